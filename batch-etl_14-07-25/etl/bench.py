@@ -0,0 +1,125 @@
+import json
+import multiprocessing
+import os
+import platform
+import shutil
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import asdict, dataclass, field
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Callable, Iterable
+
+import duckdb
+import pandas as pd
+import pyarrow as pa
+
+from etl.io import Engine, ParquetLayout, csv_to_duck, csvs_to_parquet, parquet_to_duck
+from etl.metrics import path_bytes, peak_rss_bytes
+
+@dataclass(frozen=True)
+class BenchCase:
+    """One engine/option combination; ``stage=False`` loads the CSV straight into DuckDB."""
+    engine: Engine = Engine.pandas
+    chunksize: int | None = None
+    layout: ParquetLayout = field(default_factory=ParquetLayout)
+    stage: bool = True
+
+    @property
+    def name(self) -> str:
+        parts = [Engine(self.engine).value]
+        if not self.stage:
+            parts.append("direct")
+        if self.chunksize:
+            parts.append(f"chunk{self.chunksize}")
+        if self.stage:
+            parts.append(self.layout.compression)
+        if self.layout.partition_by:
+            parts.append("by-" + "-".join(self.layout.partition_by))
+        if self.layout.row_group_size:
+            parts.append(f"rg{self.layout.row_group_size}")
+        return "/".join(parts)
+
+def _timed(fn: Callable, *args, **kwargs) -> dict:
+    t = os.times()
+    wall = time.perf_counter()
+    fn(*args, **kwargs)
+    wall = time.perf_counter() - wall
+    u = os.times()
+    cpu = (u.user + u.system + u.children_user + u.children_system) - (
+        t.user + t.system + t.children_user + t.children_system)
+    return {"seconds": wall, "cpu_seconds": cpu, "peak_rss_bytes": peak_rss_bytes()}
+
+def _stage(isolate: bool, fn: Callable, *args, **kwargs) -> dict:
+    """Time ``fn``; with ``isolate`` it runs in a fresh interpreter so peak RSS is its own."""
+    if not isolate:
+        return _timed(fn, *args, **kwargs)
+    with ProcessPoolExecutor(max_workers=1, mp_context=multiprocessing.get_context("spawn")) as pool:
+        return pool.submit(_timed, fn, *args, **kwargs).result()
+
+def run_case(csv: Path, rows: int, workdir: Path, case: BenchCase, isolate: bool = True) -> list[dict]:
+    """Run ``case`` against ``csv`` and return one record per stage."""
+    staging, db = workdir / "staging", workdir / "bench.db"
+    shutil.rmtree(staging, ignore_errors=True)
+    staging.mkdir(parents=True)
+    db.unlink(missing_ok=True)
+    stages = []
+    if case.stage:
+        convert = _stage(isolate, csvs_to_parquet, [csv], staging, workers=1, engine=case.engine,
+                         chunksize=case.chunksize, layout=case.layout)
+        staged = next(staging.iterdir())
+        stages.append(("convert", convert, path_bytes(csv), path_bytes(staged)))
+        load = _stage(isolate, parquet_to_duck, db, [staged], "bench")
+        stages.append(("load", load, path_bytes(staged), path_bytes(db)))
+    else:
+        load = _stage(isolate, csv_to_duck, db, [csv], "bench")
+        stages.append(("load_direct", load, path_bytes(csv), path_bytes(db)))
+    records = []
+    for stage, timing, in_bytes, out_bytes in stages:
+        seconds = max(timing["seconds"], 1e-9)
+        records.append({
+            "case": case.name,
+            "engine": Engine(case.engine).value,
+            "chunksize": case.chunksize,
+            "layout": asdict(case.layout),
+            "stage": stage,
+            "rows": rows,
+            "in_bytes": in_bytes,
+            "out_bytes": out_bytes,
+            "rows_per_s": rows / seconds,
+            "mb_per_s": in_bytes / 1e6 / seconds,
+            "isolated": isolate,
+            **timing,
+        })
+    return records
+
+def run_suite(csv: Path, rows: int, workdir: Path, cases: Iterable[BenchCase],
+              isolate: bool = True) -> list[dict]:
+    return [record for case in cases for record in run_case(csv, rows, workdir, case, isolate)]
+
+def environment() -> dict:
+    return {
+        "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "pandas": pd.__version__,
+        "pyarrow": pa.__version__,
+        "duckdb": duckdb.__version__,
+    }
+
+def write_results(path: Path, params: dict, results: list[dict]) -> Path:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(json.dumps({"env": environment(), "params": params, "results": results}, indent=2))
+    return path
+
+def compare(results: list[dict], baseline: dict, tolerance: float = 0.2) -> list[str]:
+    """List the case/stage pairs whose rows/s fell more than ``tolerance`` below ``baseline``."""
+    before = {(r["case"], r["stage"]): r["rows_per_s"] for r in baseline["results"]}
+    regressions = []
+    for r in results:
+        old = before.get((r["case"], r["stage"]))
+        if old and r["rows_per_s"] < old * (1 - tolerance):
+            regressions.append(f"{r['case']} {r['stage']}: {r['rows_per_s']:,.0f} rows/s "
+                               f"vs {old:,.0f} baseline ({r['rows_per_s'] / old - 1:+.0%})")
+    return regressions
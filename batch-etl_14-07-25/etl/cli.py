@@ -1,20 +1,229 @@
+import cProfile
+import json
+import duckdb
+import pyarrow as pa
 import typer
+from contextlib import contextmanager
+from functools import partial
 from pathlib import Path
-from etl.io import csv_to_parquet, parquet_to_duck
+from typing import Iterator
+from etl import metrics
+from etl.bench import BenchCase, compare, run_suite, write_results
+from etl.io import (Engine, LoadMode, ParquetLayout, csv_to_duck, csvs_to_parquet, expand_sources,
+                    parquet_to_duck)
+from etl.manifest import SourceStamp, changed_sources
+from etl.schema import (DriftPolicy, SchemaDriftError, SchemaRegistry, diff_schemas, header_diff,
+                        staged_schema)
+from etl.synth import generate_csv
 
 app = typer.Typer(help="Batch ETL: CSV ➜ Parquet ➜ DuckDB")
 
+def _parse_types(specs: list[str]) -> dict[str, str]:
+    types = {}
+    for spec in specs:
+        col, sep, sql_type = spec.partition("=")
+        if not sep or not col or not sql_type:
+            raise typer.BadParameter(f"expected COLUMN=TYPE, got {spec!r}", param_hint="--type")
+        types[col] = sql_type
+    return types
+
+@contextmanager
+def _recorded_run(path: Path | None, **extra) -> Iterator[metrics.Recorder]:
+    # Written even when the run fails, so slow or broken runs leave a trace.
+    status = "error"
+    with metrics.recording() as recorder:
+        try:
+            yield recorder
+            status = "ok"
+        finally:
+            if path is not None:
+                recorder.write_jsonl(path, status=status, **extra)
+
+@contextmanager
+def _profiled(path: Path | None) -> Iterator[None]:
+    if path is None:
+        yield
+        return
+    profiler = cProfile.Profile()
+    profiler.enable()
+    try:
+        yield
+    finally:
+        profiler.disable()
+        path.parent.mkdir(parents=True, exist_ok=True)
+        profiler.dump_stats(path)
+        typer.echo(f"Profile written to {path} (inspect with python -m pstats {path})", err=True)
+
+def _stage_with_registry(sources: list[Path], staging_dir: Path, registry: SchemaRegistry | None,
+                         name: str, policy: DriftPolicy, **convert) -> tuple[list[Path], pa.Schema | None]:
+    """Convert ``sources`` with the registered schema for ``name``, inferring it on first sight.
+
+    Returns the staged paths and the schema to register once the load has
+    committed.
+    """
+    if registry is None:
+        return csvs_to_parquet(sources, staging_dir, **convert), None
+    known = registry.get(name)
+    if known is not None:
+        drift = next((d for d in (header_diff(known, s) for s in sources) if d), None)
+        if drift is None:
+            try:
+                return csvs_to_parquet(sources, staging_dir, schema=known, **convert), known
+            except (ValueError, TypeError, duckdb.Error) as exc:
+                detail = str(exc)
+        else:
+            detail = drift.describe()
+        if policy is DriftPolicy.fail:
+            raise SchemaDriftError(name, detail + " (rerun with --schema-drift evolve to accept it)")
+    # Infer from the first shard only and pin the others to it, so every
+    # shard of the run shares one schema.
+    first = csvs_to_parquet(sources[:1], staging_dir, **convert)
+    schema = staged_schema(first[0])
+    if known is not None:
+        typer.echo(f"Schema drift for {name!r}: {diff_schemas(known, schema).describe()}", err=True)
+    rest = csvs_to_parquet(sources[1:], staging_dir, schema=schema, **convert) if sources[1:] else []
+    return first + rest, schema
+
+def _table_schema(db: Path, table: str) -> pa.Schema:
+    con = duckdb.connect(db)
+    try:
+        return con.sql(f"SELECT * FROM {table} LIMIT 0").arrow().schema
+    finally:
+        con.close()
+
 @app.command()
 def run(
-    src: Path = typer.Argument(..., exists=True, help="CSV file"),
+    src: Path = typer.Argument(..., help="CSV file, directory of CSVs or glob pattern"),
     db: Path = typer.Option("data/duckdb/batch.db", help="DuckDB path"),
     table: str = typer.Option("batch_stage"),
+    chunksize: int | None = typer.Option(None, min=1, help="Stream the CSV in batches of N rows"),
+    workers: int | None = typer.Option(None, min=1, help="Parallel conversions (default: CPU count)"),
+    mode: LoadMode = typer.Option(LoadMode.replace, help="Rebuild the table or load only new/changed files"),
+    key: list[str] = typer.Option([], help="Key column for --mode upsert (repeatable)"),
+    engine: Engine = typer.Option(Engine.pandas, help="CSV reader: pandas, or DuckDB's native parallel reader"),
+    type_: list[str] = typer.Option([], "--type", help="COLUMN=DUCKDB_TYPE override for --engine duckdb (repeatable)"),
+    stage: bool = typer.Option(True, help="Stage Parquet; --no-stage loads the CSVs directly (duckdb engine)"),
+    partition_by: list[str] = typer.Option([], help="Hive-partition the staging Parquet by COLUMN (repeatable)"),
+    compression: str = typer.Option("snappy", help="Parquet codec: snappy, zstd, gzip, lz4, none"),
+    row_group_size: int | None = typer.Option(None, min=1, help="Rows per Parquet row group"),
+    statistics: bool = typer.Option(True, help="Write Parquet column statistics"),
+    metrics_file: Path | None = typer.Option("data/duckdb/metrics.jsonl", "--metrics",
+                                             help="Append per-stage metrics here as JSON lines"),
+    profile: Path | None = typer.Option(None, help="Write a cProfile dump of the run to this file "
+                                                   "(main process only; add --workers 1 to include conversions)"),
+    schema_registry: bool = typer.Option(True, help="Pin column types to the registered schema for this source"),
+    schema_dir: Path = typer.Option("data/schemas", help="Schema registry directory"),
+    schema_name: str | None = typer.Option(None, help="Registry key for this source (default: the table name)"),
+    schema_drift: DriftPolicy = typer.Option(DriftPolicy.fail, help="On drift: fail, or re-infer and save the new schema"),
+):
+    sources = expand_sources(src)
+    if not sources:
+        raise typer.BadParameter(f"no CSV files match {src}", param_hint="SRC")
+    if mode is LoadMode.upsert and not key:
+        raise typer.BadParameter("--mode upsert needs at least one --key", param_hint="--key")
+    types = _parse_types(type_)
+    if engine is Engine.pandas and (types or not stage):
+        raise typer.BadParameter("--type and --no-stage need --engine duckdb", param_hint="--engine")
+    if engine is Engine.duckdb and chunksize is not None:
+        raise typer.BadParameter("--chunksize only applies to --engine pandas", param_hint="--chunksize")
+    registry = SchemaRegistry(schema_dir) if schema_registry else None
+    evolve = schema_drift is DriftPolicy.evolve
+    db.parent.mkdir(parents=True, exist_ok=True)
+    with _recorded_run(metrics_file, table=table, engine=engine.value, mode=mode.value) as recorder, \
+            _profiled(profile):
+        with metrics.stage("hash_sources") as m:
+            if mode is LoadMode.replace:
+                # Everything is reloaded, so skip the extra read a hash would take
+                stamps = [SourceStamp.of(s, digest=False) for s in sources]
+            else:
+                stamps = changed_sources(db, table, sources)
+            m.update(rows=len(stamps), in_bytes=sum(s.size for s in stamps))
+        if not stamps:
+            typer.echo(f"Nothing new for {table} in {db}")
+            return
+        sources = [Path(s.path) for s in stamps]
+        if stage:
+            staging_dir = (src if src.is_dir() else src.parent) / "staging"
+            staging_dir.mkdir(parents=True, exist_ok=True)
+            layout = ParquetLayout(tuple(partition_by), compression, row_group_size, statistics)
+            try:
+                pqs, schema = _stage_with_registry(
+                    sources, staging_dir, registry, schema_name or table, schema_drift,
+                    workers=workers, chunksize=chunksize, engine=engine, types=types, layout=layout,
+                )
+            except SchemaDriftError as exc:
+                typer.echo(f"Error: {exc}", err=True)
+                raise typer.Exit(1)
+            parquet_to_duck(db, pqs, table, mode=mode, key=key, stamps=stamps, evolve=evolve)
+            if registry is not None:
+                # Append and upsert keep the table's existing columns, which
+                # may be wider than this batch, so register what the table holds.
+                registry.save(schema_name or table, schema if mode is LoadMode.replace else _table_schema(db, table))
+        else:
+            known = registry.get(schema_name or table) if registry is not None else None
+            load = partial(csv_to_duck, db, sources, table, types=types, mode=mode, key=key, stamps=stamps,
+                           evolve=evolve)
+            drifted = None
+            try:
+                load(schema=known)
+            except (ValueError, duckdb.Error) as exc:
+                if known is None:
+                    raise
+                if schema_drift is DriftPolicy.fail:
+                    typer.echo(f"Error: {SchemaDriftError(schema_name or table, str(exc))}", err=True)
+                    raise typer.Exit(1)
+                load()
+                drifted, known = known, None
+            if registry is not None and (known is None or mode is not LoadMode.replace):
+                loaded = _table_schema(db, table)
+                if drifted is not None:
+                    typer.echo(f"Schema drift for {schema_name or table!r}: "
+                               f"{diff_schemas(drifted, loaded).describe()}", err=True)
+                registry.save(schema_name or table, loaded)
+    names = sources[0].name if len(sources) == 1 else f"{len(sources)} files"
+    typer.echo(f"Loaded {names} ➜ {table} in {db}")
+    totals: dict[str, float] = {}
+    for r in recorder.records():
+        totals[r["stage"]] = totals.get(r["stage"], 0.0) + r["wall_s"]
+    typer.echo("  ".join(f"{name} {secs:.2f}s" for name, secs in totals.items()))
+
+@app.command()
+def bench(
+    rows: int = typer.Option(1_000_000, min=0, help="Rows in the generated CSV"),
+    columns: str = typer.Option("narrow", help="narrow, wide, or kind:count list such as int:2,float:5,str:1"),
+    seed: int = typer.Option(0, help="Generator seed"),
+    null_rate: float = typer.Option(0.0, min=0.0, max=1.0, help="Share of float/str cells left empty"),
+    engine: list[Engine] = typer.Option([Engine.pandas, Engine.duckdb], help="Engines to run (repeatable)"),
+    chunksize: list[int] = typer.Option([], min=1, help="Also run streaming pandas with N-row batches (repeatable)"),
+    compression: list[str] = typer.Option(["snappy"], help="Parquet codecs to compare (repeatable)"),
+    workdir: Path = typer.Option("data/bench", help="Scratch directory for the CSV, Parquet and DuckDB files"),
+    out: Path = typer.Option("data/bench/results.json", help="Where to write the JSON results"),
+    baseline: Path | None = typer.Option(None, exists=True, help="Earlier results to compare against"),
+    tolerance: float = typer.Option(0.2, min=0.0, help="Allowed rows/s drop before a case counts as a regression"),
 ):
-    staging_dir = src.parent / "staging"
-    staging_dir.mkdir(parents=True, exist_ok=True)
-    pq = csv_to_parquet(src, staging_dir / src.with_suffix(".parquet").name)
-    parquet_to_duck(db, pq, table)
-    typer.echo(f"Loaded {src.name} ➜ {table} in {db}")
+    csv = generate_csv(workdir / f"synth_{columns.replace(':', '').replace(',', '_')}_{rows}_{seed}.csv",
+                       rows, columns, seed=seed, null_rate=null_rate)
+    cases = []
+    for eng in engine:
+        for codec in compression:
+            cases.append(BenchCase(eng, layout=ParquetLayout(compression=codec)))
+            if eng is Engine.pandas:
+                cases += [BenchCase(eng, size, ParquetLayout(compression=codec)) for size in chunksize]
+        if eng is Engine.duckdb:
+            cases.append(BenchCase(eng, stage=False))
+    results = run_suite(csv, rows, workdir, cases)
+    params = {"rows": rows, "columns": columns, "seed": seed, "null_rate": null_rate}
+    write_results(out, params, results)
+    for r in results:
+        typer.echo(f"{r['case']:<28} {r['stage']:<12} {r['seconds']:8.2f}s {r['rows_per_s']:>12,.0f} rows/s "
+                   f"{r['mb_per_s']:8.1f} MB/s {r['peak_rss_bytes'] / 2**20:8.0f} MiB")
+    typer.echo(f"Wrote {out}")
+    if baseline is not None:
+        regressions = compare(results, json.loads(baseline.read_text()), tolerance)
+        for line in regressions:
+            typer.echo(f"REGRESSION {line}", err=True)
+        if regressions:
+            raise typer.Exit(1)
 
 if __name__ == "__main__":
-    app()
\ No newline at end of file
+    app()
@@ -1,15 +1,390 @@
+import glob
+import shutil
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from enum import Enum
+from functools import partial
+from itertools import chain
+from pathlib import Path
+from typing import Iterable, Iterator, Mapping, Sequence
+
 import duckdb
 import pandas as pd
-from pathlib import Path
+import pyarrow as pa
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
+
+from etl import metrics
+from etl.manifest import MANIFEST_TABLE, SourceStamp, ensure_manifest, record_sources
+from etl.metrics import path_bytes, stage
+from etl.schema import duckdb_types, pandas_read_opts
+
+def expand_sources(src: Path) -> list[Path]:
+    """Resolve a CSV file, a directory of CSVs or a glob pattern to a sorted list of files."""
+    if src.is_dir():
+        return sorted(src.glob("*.csv"))
+    if src.is_file():
+        return [src]
+    return sorted(Path(p) for p in glob.glob(str(src), recursive=True) if Path(p).is_file())
+
+@dataclass(frozen=True)
+class ParquetLayout:
+    """How staged Parquet is written.
+
+    ``partition_by`` switches to a Hive-style directory (``col=value/...``)
+    per source; the other fields are passed to the Parquet writer. The
+    defaults reproduce a plain single-file write.
+    """
+    partition_by: tuple[str, ...] = ()
+    compression: str = "snappy"
+    row_group_size: int | None = None
+    write_statistics: bool = True
+
+    def writer_kwargs(self) -> dict:
+        return {"compression": self.compression, "write_statistics": self.write_statistics}
+
+def csv_to_parquet(src: Path, dest: Path, chunksize: int | None = None,
+                   layout: ParquetLayout = ParquetLayout(), schema: pa.Schema | None = None,
+                   **read_opts) -> Path:
+    """Convert ``src`` to ``dest/<stem>.parquet``, or ``dest/<stem>/`` when partitioned.
 
-def csv_to_parquet(src: Path, dest: Path, **read_opts) -> Path:
-    df = pd.read_csv(src, **read_opts)
+    With ``chunksize`` set the CSV is streamed: each batch of rows is written
+    as its own row group, so peak memory is bounded by the batch size rather
+    than the file size. A known ``schema`` (see :mod:`etl.schema`) replaces
+    pandas' dtype inference and is written as-is.
+    """
+    if schema is not None:
+        read_opts = {**pandas_read_opts(schema), **read_opts}
+    if layout.partition_by:
+        return _write_partitioned(src, dest / src.stem, chunksize, layout, schema, **read_opts)
     dest_file = dest / (src.stem + ".parquet")
-    df.to_parquet(dest_file, index=False)
+    writer = None
+    try:
+        frames = _read_csv_frames(src, chunksize, **read_opts)
+        for table in _fixed_schema_tables(src, frames, schema):
+            with stage("write_parquet", src) as m:
+                if writer is None:
+                    writer = pq.ParquetWriter(dest_file, table.schema, **layout.writer_kwargs())
+                writer.write_table(table, row_group_size=layout.row_group_size)
+                m["rows"] = table.num_rows
+        if writer is None:
+            # Header-only CSV streamed in batches: write it eagerly instead.
+            pd.read_csv(src, **read_opts).to_parquet(dest_file, index=False)
+    finally:
+        if writer is not None:
+            with stage("write_parquet", src) as m:
+                writer.close()
+                m["out_bytes"] = path_bytes(dest_file)
     return dest_file
 
-def parquet_to_duck(dest_db: Path, parquet_file: Path, table: str) -> None:
+def _read_csv_frames(src: Path, chunksize: int | None, **read_opts) -> Iterator[pd.DataFrame]:
+    """Yield ``src`` as one frame, or in ``chunksize``-row batches, timing each read."""
+    in_bytes = path_bytes(src)
+    if chunksize is None:
+        with stage("read", src) as m:
+            df = pd.read_csv(src, **read_opts)
+            m.update(rows=len(df), in_bytes=in_bytes)
+        yield df
+        return
+    with pd.read_csv(src, chunksize=chunksize, **read_opts) as reader:
+        batches = iter(reader)
+        while True:
+            with stage("read", src) as m:
+                chunk = next(batches, None)
+                m.update(rows=0 if chunk is None else len(chunk), in_bytes=in_bytes)
+            if chunk is None:
+                return
+            in_bytes = None
+            yield chunk
+
+def _fixed_schema_tables(src: Path, frames: Iterable[pd.DataFrame],
+                         schema: pa.Schema | None = None) -> Iterator[pa.Table]:
+    # Without a known schema the first batch fixes it; pandas metadata is kept
+    # so the file reads back exactly like ``DataFrame.to_parquet``.
+    for i, chunk in enumerate(frames):
+        with stage("convert", src) as m:
+            if schema is None:
+                table = pa.Table.from_pandas(chunk, preserve_index=False)
+                schema = table.schema
+            else:
+                try:
+                    table = pa.Table.from_pandas(chunk, schema=schema, preserve_index=False)
+                except (pa.ArrowInvalid, pa.ArrowTypeError) as exc:
+                    raise ValueError(
+                        f"{src.name}: batch {i} does not match the expected schema "
+                        f"({exc}); pin the column types with dtype="
+                    ) from exc
+            m["rows"] = table.num_rows
+        del chunk
+        yield table
+
+def _write_partitioned(src: Path, out_dir: Path, chunksize: int | None, layout: ParquetLayout,
+                       schema: pa.Schema | None, **read_opts) -> Path:
+    # A re-delivered source must not leave stale partitions behind.
+    shutil.rmtree(out_dir, ignore_errors=True)
+    tables = _fixed_schema_tables(src, _read_csv_frames(src, chunksize, **read_opts), schema)
+    with stage("write_parquet", src) as m:
+        first = next(tables, None)
+        if first is None:
+            raise ValueError(f"{src.name}: no rows to partition")
+        # Partition columns move into the path, so the pandas metadata that
+        # lists them no longer describes the files.
+        schema = first.schema.remove_metadata()
+        batches = (b for t in chain([first], tables) for b in t.replace_schema_metadata().to_batches())
+        fmt = ds.ParquetFileFormat()
+        groups = {}
+        if layout.row_group_size:
+            groups = {"min_rows_per_group": layout.row_group_size,
+                      "max_rows_per_group": layout.row_group_size}
+        ds.write_dataset(
+            batches, out_dir, schema=schema, format=fmt,
+            file_options=fmt.make_write_options(**layout.writer_kwargs()),
+            partitioning=list(layout.partition_by), partitioning_flavor="hive",
+            basename_template="part-{i}.parquet", **groups,
+        )
+        m["out_bytes"] = path_bytes(out_dir)
+    return out_dir
+
+class Engine(str, Enum):
+    pandas = "pandas"
+    duckdb = "duckdb"
+
+# Restrict DuckDB's sniffer to the types pandas infers by default, so both
+# engines stage the same schema unless ``types`` says otherwise.
+_PANDAS_LIKE_TYPES = ("BOOLEAN", "BIGINT", "DOUBLE", "VARCHAR")
+
+def _sql_str(value: object) -> str:
+    return "'" + str(value).replace("'", "''") + "'"
+
+def _sql_ident(name: str) -> str:
+    return '"' + name.replace('"', '""') + '"'
+
+def _sql_files(files: Path | Iterable[Path]) -> str:
+    if isinstance(files, (str, Path)):
+        return _sql_str(files)
+    return "[" + ", ".join(_sql_str(p) for p in files) + "]"
+
+def _read_parquet_sql(parquet_files: Path | Iterable[Path]) -> str:
+    # Partitioned staging outputs are directories: read every file below
+    # them and recover the partition columns from the Hive-style paths.
+    files = [parquet_files] if isinstance(parquet_files, (str, Path)) else list(parquet_files)
+    if not any(Path(f).is_dir() for f in files):
+        return f"read_parquet({_sql_files(files)})"
+    globs = [Path(f) / "**" / "*.parquet" if Path(f).is_dir() else f for f in files]
+    return f"read_parquet({_sql_files(globs)}, hive_partitioning = true)"
+
+def _read_csv_sql(srcs: Path | Iterable[Path], types: Mapping[str, str] | None = None) -> str:
+    candidates = "[" + ", ".join(_sql_str(t) for t in _PANDAS_LIKE_TYPES) + "]"
+    opts = f"header = true, auto_type_candidates = {candidates}"
+    if types:
+        opts += ", types = {" + ", ".join(f"{_sql_str(c)}: {_sql_str(t)}" for c, t in types.items()) + "}"
+    return f"read_csv({_sql_files(srcs)}, {opts})"
+
+def _pandas_like_types(srcs: Path | Iterable[Path], types: Mapping[str, str] | None) -> Mapping[str, str] | None:
+    # pandas has no missing value for int64 and reads an integer column with
+    # blanks as float64; DuckDB keeps it BIGINT. Pin such columns to DOUBLE
+    # unless ``types`` already says what they are. Nulls can sit past the
+    # sniffer's sample, so this counts them over the whole input.
+    con = duckdb.connect()
+    try:
+        sniffed = con.execute(f"SELECT column_name, column_type FROM (DESCRIBE SELECT * FROM "
+                              f"{_read_csv_sql(srcs, types)});").fetchall()
+        ints = [c for c, t in sniffed if t == "BIGINT" and c not in (types or {})]
+        if not ints:
+            return types
+        nulls = con.execute(f"SELECT {', '.join(f'count(*) - count({_sql_ident(c)})' for c in ints)} "
+                            f"FROM {_read_csv_sql(srcs, types)};").fetchone()
+    finally:
+        con.close()
+    nullable = {c: "DOUBLE" for c, n in zip(ints, nulls) if n}
+    return {**(types or {}), **nullable} if nullable else types
+
+def csv_to_parquet_duckdb(src: Path, dest: Path, types: Mapping[str, str] | None = None,
+                          layout: ParquetLayout = ParquetLayout()) -> Path:
+    """Convert ``src`` with DuckDB's parallel CSV reader; see :func:`csv_to_parquet`.
+
+    ``types`` maps column names to DuckDB types and overrides the sniffer;
+    integer columns it leaves open become DOUBLE if they have blanks, as
+    with pandas. DuckDB always writes column statistics, so ``layout.write_statistics``
+    is ignored here.
+    """
+    codec = "uncompressed" if layout.compression.lower() == "none" else layout.compression
+    opts = ["FORMAT parquet", f"COMPRESSION {codec}"]
+    if layout.row_group_size:
+        opts.append(f"ROW_GROUP_SIZE {layout.row_group_size}")
+    if layout.partition_by:
+        out = dest / src.stem
+        shutil.rmtree(out, ignore_errors=True)
+        opts.append("PARTITION_BY (" + ", ".join(layout.partition_by) + ")")
+    else:
+        out = dest / (src.stem + ".parquet")
+    types = _pandas_like_types(src, types)
+    con = duckdb.connect()
+    try:
+        # DuckDB fuses read, convert and write into one pipeline.
+        with stage("copy_parquet", src) as m:
+            (rows,) = con.execute(f"COPY (SELECT * FROM {_read_csv_sql(src, types)}) "
+                                  f"TO {_sql_str(out)} ({', '.join(opts)});").fetchone()
+            m.update(rows=rows, in_bytes=path_bytes(src), out_bytes=path_bytes(out))
+    finally:
+        con.close()
+    return out
+
+_INT_TYPES = {"TINYINT", "SMALLINT", "INTEGER", "BIGINT", "UTINYINT", "USMALLINT", "UINTEGER", "UBIGINT"}
+
+def _check_no_float_in_int_columns(src: Path, types: Mapping[str, str]) -> None:
+    # DuckDB rounds "2.5" to 3 when told a column is BIGINT (TRY_CAST too), so
+    # a pinned integer column that now holds decimals would change silently.
+    # Read those columns as text over the whole file, not the sniffer's
+    # sample, and reject any value that is not a whole number.
+    int_columns = [c for c, t in types.items() if t in _INT_TYPES]
+    if not int_columns:
+        return
+    checks = []
+    for c in int_columns:
+        value = f"TRY_CAST({_sql_ident(c)} AS DOUBLE)"
+        checks.append(f"count(*) FILTER (WHERE {_sql_ident(c)} IS NOT NULL "
+                      f"AND ({value} IS NULL OR {value} <> trunc({value})))")
+    con = duckdb.connect()
+    try:
+        bad = con.execute(f"SELECT {', '.join(checks)} "
+                          f"FROM read_csv({_sql_str(src)}, header = true, all_varchar = true)").fetchone()
+    finally:
+        con.close()
+    narrowed = [c for c, n in zip(int_columns, bad) if n]
+    if narrowed:
+        raise ValueError(f"{src.name}: {', '.join(narrowed)} now hold decimals but are registered as integers")
+
+def _pinned_duckdb_types(srcs: list[Path], schema: pa.Schema | None,
+                        types: Mapping[str, str] | None) -> Mapping[str, str] | None:
+    if schema is None:
+        return types
+    pinned = duckdb_types(schema)
+    for src in srcs:
+        _check_no_float_in_int_columns(src, pinned)
+    return {**pinned, **(types or {})}
+
+def csvs_to_parquet(srcs: Iterable[Path], dest: Path, workers: int | None = None,
+                    chunksize: int | None = None, engine: Engine = Engine.pandas,
+                    types: Mapping[str, str] | None = None,
+                    layout: ParquetLayout = ParquetLayout(), schema: pa.Schema | None = None,
+                    **read_opts) -> list[Path]:
+    """Convert several CSV shards into ``dest``.
+
+    The pandas engine fans out over a process pool: ``workers`` defaults to
+    the CPU count and ``workers=1`` converts in-process. The duckdb engine
+    converts one shard at a time because DuckDB already uses every core.
+    Output order follows ``srcs``.
+    """
+    srcs = list(srcs)
+    clashes = sorted(stem for stem, n in Counter(s.stem for s in srcs).items() if n > 1)
+    if clashes:
+        raise ValueError(f"shards would overwrite each other in {dest}: {', '.join(clashes)}")
+    if Engine(engine) is Engine.duckdb:
+        if chunksize is not None or read_opts:
+            raise ValueError("chunksize and pandas read options only apply to the pandas engine")
+        types = _pinned_duckdb_types(srcs, schema, types)
+        return [csv_to_parquet_duckdb(s, dest, types, layout) for s in srcs]
+    if types:
+        raise ValueError("types only apply to the duckdb engine; pass dtype= for pandas")
+    convert = partial(csv_to_parquet, dest=dest, chunksize=chunksize, layout=layout, schema=schema,
+                      **read_opts)
+    if workers == 1 or len(srcs) <= 1:
+        return [convert(s) for s in srcs]
+    recorder = metrics.active()
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        if recorder is None:
+            return list(pool.map(convert, srcs))
+        # Workers record into their own recorder; fold the results back in.
+        outs = []
+        for out, records in pool.map(partial(metrics.call_recorded, convert), srcs):
+            recorder.extend(records)
+            outs.append(out)
+        return outs
+
+class LoadMode(str, Enum):
+    replace = "replace"
+    append = "append"
+    upsert = "upsert"
+
+def parquet_to_duck(dest_db: Path, parquet_file: Path | Iterable[Path], table: str,
+                    mode: LoadMode = LoadMode.replace, key: Sequence[str] = (),
+                    stamps: Iterable[SourceStamp] = (), evolve: bool = False) -> None:
+    """Load Parquet files or partitioned staging directories into ``table``.
+
+    ``replace`` rebuilds the table from ``parquet_file``; ``append`` inserts
+    the new rows; ``upsert`` deletes rows whose ``key`` columns match the new
+    data before inserting it. The load and the manifest entries for
+    ``stamps`` commit in a single transaction. With ``evolve``, append and
+    upsert first widen the existing table to fit the new data (see
+    :func:`_evolve_table`) instead of casting the data to the table's types.
+    """
+    files = [parquet_file] if isinstance(parquet_file, (str, Path)) else list(parquet_file)
+    _load(dest_db, _read_parquet_sql(files), table, mode, key, stamps, sum(map(path_bytes, files)), evolve)
+
+def csv_to_duck(dest_db: Path, srcs: Path | Iterable[Path], table: str,
+                types: Mapping[str, str] | None = None, mode: LoadMode = LoadMode.replace,
+                key: Sequence[str] = (), stamps: Iterable[SourceStamp] = (),
+                schema: pa.Schema | None = None, evolve: bool = False) -> None:
+    """Load CSVs straight into ``table`` with DuckDB, skipping the Parquet stage.
+
+    Takes the same ``mode``/``key``/``stamps``/``evolve`` as
+    :func:`parquet_to_duck`; a registered ``schema`` pins the column types
+    like ``types`` does.
+    """
+    files = [srcs] if isinstance(srcs, (str, Path)) else list(srcs)
+    types = _pandas_like_types(files, _pinned_duckdb_types(files, schema, types))
+    _load(dest_db, _read_csv_sql(files, types), table, mode, key, stamps, sum(map(path_bytes, files)), evolve)
+
+def _evolve_table(con: duckdb.DuckDBPyConnection, table: str, batch: str) -> None:
+    """Widen ``table`` so every column of ``batch`` fits without a lossy cast.
+
+    New columns are added; a column whose type differs moves to the type
+    DuckDB would give the union of both (BIGINT and DOUBLE make DOUBLE), so
+    existing rows keep their values and nothing is ever narrowed.
+    """
+    current = dict(con.execute(f"SELECT column_name, column_type FROM (DESCRIBE {table});").fetchall())
+    for column, new_type in con.execute(f"SELECT column_name, column_type FROM (DESCRIBE {batch});").fetchall():
+        if column not in current:
+            con.execute(f'ALTER TABLE {table} ADD COLUMN "{column}" {new_type};')
+        elif current[column] != new_type:
+            (wide,) = con.execute(f"SELECT typeof(x) FROM (SELECT NULL::{current[column]} AS x "
+                                  f"UNION ALL SELECT NULL::{new_type}) LIMIT 1;").fetchone()
+            if wide != current[column]:
+                con.execute(f'ALTER TABLE {table} ALTER COLUMN "{column}" TYPE {wide};')
+
+def _load(dest_db: Path, relation: str, table: str, mode: LoadMode,
+          key: Sequence[str], stamps: Iterable[SourceStamp], in_bytes: int | None = None,
+          evolve: bool = False) -> None:
+    mode = LoadMode(mode)
+    if mode is LoadMode.upsert and not key:
+        raise ValueError("upsert needs at least one key column")
     con = duckdb.connect(dest_db)
-    con.execute(f"CREATE OR REPLACE TABLE {table} AS "
-                f"SELECT * FROM read_parquet('{parquet_file}');")
-    con.close()
\ No newline at end of file
+    try:
+        with stage("load_duckdb", table) as m:
+            con.begin()
+            if mode is LoadMode.replace:
+                con.execute(f"CREATE OR REPLACE TABLE {table} AS SELECT * FROM {relation};")
+                ensure_manifest(con)
+                con.execute(f"DELETE FROM {MANIFEST_TABLE} WHERE table_name = ?", [table])
+                (rows,) = con.execute(f"SELECT count(*) FROM {table};").fetchone()
+            else:
+                con.execute(f"CREATE TEMP TABLE _etl_batch AS SELECT * FROM {relation};")
+                con.execute(f"CREATE TABLE IF NOT EXISTS {table} AS SELECT * FROM _etl_batch LIMIT 0;")
+                if evolve:
+                    _evolve_table(con, table, "_etl_batch")
+                if mode is LoadMode.upsert:
+                    match = " AND ".join(f"{table}.{k} = _etl_batch.{k}" for k in key)
+                    con.execute(f"DELETE FROM {table} USING _etl_batch WHERE {match};")
+                con.execute(f"INSERT INTO {table} BY NAME SELECT * FROM _etl_batch;")
+                (rows,) = con.execute("SELECT count(*) FROM _etl_batch;").fetchone()
+                con.execute("DROP TABLE _etl_batch;")
+            record_sources(con, table, stamps)
+            con.commit()
+            m.update(rows=rows, in_bytes=in_bytes)
+    except Exception:
+        con.rollback()
+        raise
+    finally:
+        con.close()
@@ -0,0 +1,81 @@
+import hashlib
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Iterable
+
+import duckdb
+
+MANIFEST_TABLE = "_etl_manifest"
+
+@dataclass(frozen=True)
+class SourceStamp:
+    """Identity of an input file: resolved path, size, mtime and content hash.
+
+    ``sha256`` is None when the file was not hashed (replace loads); such an
+    entry only ever matches on size and mtime.
+    """
+    path: str
+    size: int
+    mtime_ns: int
+    sha256: str | None
+
+    @classmethod
+    def of(cls, src: Path, digest: bool = True) -> "SourceStamp":
+        st = src.stat()
+        return cls(str(src.resolve()), st.st_size, st.st_mtime_ns, file_digest(src) if digest else None)
+
+def file_digest(path: Path, block_size: int = 1 << 20) -> str:
+    h = hashlib.sha256()
+    with open(path, "rb") as fh:
+        while block := fh.read(block_size):
+            h.update(block)
+    return h.hexdigest()
+
+def ensure_manifest(con: duckdb.DuckDBPyConnection) -> None:
+    con.execute(f"""
+        CREATE TABLE IF NOT EXISTS {MANIFEST_TABLE} (
+            table_name VARCHAR,
+            path VARCHAR,
+            size BIGINT,
+            mtime_ns BIGINT,
+            sha256 VARCHAR,
+            loaded_at TIMESTAMP DEFAULT current_timestamp
+        )""")
+
+def record_sources(con: duckdb.DuckDBPyConnection, table: str, stamps: Iterable[SourceStamp]) -> None:
+    """Upsert manifest rows for ``table``; call inside the load's transaction."""
+    ensure_manifest(con)
+    for s in stamps:
+        con.execute(f"DELETE FROM {MANIFEST_TABLE} WHERE table_name = ? AND path = ?", [table, s.path])
+        con.execute(f"INSERT INTO {MANIFEST_TABLE} (table_name, path, size, mtime_ns, sha256) "
+                    "VALUES (?, ?, ?, ?, ?)", [table, s.path, s.size, s.mtime_ns, s.sha256])
+
+def changed_sources(dest_db: Path, table: str, srcs: Iterable[Path]) -> list[SourceStamp]:
+    """Return stamps for the files in ``srcs`` not yet loaded into ``table``.
+
+    A file whose size and mtime match the manifest is skipped without being
+    read; otherwise it is hashed and skipped only if the content is unchanged.
+    """
+    con = duckdb.connect(dest_db)
+    try:
+        ensure_manifest(con)
+        known = {
+            path: (size, mtime_ns, sha256)
+            for path, size, mtime_ns, sha256 in con.execute(
+                f"SELECT path, size, mtime_ns, sha256 FROM {MANIFEST_TABLE} WHERE table_name = ?",
+                [table],
+            ).fetchall()
+        }
+    finally:
+        con.close()
+    pending = []
+    for src in srcs:
+        path, st = str(src.resolve()), src.stat()
+        seen = known.get(path)
+        if seen and seen[:2] == (st.st_size, st.st_mtime_ns):
+            continue
+        stamp = SourceStamp(path, st.st_size, st.st_mtime_ns, file_digest(src))
+        if seen and seen[2] == stamp.sha256:
+            continue
+        pending.append(stamp)
+    return pending
@@ -0,0 +1,141 @@
+import json
+import os
+import resource
+import sys
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Callable, Iterable, Iterator
+from uuid import uuid4
+
+_SUMMED = ("wall_s", "cpu_s", "rows", "in_bytes", "out_bytes", "calls")
+
+def path_bytes(path: Path) -> int:
+    """Size of a file, or of every file under a directory; 0 if missing."""
+    path = Path(path)
+    if path.is_dir():
+        return sum(p.stat().st_size for p in path.rglob("*") if p.is_file())
+    return path.stat().st_size if path.exists() else 0
+
+def peak_rss_bytes() -> int:
+    """Peak resident set size of this process (since the last :func:`reset_peak_rss`)."""
+    # Linux carries ru_maxrss across fork+exec, so a spawned worker would
+    # report the parent's peak; VmHWM belongs to the new address space.
+    try:
+        with open("/proc/self/status") as fh:
+            for line in fh:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        pass
+    # ru_maxrss is KiB on Linux and bytes on macOS.
+    scale = 1 if sys.platform == "darwin" else 1024
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * scale
+
+def reset_peak_rss() -> None:
+    # Writing 5 to clear_refs resets VmHWM (Linux >= 4.0); elsewhere the peak
+    # simply keeps growing over the run.
+    try:
+        with open("/proc/self/clear_refs", "w") as fh:
+            fh.write("5")
+    except OSError:
+        pass
+
+class Recorder:
+    """Collects per-stage metrics, one record per (stage, source).
+
+    Entering the same stage again for the same source (e.g. once per
+    streamed batch) accumulates into one record. Nested stages are reported
+    with exclusive times, so the records of a run add up to its total.
+    """
+
+    def __init__(self, run_id: str | None = None):
+        self.run_id = run_id or uuid4().hex[:12]
+        self._records: dict[tuple[str, str | None], dict] = {}
+        self._open: list[dict] = []
+
+    def _merge(self, record: dict) -> None:
+        key = (record["stage"], record["source"])
+        into = self._records.setdefault(key, {"stage": key[0], "source": key[1], "pid": record["pid"]})
+        for f in _SUMMED:
+            if record.get(f) is not None:
+                into[f] = into.get(f, 0) + record[f]
+        into["peak_rss_bytes"] = max(into.get("peak_rss_bytes", 0), record["peak_rss_bytes"])
+
+    def extend(self, records: Iterable[dict]) -> None:
+        for record in records:
+            self._merge(record)
+
+    def records(self) -> list[dict]:
+        return [dict(r) for r in self._records.values()]
+
+    @contextmanager
+    def stage(self, name: str, source: Path | str | None = None) -> Iterator[dict]:
+        if self._open:
+            # The child resets the peak, so bank what the parent has seen so far.
+            parent = self._open[-1]
+            parent["peak_rss_bytes"] = max(parent["peak_rss_bytes"], peak_rss_bytes())
+        reset_peak_rss()
+        m = {"stage": name, "source": None if source is None else str(source), "pid": os.getpid(),
+             "rows": None, "in_bytes": None, "out_bytes": None, "calls": 1,
+             "peak_rss_bytes": 0, "_child_wall": 0.0, "_child_cpu": 0.0}
+        self._open.append(m)
+        wall, cpu = time.perf_counter(), time.process_time()
+        try:
+            yield m
+        finally:
+            wall, cpu = time.perf_counter() - wall, time.process_time() - cpu
+            self._open.pop()
+            m["peak_rss_bytes"] = max(m["peak_rss_bytes"], peak_rss_bytes())
+            if self._open:
+                parent = self._open[-1]
+                parent["_child_wall"] += wall
+                parent["_child_cpu"] += cpu
+                parent["peak_rss_bytes"] = max(parent["peak_rss_bytes"], m["peak_rss_bytes"])
+            m["wall_s"] = wall - m.pop("_child_wall")
+            m["cpu_s"] = cpu - m.pop("_child_cpu")
+            self._merge(m)
+
+    def write_jsonl(self, path: Path, **extra) -> Path:
+        """Append this run's records to ``path`` as JSON lines."""
+        path.parent.mkdir(parents=True, exist_ok=True)
+        ts = datetime.now(timezone.utc).isoformat(timespec="seconds")
+        with open(path, "a") as fh:
+            for r in self.records():
+                fh.write(json.dumps({"run_id": self.run_id, "ts": ts, **extra, **r}) + "\n")
+        return path
+
+_active: ContextVar[Recorder | None] = ContextVar("etl_metrics", default=None)
+
+def active() -> Recorder | None:
+    return _active.get()
+
+@contextmanager
+def recording(recorder: Recorder | None = None) -> Iterator[Recorder]:
+    """Make ``recorder`` (or a new one) receive every :func:`stage` in this context."""
+    token = _active.set(recorder or Recorder())
+    try:
+        yield _active.get()
+    finally:
+        _active.reset(token)
+
+@contextmanager
+def stage(name: str, source: Path | str | None = None) -> Iterator[dict]:
+    """Time a pipeline stage; callers may set ``rows``/``in_bytes``/``out_bytes`` on the yielded dict.
+
+    A no-op when no :func:`recording` is active.
+    """
+    recorder = _active.get()
+    if recorder is None:
+        yield {}
+        return
+    with recorder.stage(name, source) as m:
+        yield m
+
+def call_recorded(fn: Callable, *args, **kwargs) -> tuple[object, list[dict]]:
+    """Run ``fn`` under a fresh recorder and return its result with the records (for pool workers)."""
+    with recording() as recorder:
+        result = fn(*args, **kwargs)
+    return result, recorder.records()
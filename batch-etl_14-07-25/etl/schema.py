@@ -0,0 +1,133 @@
+import base64
+import json
+from dataclasses import dataclass, field
+from enum import Enum
+from pathlib import Path
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
+
+class DriftPolicy(str, Enum):
+    fail = "fail"
+    evolve = "evolve"
+
+@dataclass
+class SchemaDiff:
+    added: list[str] = field(default_factory=list)
+    removed: list[str] = field(default_factory=list)
+    changed: dict[str, tuple[str, str]] = field(default_factory=dict)
+
+    def __bool__(self) -> bool:
+        return bool(self.added or self.removed or self.changed)
+
+    def describe(self) -> str:
+        parts = [f"+{c}" for c in self.added] + [f"-{c}" for c in self.removed]
+        parts += [f"{c}: {old} -> {new}" for c, (old, new) in self.changed.items()]
+        return ", ".join(parts) or "no changes"
+
+class SchemaDriftError(ValueError):
+    def __init__(self, name: str, detail: str):
+        super().__init__(f"schema drift for {name!r}: {detail}")
+        self.name = name
+
+def diff_schemas(old: pa.Schema, new: pa.Schema) -> SchemaDiff:
+    old_types = {f.name: f.type for f in old}
+    new_types = {f.name: f.type for f in new}
+    return SchemaDiff(
+        added=[c for c in new_types if c not in old_types],
+        removed=[c for c in old_types if c not in new_types],
+        changed={c: (str(t), str(new_types[c])) for c, t in old_types.items()
+                 if c in new_types and new_types[c] != t},
+    )
+
+def header_diff(schema: pa.Schema, src: Path, **read_opts) -> SchemaDiff:
+    """Compare the column names in ``src``'s header with ``schema`` without reading any rows."""
+    columns = list(pd.read_csv(src, nrows=0, **read_opts).columns)
+    return SchemaDiff(added=[c for c in columns if c not in schema.names],
+                      removed=[c for c in schema.names if c not in columns])
+
+def pandas_read_opts(schema: pa.Schema) -> dict:
+    """``read_csv`` options that reproduce ``schema`` without dtype inference.
+
+    Integers and booleans use pandas' nullable dtypes so a week with a
+    missing value does not turn an int column into float.
+    """
+    dtype, parse_dates = {}, []
+    for f in schema:
+        t = f.type
+        if pa.types.is_timestamp(t) or pa.types.is_date(t):
+            parse_dates.append(f.name)
+        elif pa.types.is_integer(t):
+            dtype[f.name] = ("UInt" if pa.types.is_unsigned_integer(t) else "Int") + str(t.bit_width)
+        elif pa.types.is_floating(t):
+            dtype[f.name] = f"float{t.bit_width}"
+        elif pa.types.is_boolean(t):
+            dtype[f.name] = "boolean"
+        elif pa.types.is_string(t) or pa.types.is_large_string(t):
+            dtype[f.name] = "string"
+    opts = {"dtype": dtype}
+    if parse_dates:
+        opts["parse_dates"] = parse_dates
+    return opts
+
+_DUCKDB_TYPES = {
+    "int8": "TINYINT", "int16": "SMALLINT", "int32": "INTEGER", "int64": "BIGINT",
+    "uint8": "UTINYINT", "uint16": "USMALLINT", "uint32": "UINTEGER", "uint64": "UBIGINT",
+    "float": "FLOAT", "double": "DOUBLE", "bool": "BOOLEAN", "string": "VARCHAR",
+    "large_string": "VARCHAR", "date32[day]": "DATE",
+}
+
+def duckdb_types(schema: pa.Schema) -> dict[str, str]:
+    """DuckDB ``read_csv`` ``types`` that reproduce ``schema``; unmapped columns are sniffed."""
+    types = {}
+    for f in schema:
+        if pa.types.is_timestamp(f.type):
+            types[f.name] = "TIMESTAMP"
+        elif str(f.type) in _DUCKDB_TYPES:
+            types[f.name] = _DUCKDB_TYPES[str(f.type)]
+    return types
+
+def staged_schema(path: Path) -> pa.Schema:
+    """Arrow schema of a staged Parquet file, or of a Hive-partitioned directory.
+
+    Partition columns come back from the directory names, typed as Arrow
+    infers them from the path values.
+    """
+    if path.is_dir():
+        return ds.dataset(path, format="parquet", partitioning="hive").schema
+    return pq.read_schema(path)
+
+class SchemaRegistry:
+    """Arrow schemas keyed by source name, one JSON file each under ``root``.
+
+    The file lists the fields for humans and carries the serialized Arrow
+    schema, which is what :meth:`get` reads back.
+    """
+
+    def __init__(self, root: Path):
+        self.root = root
+
+    def path(self, name: str) -> Path:
+        return self.root / f"{name}.schema.json"
+
+    def get(self, name: str) -> pa.Schema | None:
+        path = self.path(name)
+        if not path.exists():
+            return None
+        doc = json.loads(path.read_text())
+        return pa.ipc.read_schema(pa.py_buffer(base64.b64decode(doc["arrow_schema"])))
+
+    def save(self, name: str, schema: pa.Schema) -> Path:
+        # pandas metadata describes one particular frame, not the source.
+        schema = schema.remove_metadata()
+        doc = {
+            "name": name,
+            "fields": [{"name": f.name, "type": str(f.type), "nullable": f.nullable} for f in schema],
+            "arrow_schema": base64.b64encode(schema.serialize().to_pybytes()).decode("ascii"),
+        }
+        self.root.mkdir(parents=True, exist_ok=True)
+        path = self.path(name)
+        path.write_text(json.dumps(doc, indent=2) + "\n")
+        return path
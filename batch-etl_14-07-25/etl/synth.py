@@ -0,0 +1,56 @@
+import numpy as np
+import pandas as pd
+from pathlib import Path
+
+# Column kinds the generator knows how to fill, and named shapes built from them.
+KINDS = ("int", "float", "str", "date", "bool")
+PRESETS = {
+    "narrow": {"int": 1, "float": 2, "str": 1, "date": 1},
+    "wide": {"int": 10, "float": 25, "str": 10, "date": 3, "bool": 2},
+}
+
+def parse_columns(spec: str) -> dict[str, int]:
+    """Turn ``"narrow"``/``"wide"`` or ``"int:2,float:5,str:1"`` into kind counts."""
+    if spec in PRESETS:
+        return dict(PRESETS[spec])
+    counts = {}
+    for part in spec.split(","):
+        kind, _, n = part.strip().partition(":")
+        if kind not in KINDS:
+            raise ValueError(f"unknown column kind {kind!r}; expected one of {', '.join(KINDS)}")
+        counts[kind] = counts.get(kind, 0) + int(n or 1)
+    return counts
+
+def _column(kind: str, rng: np.random.Generator, n: int, cardinality: int) -> np.ndarray:
+    if kind == "int":
+        return rng.integers(0, 1_000_000, n)
+    if kind == "float":
+        return rng.normal(100.0, 25.0, n).round(4)
+    if kind == "str":
+        return np.char.add("k", rng.integers(0, cardinality, n).astype(str))
+    if kind == "date":
+        return (np.datetime64("2020-01-01") + rng.integers(0, 2000, n)).astype(str)
+    return rng.random(n) < 0.5
+
+def generate_csv(path: Path, rows: int, columns: str | dict[str, int] = "narrow", seed: int = 0,
+                 null_rate: float = 0.0, cardinality: int = 1000, chunk_rows: int = 250_000) -> Path:
+    """Write a reproducible synthetic CSV of ``rows`` rows, ``chunk_rows`` at a time.
+
+    The same ``seed`` and arguments always produce the same bytes. ``null_rate``
+    blanks that share of float and str cells (int columns stay complete so
+    their inferred dtype does not drift to float).
+    """
+    counts = parse_columns(columns) if isinstance(columns, str) else columns
+    names = [(f"{kind}_{i}", kind) for kind, n in counts.items() for i in range(n)]
+    rng = np.random.default_rng(seed)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path, "w", newline="") as fh:
+        for start in range(0, max(rows, 1), chunk_rows):  # rows=0 still writes the header
+            n = min(chunk_rows, rows - start)
+            frame = pd.DataFrame({name: _column(kind, rng, n, cardinality) for name, kind in names})
+            if null_rate:
+                for name, kind in names:
+                    if kind in ("float", "str"):
+                        frame.loc[rng.random(n) < null_rate, name] = None
+            frame.to_csv(fh, index=False, header=start == 0)
+    return path
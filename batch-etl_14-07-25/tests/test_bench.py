@@ -0,0 +1,24 @@
+from pathlib import Path
+from etl.bench import BenchCase, compare, run_case
+from etl.io import Engine
+from etl.synth import generate_csv, parse_columns
+
+def test_generator_is_seeded(tmp_path: Path):
+    a = generate_csv(tmp_path / "a.csv", 50, "int:2,float,str,date,bool", seed=7, null_rate=0.2, chunk_rows=16)
+    b = generate_csv(tmp_path / "b.csv", 50, "int:2,float,str,date,bool", seed=7, null_rate=0.2, chunk_rows=16)
+    assert a.read_bytes() == b.read_bytes()
+    lines = a.read_text().splitlines()
+    assert lines[0] == "int_0,int_1,float_0,str_0,date_0,bool_0"
+    assert len(lines) == 51
+    assert sum(parse_columns("wide").values()) == 50
+
+def test_run_case_reports_each_stage(tmp_path: Path):
+    csv = generate_csv(tmp_path / "narrow.csv", 200, "narrow")
+    staged = run_case(csv, 200, tmp_path / "work", BenchCase(Engine.pandas, chunksize=64), isolate=False)
+    direct = run_case(csv, 200, tmp_path / "work", BenchCase(Engine.duckdb, stage=False), isolate=False)
+    assert [r["stage"] for r in staged + direct] == ["convert", "load", "load_direct"]
+    for r in staged + direct:
+        assert r["rows_per_s"] > 0 and r["peak_rss_bytes"] > 0 and r["out_bytes"] > 0
+    baseline = {"results": [dict(r, rows_per_s=r["rows_per_s"] * 10) for r in direct]}
+    assert len(compare(direct, baseline)) == 1
+    assert compare(staged, baseline) == []
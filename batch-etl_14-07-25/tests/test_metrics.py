@@ -0,0 +1,36 @@
+import json
+from pathlib import Path
+from etl import metrics
+from etl.io import csv_to_parquet, parquet_to_duck
+
+def test_stages_are_recorded_per_source(tmp_path: Path):
+    csv = tmp_path / "rows.csv"
+    csv.write_text("a,b\n" + "1,2\n" * 10)
+    with metrics.recording() as recorder:
+        out = csv_to_parquet(csv, tmp_path, chunksize=4)
+        parquet_to_duck(tmp_path / "unit.db", out, "rows")
+    by_stage = {r["stage"]: r for r in recorder.records()}
+    assert list(by_stage) == ["read", "convert", "write_parquet", "load_duckdb"]
+    assert by_stage["read"]["rows"] == 10 and by_stage["read"]["calls"] == 4
+    assert by_stage["read"]["in_bytes"] == csv.stat().st_size
+    assert by_stage["write_parquet"]["out_bytes"] == out.stat().st_size
+    assert by_stage["load_duckdb"]["rows"] == 10
+    assert all(r["wall_s"] >= 0 and r["peak_rss_bytes"] > 0 for r in by_stage.values())
+
+    log = recorder.write_jsonl(tmp_path / "metrics.jsonl", table="rows")
+    lines = [json.loads(line) for line in log.read_text().splitlines()]
+    assert {line["run_id"] for line in lines} == {recorder.run_id}
+    assert lines[0]["table"] == "rows"
+
+def test_nested_stages_report_exclusive_time():
+    recorder = metrics.Recorder()
+    with recorder.stage("outer"):
+        with recorder.stage("inner"):
+            sum(range(200_000))
+    by_stage = {r["stage"]: r for r in recorder.records()}
+    assert by_stage["outer"]["wall_s"] < by_stage["inner"]["wall_s"]
+
+def test_stage_is_a_noop_without_recording():
+    with metrics.stage("read") as m:
+        m["rows"] = 1
+    assert metrics.active() is None
@@ -0,0 +1,77 @@
+from pathlib import Path
+import duckdb
+import pyarrow as pa
+import pyarrow.parquet as pq
+import pytest
+from etl.io import csv_to_duck, csv_to_parquet, csvs_to_parquet, parquet_to_duck
+from etl.schema import SchemaRegistry, diff_schemas, duckdb_types, header_diff, staged_schema
+
+def test_registry_roundtrip(tmp_path: Path):
+    registry = SchemaRegistry(tmp_path / "schemas")
+    schema = pa.schema([("id", pa.int64()), ("name", pa.string()), ("ok", pa.bool_())])
+    assert registry.get("orders") is None
+    registry.save("orders", schema)
+    assert registry.get("orders").equals(schema)
+
+def test_registered_schema_stops_int_to_float_drift(tmp_path: Path):
+    week1, week2 = tmp_path / "week1.csv", tmp_path / "week2.csv"
+    week1.write_text("id,qty,name\n1,5,a\n2,6,b\n")
+    week2.write_text("id,qty,name\n3,,c\n4,7,\n")
+    schema = staged_schema(csv_to_parquet(week1, tmp_path))
+    assert not header_diff(schema, week2)
+    staging = tmp_path / "staging"
+    staging.mkdir()
+    pinned = csv_to_parquet(week2, staging, schema=schema, chunksize=1)
+    assert not diff_schemas(schema, pq.read_schema(pinned))
+    db = tmp_path / "unit.db"
+    parquet_to_duck(db, pinned, "orders")
+    assert duckdb.connect(db).sql("SELECT typeof(qty) FROM orders LIMIT 1").fetchone() == ("BIGINT",)
+
+@pytest.mark.parametrize("engine", ["pandas", "duckdb"])
+def test_drift_is_detected(tmp_path: Path, engine: str):
+    csv = tmp_path / "orders.csv"
+    csv.write_text("id,qty\n1,2.5\n")
+    schema = pa.schema([("id", pa.int64()), ("qty", pa.int64())])
+    with pytest.raises((ValueError, TypeError, duckdb.Error)):
+        csvs_to_parquet([csv], tmp_path, engine=engine, schema=schema)
+    inferred = staged_schema(csvs_to_parquet([csv], tmp_path, engine=engine)[0])
+    assert diff_schemas(schema, inferred).describe() == "qty: int64 -> double"
+    csv.write_text("id,qty,extra\n1,2,x\n")
+    assert header_diff(schema, csv).describe() == "+extra"
+
+def test_drift_past_the_sniff_sample_is_detected(tmp_path: Path):
+    csv = tmp_path / "orders.csv"
+    csv.write_text("a\n" + "1\n" * 100_000 + "2.5\n")
+    schema = pa.schema([("a", pa.int64())])
+    with pytest.raises(ValueError, match="a now hold decimals"):
+        csvs_to_parquet([csv], tmp_path, engine="duckdb", schema=schema)
+    with pytest.raises(ValueError, match="a now hold decimals"):
+        csv_to_duck(tmp_path / "unit.db", csv, "orders", schema=schema)
+
+def test_duckdb_types_follow_schema():
+    schema = pa.schema([("a", pa.int32()), ("b", pa.string()), ("c", pa.timestamp("ns"))])
+    assert duckdb_types(schema) == {"a": "INTEGER", "b": "VARCHAR", "c": "TIMESTAMP"}
+
+@pytest.mark.parametrize("stage", ["--stage", "--no-stage"])
+@pytest.mark.parametrize("mode", ["append", "upsert"])
+def test_evolve_widens_existing_table(tmp_path: Path, stage: str, mode: str):
+    from typer.testing import CliRunner
+    from etl.cli import app
+    src = tmp_path / "src"
+    src.mkdir()
+    db, schemas = tmp_path / "unit.db", tmp_path / "schemas"
+    opts = ["--db", str(db), "--table", "orders", "--mode", mode, "--key", "id", "--engine", "duckdb", stage,
+            "--schema-dir", str(schemas), "--metrics", str(tmp_path / "metrics.jsonl")]
+    (src / "week1.csv").write_text("id,qty,region\n1,5,EU\n2,6,US\n")
+    result = CliRunner().invoke(app, ["run", str(src), *opts])
+    assert result.exit_code == 0, result.output
+    (src / "week2.csv").write_text("id,qty,region\n3,,EU\n4,7.5,US\n")
+    result = CliRunner().invoke(app, ["run", str(src), *opts])
+    assert result.exit_code == 1
+    result = CliRunner().invoke(app, ["run", str(src), *opts, "--schema-drift", "evolve"])
+    assert result.exit_code == 0, result.output
+    con = duckdb.connect(db)
+    assert con.sql("SELECT * FROM orders ORDER BY id").fetchall() == [
+        (1, 5.0, "EU"), (2, 6.0, "US"), (3, None, "EU"), (4, 7.5, "US")]
+    assert con.sql("SELECT typeof(qty) FROM orders LIMIT 1").fetchone() == ("DOUBLE",)
+    assert SchemaRegistry(schemas).get("orders").field("qty").type == pa.float64()
@@ -1,37 +1,82 @@
+import argparse
 import pandas
 import pathlib
 import re
 import pyarrow
+import pyarrow.parquet
 
 # Locate the CSV next to this script
 csv_path = pathlib.Path(__file__).parent / "raw.csv"
+out_path = pathlib.Path(__file__).parent / "long.parquet"
 
-# Load
-dataframe = pandas.read_csv(csv_path)
 
-# 1) Pick year columns using regex (YYYY)
-year_cols = [c for c in dataframe.columns if re.fullmatch(r"\d{4}", str(c))]
+def split_columns(columns):
+    """Year columns (YYYY) and identifier columns (everything else)."""
+    year_cols = [c for c in columns if re.fullmatch(r"\d{4}", str(c))]
+    id_cols = [c for c in columns if c not in year_cols]
+    return year_cols, id_cols
 
-# 2) Identifier columns are everything else
-id_cols = [c for c in dataframe.columns if c not in year_cols]
 
-# 3) Reshape (wide → long)
-dataframe_long = dataframe.melt(
-    id_vars=id_cols,
-    value_vars=year_cols,
-    var_name="Year",
-    value_name="Value"
-)
+def long_schema(id_cols) -> pyarrow.Schema:
+    """Fixed output schema: identifiers dictionary-encoded, so every chunk matches."""
+    return pyarrow.schema(
+        [pyarrow.field(c, pyarrow.dictionary(pyarrow.int32(), pyarrow.string())) for c in id_cols]
+        + [pyarrow.field("Year", pyarrow.int16()), pyarrow.field("Value", pyarrow.float64())]
+    )
 
-# 4) Tidy types
-dataframe_long["Year"] = dataframe_long["Year"].astype(int)
-dataframe_long["Value"] = dataframe_long["Value"].astype(float)
 
-print(dataframe_long.head(10))
+def melt_chunk(chunk: pandas.DataFrame, year_cols, id_cols) -> pandas.DataFrame:
+    """Reshape one block of wide rows (wide → long)."""
+    for c in id_cols:
+        chunk[c] = chunk[c].astype("category")
+    long = chunk.melt(id_vars=id_cols, value_vars=year_cols, var_name="Year", value_name="Value")
+    # Tidy types
+    long["Year"] = long["Year"].astype("int16")
+    long["Value"] = long["Value"].astype(float)
+    return long
 
-# Optional: save for fast downstream work (needs `pip install pyarrow` or `fastparquet`)
-out_path = pathlib.Path(__file__).parent / "long.parquet"
-dataframe_long.to_parquet(out_path, index=False)
-print(f"Saved to {out_path}")
 
-dataframe_long.to_csv("data/long_preview.csv", index=False)
+def reshape(src: pathlib.Path, dest: pathlib.Path, chunksize: int = 2_000,
+            preview: pathlib.Path = None, preview_rows: int = 10_000) -> int:
+    """Stream the wide CSV into a long Parquet file, one row group per chunk.
+
+    Only ``chunksize`` wide rows (× the number of years once melted) are
+    held in memory at a time. If ``preview`` is given, the first
+    ``preview_rows`` long rows are also written there as CSV. Returns the
+    number of long rows written.
+    """
+    year_cols, id_cols = split_columns(pandas.read_csv(src, nrows=0).columns)
+    # Identifiers as strings and years as floats, so a chunk's inferred
+    # dtypes never disagree with the next one's
+    dtype = {**{c: "string" for c in id_cols}, **{c: "float64" for c in year_cols}}
+    schema = long_schema(id_cols)
+
+    rows = 0
+    preview_left = preview_rows if preview else 0
+    with pyarrow.parquet.ParquetWriter(dest, schema) as writer:
+        for chunk in pandas.read_csv(src, dtype=dtype, chunksize=chunksize):
+            long = melt_chunk(chunk, year_cols, id_cols)
+            writer.write_table(pyarrow.Table.from_pandas(long, schema=schema, preserve_index=False))
+            if preview_left > 0:
+                long.head(preview_left).to_csv(preview, mode="w" if rows == 0 else "a",
+                                               header=rows == 0, index=False)
+                preview_left -= min(preview_left, len(long))
+            rows += len(long)
+    return rows
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Reshape the wide World Bank CSV to long Parquet.")
+    parser.add_argument("--src", type=pathlib.Path, default=csv_path)
+    parser.add_argument("--out", type=pathlib.Path, default=out_path)
+    parser.add_argument("--chunksize", type=int, default=2_000, help="wide rows per chunk / row group")
+    parser.add_argument("--preview", type=pathlib.Path, default=None,
+                        help="also write the first --preview-rows long rows as CSV here")
+    parser.add_argument("--preview-rows", type=int, default=10_000)
+    args = parser.parse_args()
+
+    n = reshape(args.src, args.out, args.chunksize, args.preview, args.preview_rows)
+    print(pyarrow.parquet.ParquetFile(args.out).read_row_group(0).to_pandas().head(10))
+    print(f"Saved {n} rows to {args.out}")
+    if args.preview:
+        print(f"Saved preview to {args.preview}")
@@ -0,0 +1,183 @@
+import sys
+from pathlib import Path
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+
+import argparse
+import hashlib
+import os
+import tempfile
+import pandas
+import pyarrow
+import pyarrow.ipc
+from sample.pipeline import COUNTRY_COL, YEAR_COL, load_long, preprocess
+
+
+# ----------------------------
+# Config
+# ----------------------------
+# Bump when preprocess() changes so stale artifacts are rebuilt.
+ARTIFACT_VERSION = "3"
+INDEX_COLS = [COUNTRY_COL, YEAR_COL]
+PARQUET_PATH = Path("data/long.parquet")
+CSV_PATH = Path("data/long_preview.csv")
+
+
+def default_source() -> Path:
+    """data/clean_data.py's Parquet output if present, else the older CSV export."""
+    return PARQUET_PATH if PARQUET_PATH.exists() else CSV_PATH
+
+
+def artifact_path_for(source_path: Path) -> Path:
+    """Default artifact location: next to the source, with an .arrow suffix."""
+    return Path(source_path).with_suffix(".arrow")
+
+
+def file_sha256(path: Path) -> str:
+    """Hex SHA-256 of a file, read in 1 MiB blocks."""
+    digest = hashlib.sha256()
+    with open(path, "rb") as fh:
+        for block in iter(lambda: fh.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def _source_stamp(source_path: Path, sha256: str = None) -> dict:
+    stat = os.stat(source_path)
+    return {
+        "version": ARTIFACT_VERSION,
+        "source_size": str(stat.st_size),
+        "source_mtime_ns": str(stat.st_mtime_ns),
+        "source_sha256": sha256 or file_sha256(source_path),
+    }
+
+
+def read_stamp(artifact_path: Path) -> dict:
+    """The source stamp stored in an artifact's schema metadata (no data is read)."""
+    with pyarrow.memory_map(str(artifact_path), "r") as source:
+        metadata = pyarrow.ipc.open_file(source).schema.metadata or {}
+    return {k.decode(): v.decode() for k, v in metadata.items()}
+
+
+def is_fresh(source_path: Path, artifact_path: Path) -> bool:
+    """True if the artifact was built from the source file as it is now.
+
+    A matching size and mtime is trusted; otherwise the source is hashed, so a
+    touched-but-unchanged file does not force a rebuild.
+    """
+    if not Path(artifact_path).exists():
+        return False
+    try:
+        stamp = read_stamp(artifact_path)
+    except (OSError, pyarrow.ArrowInvalid):
+        return False
+    if stamp.get("version") != ARTIFACT_VERSION:
+        return False
+    stat = os.stat(source_path)
+    if stamp.get("source_size") == str(stat.st_size) and stamp.get("source_mtime_ns") == str(stat.st_mtime_ns):
+        return True
+    sha256 = file_sha256(source_path)
+    if stamp.get("source_sha256") != sha256:
+        return False
+    # Record the new size and mtime so the next check skips the hash again.
+    try:
+        restamp(artifact_path, _source_stamp(source_path, sha256))
+    except OSError:
+        pass  # e.g. a read-only deploy; the artifact is still fresh
+    return True
+
+
+def frame_to_table(df: pandas.DataFrame) -> pyarrow.Table:
+    """Flatten the (country, year) index into columns; countries are dictionary-encoded.
+
+    NaN stays NaN rather than becoming null, so float columns have no
+    validity bitmap and can be handed to pandas without a copy.
+    """
+    flat = df.reset_index()
+    columns = {COUNTRY_COL: pyarrow.array(pandas.Categorical(flat[COUNTRY_COL]))}
+    for name in flat.columns.drop(COUNTRY_COL):
+        columns[name] = pyarrow.array(flat[name].to_numpy(), from_pandas=False)
+    return pyarrow.table(columns)
+
+
+def table_to_frame(table: pyarrow.Table) -> pandas.DataFrame:
+    """Inverse of frame_to_table; float columns keep pointing at the table's buffers."""
+    index = pandas.MultiIndex.from_arrays(
+        [table.column(c).to_pandas() for c in INDEX_COLS], names=INDEX_COLS
+    )
+    # The categorical codes become the level codes; only the level itself is decoded.
+    index = index.set_levels(index.levels[0].astype(object), level=0)
+    values = {
+        name: table.column(name).to_numpy()
+        for name in table.column_names if name not in INDEX_COLS
+    }
+    return pandas.DataFrame(values, index=index, copy=False)
+
+
+def build_artifact(source_path: Path, artifact_path: Path = None) -> Path:
+    """Preprocess the source and write an uncompressed Arrow IPC (Feather v2) file.
+
+    The file is written next to the target and renamed into place, so
+    workers starting at the same time never see a half-written artifact.
+    """
+    source_path = Path(source_path)
+    artifact_path = Path(artifact_path or artifact_path_for(source_path))
+    sha256 = file_sha256(source_path)
+    table = frame_to_table(preprocess(load_long(source_path)))
+    table = table.replace_schema_metadata(_source_stamp(source_path, sha256))
+    return _write_table(table, artifact_path)
+
+
+def restamp(artifact_path: Path, stamp: dict) -> Path:
+    """Rewrite the artifact with a new source stamp, reusing its data as is."""
+    with pyarrow.memory_map(str(artifact_path), "r") as source:
+        table = pyarrow.ipc.open_file(source).read_all()
+        return _write_table(table.replace_schema_metadata(stamp), Path(artifact_path))
+
+
+def _write_table(table: pyarrow.Table, artifact_path: Path) -> Path:
+    artifact_path.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=artifact_path.parent, suffix=".arrow.tmp")
+    try:
+        with os.fdopen(fd, "wb") as sink:
+            # Uncompressed, so the buffers can be memory-mapped as they are.
+            with pyarrow.ipc.new_file(sink, table.schema) as writer:
+                writer.write_table(table)
+        os.replace(tmp, artifact_path)
+    except BaseException:
+        os.unlink(tmp)
+        raise
+    return artifact_path
+
+
+def load_artifact(artifact_path: Path) -> pandas.DataFrame:
+    """Memory-map the artifact; processes mapping the same file share its pages."""
+    source = pyarrow.memory_map(str(artifact_path), "r")
+    return table_to_frame(pyarrow.ipc.open_file(source).read_all())
+
+
+def load_or_build(source_path: Path, artifact_path: Path = None) -> pandas.DataFrame:
+    """Load the preprocessed frame, rebuilding the artifact first if the source changed."""
+    artifact_path = Path(artifact_path or artifact_path_for(source_path))
+    if not is_fresh(source_path, artifact_path):
+        build_artifact(source_path, artifact_path)
+    return load_artifact(artifact_path)
+
+
+# ----------------------------
+# Entrypoint
+# ----------------------------
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Build the preprocessed GDP artifact for the dashboard.")
+    parser.add_argument("--source", "--csv", type=Path, default=None,
+                        help="long Parquet or CSV; defaults to data/long.parquet, else data/long_preview.csv")
+    parser.add_argument("--out", type=Path, default=None, help="defaults to the source path with .arrow")
+    parser.add_argument("--force", action="store_true", help="rebuild even if the artifact is fresh")
+    args = parser.parse_args()
+
+    source = args.source or default_source()
+    out = Path(args.out or artifact_path_for(source))
+    if args.force or not is_fresh(source, out):
+        build_artifact(source, out)
+        print(f"Built {out}")
+    else:
+        print(f"{out} is up to date")
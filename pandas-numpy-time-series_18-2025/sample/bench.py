@@ -0,0 +1,254 @@
+import sys
+from pathlib import Path
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+
+import argparse
+import json
+import time
+import numpy
+import pandas
+import plotly.graph_objects
+from sample.helpers import (
+    group_offsets, moving_average_nan, moving_average_nan_batched, regularise_panel, zscore_nan, zscore_nan_batched,
+)
+from sample.incremental import IncrementalPanel
+from sample.figures import build_figure, outliers_patch, selected_rows, smoothing_patch
+from sample.pipeline import GROWTH_COL, SMOOTH_WINDOWS, preprocess, smoothed_col
+from sample.store import PanelStore
+
+
+def resample_loop(df: pandas.DataFrame, entity_col: str, time_col: str, rule: str = "YE") -> pandas.DataFrame:
+    """The original per-entity resample/concat loop, kept as the reference for regularise_panel."""
+    resampled = []
+    for entity, group in df.sort_values([entity_col, time_col]).groupby(entity_col):
+        group = group.set_index(time_col)
+        group = group.resample(rule).ffill()
+        group[entity_col] = entity
+        resampled.append(group)
+    return pandas.concat(resampled).reset_index().set_index([entity_col, time_col])
+
+
+def synthetic_panel(n_entities: int, n_years: int, gap_rate: float = 0.2, seed: int = 0,
+                    nan_rate: float = 0.0) -> pandas.DataFrame:
+    """Long-format annual panel with a share of the years randomly missing
+    and, of the rows kept, a share ``nan_rate`` of NaN values."""
+    rng = numpy.random.default_rng(seed)
+    entities = numpy.repeat([f"E{i:05d}" for i in range(n_entities)], n_years)
+    years = numpy.tile(numpy.arange(1960, 1960 + n_years), n_entities)
+    df = pandas.DataFrame({
+        "Country Name": entities,
+        "Year": pandas.to_datetime(years.astype(str), format="%Y"),
+        "Value": rng.normal(2.0, 3.0, len(years)),
+    })
+    keep = rng.random(len(df)) >= gap_rate
+    # Keep each entity's first and last year so both versions span the same range
+    keep[::n_years] = True
+    keep[n_years - 1::n_years] = True
+    df = df[keep].reset_index(drop=True)
+    if nan_rate:
+        df.loc[rng.random(len(df)) < nan_rate, "Value"] = numpy.nan
+    return df
+
+
+def best_of(fn, repeat: int) -> float:
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def bench_regularise(n_entities: int, n_years: int = 60, repeat: int = 3) -> dict:
+    """Time the loop against regularise_panel on the same panel and check they agree."""
+    df = synthetic_panel(n_entities, n_years)
+    expected = resample_loop(df, "Country Name", "Year")
+    pandas.testing.assert_frame_equal(regularise_panel(df, "Country Name", "Year"), expected)
+    loop_s = best_of(lambda: resample_loop(df, "Country Name", "Year"), repeat)
+    vectorized_s = best_of(lambda: regularise_panel(df, "Country Name", "Year"), repeat)
+    return {
+        "entities": n_entities,
+        "rows": len(df),
+        "loop_s": loop_s,
+        "vectorized_s": vectorized_s,
+        "speedup": loop_s / vectorized_s,
+    }
+
+
+def bench_batched(n_entities: int, n_years: int = 60, repeat: int = 3) -> dict:
+    """Time z-scores plus smoothing for windows 1-9 via groupby().transform and via the batched helpers."""
+    panel = regularise_panel(synthetic_panel(n_entities, n_years), "Country Name", "Year")
+    values = panel["Value"]
+    offsets = group_offsets(panel.index.codes[0])
+
+    def per_group():
+        by_country = values.groupby(level=0)
+        by_country.transform(zscore_nan)
+        for window in range(1, 10):
+            by_country.transform(lambda s: moving_average_nan(s, window))
+
+    def batched():
+        flat = values.to_numpy()
+        zscore_nan_batched(flat, offsets)
+        for window in range(1, 10):
+            moving_average_nan_batched(flat, offsets, window)
+
+    per_group_s = best_of(per_group, repeat)
+    batched_s = best_of(batched, repeat)
+    return {
+        "entities": n_entities,
+        "rows": len(panel),
+        "per_group_s": per_group_s,
+        "batched_s": batched_s,
+        "speedup": per_group_s / batched_s,
+    }
+
+
+def bench_append(n_entities: int, n_years: int = 60, repeat: int = 3) -> dict:
+    """Time adding one new year for every entity: full preprocess vs IncrementalPanel.append.
+
+    The appended panel is checked against the full recompute first.
+    """
+    raw = synthetic_panel(n_entities, n_years + 1)
+    is_new = raw["Year"].dt.year == raw["Year"].dt.year.max()
+    history, latest = raw[~is_new], raw[is_new]
+    seeded = preprocess(history)
+
+    panel = IncrementalPanel.from_frame(seeded)
+    panel.append(latest)
+    pandas.testing.assert_frame_equal(panel.to_frame(), preprocess(raw), rtol=1e-9)
+
+    full_s = best_of(lambda: preprocess(raw), repeat)
+    # Seeding is not part of the update; time only the append
+    timings = []
+    for _ in range(repeat):
+        panel = IncrementalPanel.from_frame(seeded)
+        start = time.perf_counter()
+        panel.append(latest)
+        timings.append(time.perf_counter() - start)
+    append_s = min(timings)
+    return {
+        "entities": n_entities,
+        "rows": len(raw),
+        "new_rows": len(latest),
+        "full_s": full_s,
+        "append_s": append_s,
+        "speedup": full_s / append_s,
+    }
+
+
+def synthetic_store(n_entities: int, n_points: int, freq: str = "YE", seed: int = 0) -> PanelStore:
+    """A PanelStore with the dashboard's columns, n_points per entity ending in 2019."""
+    rng = numpy.random.default_rng(seed)
+    growth = rng.normal(2.0, 3.0, n_entities * n_points)
+    offsets = numpy.arange(0, len(growth) + 1, n_points)
+    dates = numpy.tile(pandas.date_range(end="2019-12-31", periods=n_points, freq=freq).to_numpy(), n_entities)
+    columns = {GROWTH_COL: growth, "z": zscore_nan_batched(growth, offsets)}
+    for window in SMOOTH_WINDOWS:
+        columns[smoothed_col(window)] = moving_average_nan_batched(growth, offsets, window)
+    return PanelStore([f"E{i:05d}" for i in range(n_entities)], offsets, dates, columns)
+
+
+def legacy_figure(store, countries, y0, y1, window, show_smoothed, show_outliers):
+    """The figure as update_chart built it before the high-volume mode: SVG traces,
+    ISO date strings, every point, and only the traces the toggles show."""
+    fig = plotly.graph_objects.Figure()
+    y_col = smoothed_col(window) if show_smoothed else GROWTH_COL
+    for c, r in selected_rows(store, countries, y0, y1).items():
+        x = store.dates[r]
+        fig.add_trace(plotly.graph_objects.Scatter(
+            x=x, y=store[y_col][r], mode="lines", name=c + (" (smoothed)" if show_smoothed else ""),
+            hovertemplate=f"Country: {c}<br>Year: %{{x|%Y}}<br>{y_col}: %{{y:.2f}}%<extra></extra>"
+        ))
+        if show_outliers:
+            z = store["z"][r]
+            out = numpy.abs(z) > 2.5
+            if out.any():
+                fig.add_trace(plotly.graph_objects.Scatter(
+                    x=x[out], y=store[GROWTH_COL][r][out], mode="markers", name=f"{c} outliers",
+                    marker=dict(size=8, symbol="x"), customdata=z[out], showlegend=False,
+                    hovertemplate=f"Country: {c}<br>Year: %{{x|%Y}}<br>Raw Growth: %{{y:.2f}}%<br>z: %{{customdata:.2f}}<extra></extra>",
+                ))
+    fig.update_layout(
+        title=f"GDP Growth ({'Smoothed' if show_smoothed else 'Raw'}) — {y0}–{y1}", xaxis_title="Year",
+        yaxis_title="GDP Growth (%)", hovermode="x unified", legend_title="Countries",
+        margin=dict(l=40, r=20, t=60, b=40), height=720,
+    )
+    return fig
+
+
+def bench_figure(n_entities: int, n_points: int, freq: str = "YE", repeat: int = 3) -> list:
+    """Response size and build+serialise time per interaction, legacy figure vs current.
+
+    Every series is selected with smoothing and outliers on. Before, each
+    interaction resent the whole figure; now the toggles send a Patch.
+    """
+    store = synthetic_store(n_entities, n_points, freq)
+    y0, y1 = store.year_bounds()
+    countries = tuple(store.entities)
+    rows = selected_rows(store, countries, y0, y1)
+
+    responses = {
+        "initial": (
+            lambda: legacy_figure(store, countries, y0, y1, 5, True, True).to_json(),
+            lambda: json.dumps(build_figure(store, countries, y0, y1, 5, True, True)),
+        ),
+        "smoothing off": (
+            lambda: legacy_figure(store, countries, y0, y1, 5, False, True).to_json(),
+            lambda: json.dumps(smoothing_patch(store, rows, y0, y1, 5, False).to_plotly_json()),
+        ),
+        "outliers off": (
+            lambda: legacy_figure(store, countries, y0, y1, 5, True, False).to_json(),
+            lambda: json.dumps(outliers_patch(len(rows), False).to_plotly_json()),
+        ),
+    }
+    results = []
+    for interaction, (before, after) in responses.items():
+        record = {"case": f"{n_entities} x {n_points} {freq}", "interaction": interaction}
+        for name, render in (("before", before), ("after", after)):
+            record[f"{name}_bytes"] = len(render())
+            record[f"{name}_s"] = best_of(render, repeat)
+        results.append(record)
+    return results
+
+
+# ----------------------------
+# Entrypoint
+# ----------------------------
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark the vectorized panel code against per-country loops.")
+    parser.add_argument("suite", nargs="?", choices=["panel", "helpers", "append", "figure", "all"], default="all")
+    parser.add_argument("--entities", type=int, nargs="+", default=[200, 2000, 20000])
+    parser.add_argument("--years", type=int, default=60)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    if args.suite in ("panel", "all"):
+        print("Panel regularisation (resample loop vs regularise_panel)")
+        print(f"{'entities':>9} {'rows':>10} {'loop s':>9} {'vector s':>9} {'speedup':>8}")
+        for n in args.entities:
+            r = bench_regularise(n, args.years, args.repeat)
+            print(f"{r['entities']:>9} {r['rows']:>10} {r['loop_s']:>9.3f} {r['vectorized_s']:>9.4f} {r['speedup']:>7.0f}x")
+
+    if args.suite in ("helpers", "all"):
+        print("z-score + smoothing windows 1-9 (groupby.transform vs batched helpers)")
+        print(f"{'entities':>9} {'rows':>10} {'group s':>9} {'batch s':>9} {'speedup':>8}")
+        for n in args.entities:
+            r = bench_batched(n, args.years, args.repeat)
+            print(f"{r['entities']:>9} {r['rows']:>10} {r['per_group_s']:>9.3f} {r['batched_s']:>9.4f} {r['speedup']:>7.0f}x")
+
+    if args.suite in ("append", "all"):
+        print("One new year per entity (full preprocess vs IncrementalPanel.append)")
+        print(f"{'entities':>9} {'rows':>10} {'new rows':>9} {'full s':>9} {'append s':>9} {'speedup':>8}")
+        for n in args.entities:
+            r = bench_append(n, args.years, args.repeat)
+            print(f"{r['entities']:>9} {r['rows']:>10} {r['new_rows']:>9} {r['full_s']:>9.3f} {r['append_s']:>9.4f}"
+                  f" {r['speedup']:>7.0f}x")
+
+    if args.suite in ("figure", "all"):
+        print("Chart responses, all series selected (legacy full figure vs current figure/Patch)")
+        print(f"{'case':>18} {'interaction':>14} {'before KB':>10} {'after KB':>9} {'before ms':>10} {'after ms':>9}")
+        for n, points, freq in [(200, 60, "YE"), (2000, 60, "YE"), (50, 5000, "D")]:
+            for r in bench_figure(n, points, freq, args.repeat):
+                print(f"{r['case']:>18} {r['interaction']:>14} {r['before_bytes'] / 1024:>10.1f} {r['after_bytes'] / 1024:>9.1f}"
+                      f" {r['before_s'] * 1000:>10.1f} {r['after_s'] * 1000:>9.1f}")
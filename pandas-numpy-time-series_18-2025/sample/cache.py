@@ -0,0 +1,76 @@
+import sys
+from pathlib import Path
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+
+import json
+import sqlite3
+import threading
+import time
+
+
+class ResponseCache:
+    """Small LRU/TTL cache of JSON-serialisable values in a SQLite file.
+
+    Every worker process opening the same file shares its entries. Entries
+    older than ``ttl`` seconds are ignored and purged; once there are more
+    than ``max_entries``, the least recently read ones are dropped.
+    """
+
+    def __init__(self, path: Path, max_entries: int = 512, ttl: float = 3600.0):
+        self.path = Path(path)
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._local = threading.local()
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with self._connect() as con:
+            con.execute(
+                "CREATE TABLE IF NOT EXISTS responses ("
+                " key TEXT PRIMARY KEY, value TEXT NOT NULL,"
+                " created REAL NOT NULL, accessed REAL NOT NULL)"
+            )
+            con.execute("CREATE INDEX IF NOT EXISTS responses_accessed ON responses (accessed)")
+
+    def _connect(self) -> sqlite3.Connection:
+        # sqlite3 connections may not cross threads, and Flask serves each request on one
+        con = getattr(self._local, "con", None)
+        if con is None:
+            con = sqlite3.connect(self.path, timeout=5.0)
+            con.execute("PRAGMA journal_mode=WAL")
+            con.execute("PRAGMA synchronous=NORMAL")
+            self._local.con = con
+        return con
+
+    def get(self, key: str):
+        """The cached value for ``key``, or None if missing or expired."""
+        now = time.time()
+        con = self._connect()
+        row = con.execute(
+            "SELECT value FROM responses WHERE key = ? AND created > ?", (key, now - self.ttl)
+        ).fetchone()
+        if row is None:
+            return None
+        with con:
+            con.execute("UPDATE responses SET accessed = ? WHERE key = ?", (now, key))
+        return json.loads(row[0])
+
+    def set(self, key: str, value) -> None:
+        now = time.time()
+        con = self._connect()
+        with con:
+            con.execute(
+                "INSERT OR REPLACE INTO responses (key, value, created, accessed) VALUES (?, ?, ?, ?)",
+                (key, json.dumps(value), now, now),
+            )
+            con.execute("DELETE FROM responses WHERE created <= ?", (now - self.ttl,))
+            con.execute(
+                "DELETE FROM responses WHERE key IN ("
+                " SELECT key FROM responses ORDER BY accessed DESC LIMIT -1 OFFSET ?)",
+                (self.max_entries,),
+            )
+
+    def clear(self) -> None:
+        with self._connect() as con:
+            con.execute("DELETE FROM responses")
+
+    def __len__(self) -> int:
+        return self._connect().execute("SELECT COUNT(*) FROM responses").fetchone()[0]
@@ -3,23 +3,26 @@ import sys
 from pathlib import Path
 sys.path.append(str(Path(__file__).resolve().parents[1]))
 
-import numpy
-import pandas
+import json
 import dash
 import dash.dcc
 import dash.html
-import dash.dependencies
-import plotly.graph_objects
-from sample.helpers import np_growth, moving_average_nan, zscore_nan
+from sample.artifact import artifact_path_for, default_source, load_or_build, read_stamp
+from sample.cache import ResponseCache
+from sample.store import PanelStore
+from sample.figures import build_figure, outliers_patch, selected_rows, set_outliers, smoothing_patch
 
 
 # ----------------------------
 # Config
 # ----------------------------
-CSV_PATH = Path("data/long_preview.csv")  
-VALUE_COL = "Value"
-COUNTRY_COL = "Country Name"
-YEAR_COL = "Year"
+# data/long.parquet from data/clean_data.py, else the older long_preview.csv
+SOURCE_PATH = default_source()
+ARTIFACT_PATH = artifact_path_for(SOURCE_PATH)
+# Rendered figures, shared by every worker on this host
+CACHE_PATH = Path("data/chart_cache.sqlite")
+CACHE_MAX_ENTRIES = 512
+CACHE_TTL_S = 3600
 
 # ----------------------------
 # Helpers (NumPy-based)
@@ -56,51 +59,29 @@ def zscore_nan(series: pandas.Series) -> numpy.ndarray:
     return (x - mu) / sd"""
 
 # ----------------------------
-# Load & preprocess once
+# Load preprocessed data
 # ----------------------------
-df = pandas.read_csv(CSV_PATH)
-
-# Keep necessary cols and clean
-df = df[[COUNTRY_COL, YEAR_COL, VALUE_COL]].dropna(subset=[VALUE_COL])
-df[VALUE_COL] = pandas.to_numeric(df[VALUE_COL], errors="coerce")
-df = df.dropna(subset=[VALUE_COL])
-df[YEAR_COL] = pandas.to_datetime(df[YEAR_COL], format="%Y", errors="coerce")
-df = df.dropna(subset=[YEAR_COL])
-
-df = df.sort_values([COUNTRY_COL, YEAR_COL]).set_index([COUNTRY_COL, YEAR_COL])
-
-# Make annual and fill forward within each country (safe even if already annual)
-df = df.sort_values([COUNTRY_COL, YEAR_COL]).reset_index()
-
-# Resample with datetime as index, avoid group-level duplication
-resampled = []
-
-for country, group in df.groupby(COUNTRY_COL):
-    group = group.set_index(YEAR_COL)
-    group = group.resample("YE").ffill()
-    group[COUNTRY_COL] = country  # Reinsert the country name
-    resampled.append(group)
-
-df = pandas.concat(resampled).reset_index()
-df = df.set_index([COUNTRY_COL, YEAR_COL])
-
-
-# Precompute raw GDP growth (%)
-df["GDP Growth (%)"] = df[VALUE_COL]
-
-# Precompute per-country z-scores on raw growth (used for outliers)
-df["z"] = df.groupby(level=0)["GDP Growth (%)"].transform(zscore_nan)
+# Built by `python -m sample.artifact` (or here, if missing or stale) and
+# memory-mapped, so startup skips preprocessing and workers share the pages.
+df = load_or_build(SOURCE_PATH, ARTIFACT_PATH)
+# Part of every cache key, so neither a new source nor a new preprocessing
+# version (ARTIFACT_VERSION) serves old figures
+stamp = read_stamp(ARTIFACT_PATH)
+data_version = f"{stamp['version']}:{stamp['source_sha256']}"
+chart_cache = ResponseCache(CACHE_PATH, max_entries=CACHE_MAX_ENTRIES, ttl=CACHE_TTL_S)
+# Country -> row range over the same arrays, for slice-based lookups
+store = PanelStore.from_frame(df)
 
 # For the UI
-countries = sorted(df.index.get_level_values(0).unique().tolist())
-year_min = int(df.index.get_level_values(1).min().year)
-year_max = int(df.index.get_level_values(1).max().year)
+countries = sorted(store.entities)
+year_min, year_max = store.year_bounds()
 
 # ----------------------------
 # Dash app
 # ----------------------------
 app = dash.Dash(__name__)
 app.title = "GDP Growth Dashboard"
+server = app.server  # for gunicorn: `gunicorn sample.core:server`
 
 app.layout = dash.html.Div([
     dash.html.H2("GDP Growth Trends (World Bank)"),
@@ -147,6 +128,40 @@ app.layout = dash.html.Div([
 # ----------------------------
 # Callbacks
 # ----------------------------
+def normalise_inputs(selected_countries, year_range, window, smooth_toggle, outlier_toggle):
+    """Canonical form of the callback inputs, so equivalent views share one cache entry."""
+    countries = tuple(sorted(set(selected_countries or [])))
+    y0, y1 = sorted(int(y) for y in year_range)
+    y0, y1 = max(y0, year_min), min(y1, year_max)
+    show_smoothed = "smooth" in (smooth_toggle or [])
+    window = int(window)
+    show_outliers = "outliers" in (outlier_toggle or [])
+    return countries, y0, y1, window, show_smoothed, show_outliers
+
+
+def render_chart(countries, y0, y1, window, show_smoothed, show_outliers):
+    """Build the figure dict for normalised inputs from the precomputed columns."""
+    return build_figure(store, countries, y0, y1, window, show_smoothed, show_outliers)
+
+
+def chart_response(inputs, triggered_id=None):
+    """The figure, or a Patch when only a toggle changed."""
+    countries, y0, y1, window, show_smoothed, show_outliers = inputs
+    shown = selected_rows(store, countries, y0, y1)
+    if shown and triggered_id == "outlier-toggle":
+        return outliers_patch(len(shown), show_outliers)
+    if shown and triggered_id == "smooth-toggle":
+        return smoothing_patch(store, shown, y0, y1, window, show_smoothed)
+
+    # Outliers are only hidden or shown, so that toggle is not part of the key
+    key = json.dumps([data_version, countries, y0, y1, window if show_smoothed else None, show_smoothed])
+    figure = chart_cache.get(key)
+    if figure is None:
+        figure = render_chart(*inputs)
+        chart_cache.set(key, figure)
+    return set_outliers(figure, show_outliers)
+
+
 @app.callback(
     dash.Output("growth-graph", "figure"),
     dash.Input("country-dropdown", "value"),
@@ -156,69 +171,8 @@ app.layout = dash.html.Div([
     dash.Input("outlier-toggle", "value"),
 )
 def update_chart(selected_countries, year_range, window, smooth_toggle, outlier_toggle):
-    if not selected_countries:
-        selected_countries = []
-
-    y0, y1 = year_range
-    mask = (
-        df.index.get_level_values(0).isin(selected_countries) &
-        (df.index.get_level_values(1).year >= y0) &
-        (df.index.get_level_values(1).year <= y1)
-    )
-    sub = df.loc[mask].copy()
-    if sub.empty:
-        fig = plotly.graph_objects.Figure()
-        fig.update_layout(
-            title="No data for the current selection",
-            xaxis_title="Year", yaxis_title="GDP Growth (%)"
-        )
-        return fig
-
-    # Smoothed growth
-    show_smoothed = "smooth" in (smooth_toggle or [])
-    if show_smoothed:
-        sub["Smoothed Growth (%)"] = (
-            sub.groupby(level=0)["GDP Growth (%)"].transform(lambda s: moving_average_nan(s, window))
-        )
-
-    fig = plotly.graph_objects.Figure()
-    y_col = "Smoothed Growth (%)" if show_smoothed else "GDP Growth (%)"
-
-    for c in selected_countries:
-        cs = sub.xs(c, level=0, drop_level=False)
-        fig.add_trace(plotly.graph_objects.Scatter(
-            x=cs.index.get_level_values(1),
-            y=cs[y_col],
-            mode="lines",
-            name=c + (" (smoothed)" if show_smoothed else ""),
-            hovertemplate=f"Country: {c}<br>Year: %{{x|%Y}}<br>{y_col}: %{{y:.2f}}%<extra></extra>"
-        ))
-
-        if "outliers" in (outlier_toggle or []):
-            out = cs[cs["z"].abs() > 2.5]
-            if not out.empty:
-                fig.add_trace(plotly.graph_objects.Scatter(
-                    x=out.index.get_level_values(1),
-                    y=out["GDP Growth (%)"],
-                    mode="markers",
-                    name=f"{c} outliers",
-                    marker=dict(size=8, symbol="x"),
-                    hovertemplate=f"Country: {c}<br>Year: %{{x|%Y}}<br>Raw Growth: %{{y:.2f}}%<br>z: %{{customdata:.2f}}<extra></extra>",
-                    customdata=out["z"],
-                    showlegend=False
-                ))
-
-
-    fig.update_layout(
-        title=f"GDP Growth ({'Smoothed' if show_smoothed else 'Raw'}) — {y0}–{y1}",
-        xaxis_title="Year",
-        yaxis_title="GDP Growth (%)",
-        hovermode="x unified",
-        legend_title="Countries",
-        margin=dict(l=40, r=20, t=60, b=40),
-        height=720,
-    )
-    return fig
+    inputs = normalise_inputs(selected_countries, year_range, window, smooth_toggle, outlier_toggle)
+    return chart_response(inputs, dash.ctx.triggered_id)
 
 # ----------------------------
 # Entrypoint
@@ -0,0 +1,147 @@
+import sys
+from pathlib import Path
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+
+import base64
+import json
+import dash
+import numpy
+import plotly.graph_objects
+from sample.helpers import lttb_indices
+from sample.pipeline import GROWTH_COL, smoothed_col
+
+
+# ----------------------------
+# Config
+# ----------------------------
+# Above this many plotted points in total, lines switch to WebGL (scattergl)
+HIGH_VOLUME_POINTS = 20_000
+# Lines longer than this are downsampled with LTTB to DOWNSAMPLE_TARGET points
+DOWNSAMPLE_THRESHOLD = 2_000
+DOWNSAMPLE_TARGET = 1_000
+OUTLIER_Z = 2.5
+
+# Every country gets a line trace then an outlier trace, so a toggle can be
+# sent as a Patch addressed by trace position instead of a whole figure
+TRACES_PER_COUNTRY = 2
+LINE, OUTLIERS = range(TRACES_PER_COUNTRY)
+
+
+def selected_rows(store, countries, y0, y1) -> dict:
+    """Country -> row slice for the countries with data in y0..y1."""
+    rows = {c: store.clip(c, y0, y1) for c in countries}
+    return {c: r for c, r in rows.items() if r.stop > r.start}
+
+
+def chart_title(show_smoothed, y0, y1) -> str:
+    return f"GDP Growth ({'Smoothed' if show_smoothed else 'Raw'}) — {y0}–{y1}"
+
+
+def typed_array(values) -> dict:
+    """A float array as a plotly.js typed-array spec (base64), not a JSON number list."""
+    data = numpy.ascontiguousarray(values, dtype="<f8")
+    return {"dtype": "f8", "bdata": base64.b64encode(data).decode("ascii")}
+
+
+def _epoch_ms(dates: numpy.ndarray) -> numpy.ndarray:
+    # Plotly reads numbers on a date axis as epoch milliseconds, which
+    # travel as base64 instead of one ISO string per point
+    return dates.astype("datetime64[ms]").astype(numpy.int64).astype(float)
+
+
+def _layout(**kwargs) -> dict:
+    # Through a Figure once per render, so the default template is included
+    return json.loads(plotly.graph_objects.Figure(layout=kwargs).to_json())["layout"]
+
+
+def line_data(store, c, r, window, show_smoothed) -> dict:
+    """The data-bearing properties of a country's line trace."""
+    x = _epoch_ms(store.dates[r])
+    y = store[smoothed_col(window) if show_smoothed else GROWTH_COL][r]
+    if len(y) > DOWNSAMPLE_THRESHOLD:
+        keep = lttb_indices(x, y, DOWNSAMPLE_TARGET)
+        x, y = x[keep], y[keep]
+    y_label = "Smoothed Growth (%)" if show_smoothed else GROWTH_COL
+    return {
+        "x": typed_array(x),
+        "y": typed_array(y),
+        "name": c + (" (smoothed)" if show_smoothed else ""),
+        "hovertemplate": f"Country: {c}<br>Year: %{{x|%Y}}<br>{y_label}: %{{y:.2f}}%<extra></extra>",
+    }
+
+
+def build_figure(store, countries, y0, y1, window, show_smoothed, show_outliers, high_volume=None) -> dict:
+    """The chart as a JSON-ready figure dict.
+
+    Outlier traces are always included and only hidden, so the outlier
+    toggle never needs new data. ``high_volume`` forces WebGL traces on or
+    off; by default they are used above HIGH_VOLUME_POINTS points.
+    """
+    rows = selected_rows(store, countries, y0, y1)
+    if not rows:
+        return {"data": [], "layout": _layout(
+            title="No data for the current selection",
+            xaxis_title="Year", yaxis_title="GDP Growth (%)"
+        )}
+
+    if high_volume is None:
+        high_volume = sum(r.stop - r.start for r in rows.values()) > HIGH_VOLUME_POINTS
+    trace_type = "scattergl" if high_volume else "scatter"
+
+    data = []
+    raw, z = store[GROWTH_COL], store["z"]
+    for c, r in rows.items():
+        data.append({"type": trace_type, "mode": "lines", **line_data(store, c, r, window, show_smoothed)})
+
+        out = numpy.abs(z[r]) > OUTLIER_Z
+        data.append({
+            "type": trace_type,
+            "x": typed_array(_epoch_ms(store.dates[r][out])),
+            "y": typed_array(raw[r][out]),
+            "mode": "markers",
+            "name": f"{c} outliers",
+            "visible": show_outliers,
+            "marker": {"size": 8, "symbol": "x"},
+            "hovertemplate": f"Country: {c}<br>Year: %{{x|%Y}}<br>Raw Growth: %{{y:.2f}}%<br>z: %{{customdata:.2f}}<extra></extra>",
+            "customdata": typed_array(z[r][out]),
+            "showlegend": False,
+        })
+
+    return {"data": data, "layout": _layout(
+        title=chart_title(show_smoothed, y0, y1),
+        xaxis_title="Year",
+        xaxis_type="date",
+        yaxis_title="GDP Growth (%)",
+        hovermode="x unified",
+        legend_title="Countries",
+        margin=dict(l=40, r=20, t=60, b=40),
+        height=720,
+    )}
+
+
+def set_outliers(figure: dict, show_outliers) -> dict:
+    """Show or hide the outlier traces of a figure from build_figure, in place."""
+    for trace in figure["data"][OUTLIERS::TRACES_PER_COUNTRY]:
+        trace["visible"] = show_outliers
+    return figure
+
+
+def outliers_patch(n_countries, show_outliers) -> dash.Patch:
+    """set_outliers as a Patch against the figure already in the browser."""
+    patch = dash.Patch()
+    for i in range(n_countries):
+        patch["data"][i * TRACES_PER_COUNTRY + OUTLIERS]["visible"] = show_outliers
+    return patch
+
+
+def smoothing_patch(store, rows: dict, y0, y1, window, show_smoothed) -> dash.Patch:
+    """Swap each line between raw and smoothed growth, leaving everything else in place."""
+    patch = dash.Patch()
+    for i, (c, r) in enumerate(rows.items()):
+        line = line_data(store, c, r, window, show_smoothed)
+        if r.stop - r.start <= DOWNSAMPLE_THRESHOLD:
+            del line["x"]  # only downsampled lines pick different points
+        for prop, value in line.items():
+            patch["data"][i * TRACES_PER_COUNTRY + LINE][prop] = value
+    patch["layout"]["title"]["text"] = chart_title(show_smoothed, y0, y1)
+    return patch
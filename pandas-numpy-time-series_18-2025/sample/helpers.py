@@ -26,8 +26,11 @@ def moving_average_nan(series: pandas.Series, window: int = 3) -> numpy.ndarray:
     x_filled = numpy.where(mask, x, 0.0)
     k = numpy.ones(window, dtype=float)
 
-    num = numpy.convolve(x_filled, k, mode="same")
-    den = numpy.convolve(mask.astype(float), k, mode="same")
+    # Centred slice of the full convolution; mode="same" would return
+    # `window` values when the series is shorter than the window
+    lo = (window - 1) // 2
+    num = numpy.convolve(x_filled, k, mode="full")[lo:lo + len(x)]
+    den = numpy.convolve(mask.astype(float), k, mode="full")[lo:lo + len(x)]
 
     return numpy.divide(num, den, out=numpy.full_like(num, numpy.nan), where=den > 0)
 
@@ -42,3 +45,219 @@ def zscore_nan(series: pandas.Series) -> numpy.ndarray:
         return numpy.full_like(x, numpy.nan)
 
     return (x - mu) / sd
+
+
+def regularise_panel(df: pandas.DataFrame, entity_col: str, time_col: str, freq: str = "Y") -> pandas.DataFrame:
+    """Put each entity on a regular period grid and forward-fill, in one vectorized pass.
+
+    Equivalent to ``resample(freq).ffill()`` run per entity: every period
+    from an entity's first to its last takes that entity's last row at or
+    before the period end. ``freq`` is a period alias ("Y", "Q", "M", ...).
+    Returns the remaining columns indexed by (entity, period end).
+    """
+    df = df.dropna(subset=[entity_col, time_col]).sort_values([entity_col, time_col], kind="stable")
+    codes, entities = pandas.factorize(df[entity_col], sort=True)
+    times = df[time_col]
+    stamps = times.to_numpy()
+    if numpy.any((codes[1:] == codes[:-1]) & (stamps[1:] == stamps[:-1])):
+        raise ValueError(f"duplicate {time_col} values within an entity")
+    ordinals = times.dt.to_period(freq).array.asi8
+
+    # Last row of each (entity, period); these are the rows the grid can point at
+    last = numpy.ones(len(df), dtype=bool)
+    last[:-1] = (codes[1:] != codes[:-1]) | (ordinals[1:] != ordinals[:-1])
+    rows = numpy.flatnonzero(last)
+    codes, ordinals = codes[rows], ordinals[rows]
+
+    # One contiguous segment per entity, first..last period inclusive
+    starts = numpy.flatnonzero(numpy.r_[True, codes[1:] != codes[:-1]])
+    ends = numpy.r_[starts[1:], len(rows)] - 1
+    first = ordinals[starts]
+    lengths = ordinals[ends] - first + 1
+    offsets = numpy.r_[0, numpy.cumsum(lengths)[:-1]]
+    total = int(lengths.sum())
+    grid_codes = numpy.repeat(codes[starts], lengths)
+    grid_ordinals = numpy.repeat(first - offsets, lengths) + numpy.arange(total)
+
+    # Each segment starts on an observed row, so a running max of row
+    # positions forward-fills without leaking across entities
+    segment = numpy.repeat(numpy.arange(len(starts)), ends - starts + 1)
+    source = numpy.full(total, -1, dtype=numpy.int64)
+    source[offsets[segment] + ordinals - first[segment]] = rows
+    source = numpy.maximum.accumulate(source)
+
+    labels = pandas.PeriodIndex.from_ordinals(grid_ordinals, freq=freq).to_timestamp(how="end").normalize()
+    index = pandas.MultiIndex.from_arrays(
+        [entities.take(grid_codes), labels.astype(times.dtype)], names=[entity_col, time_col]
+    )
+    out = df.drop(columns=[entity_col, time_col]).iloc[source]
+    out.index = index
+    return out
+
+
+# ----------------------------
+# Batched (segment-aware) variants
+# ----------------------------
+# Each takes one flat float array holding every group back to back, plus
+# `offsets` (group i is values[offsets[i]:offsets[i + 1]]), and returns the
+# per-group results concatenated in the same layout.
+
+def group_offsets(keys) -> numpy.ndarray:
+    """Offsets of the runs of equal, contiguous keys (e.g. a sorted index level)."""
+    keys = numpy.asarray(keys)
+    bounds = numpy.flatnonzero(keys[1:] != keys[:-1]) + 1
+    return numpy.r_[0, bounds, len(keys)] if len(keys) else numpy.zeros(1, dtype=numpy.int64)
+
+
+def _segment_ids(offsets: numpy.ndarray) -> numpy.ndarray:
+    return numpy.repeat(numpy.arange(len(offsets) - 1), numpy.diff(offsets))
+
+
+def np_growth_batched(values, offsets) -> numpy.ndarray:
+    """np_growth for every group at once; each group's first value is NaN."""
+    arr = numpy.asarray(values, dtype=float)
+    out = numpy.full_like(arr, numpy.nan)
+
+    prev = arr[:-1]
+    curr = arr[1:]
+
+    with numpy.errstate(invalid="ignore", divide="ignore"):
+        res = (curr - prev) / prev * 100.0
+    res[numpy.isclose(prev, 0.0)] = numpy.nan
+
+    out[1:] = res
+    starts = numpy.asarray(offsets[:-1])
+    out[starts[starts < len(arr)]] = numpy.nan
+    return out
+
+
+def moving_average_nan_batched(values, offsets, window: int = 3) -> numpy.ndarray:
+    """moving_average_nan for every group at once; windows never cross a group boundary."""
+    x = numpy.asarray(values, dtype=float)
+    n = len(x)
+    mask = ~numpy.isnan(x)
+    x_filled = numpy.where(mask, x, 0.0)
+    seg = _segment_ids(offsets)
+    pos = numpy.arange(n)
+
+    # Same window as the centred full-convolution slice: [i - (window - 1 - lo), i + lo]
+    lo = (window - 1) // 2
+    num = numpy.zeros(n)
+    den = numpy.zeros(n)
+    for shift in range(lo - window + 1, lo + 1):
+        src = pos + shift
+        ok = (src >= 0) & (src < n)
+        ok[ok] &= seg[src[ok]] == seg[ok]
+        num[ok] += x_filled[src[ok]]
+        den[ok] += mask[src[ok]]
+
+    return numpy.divide(num, den, out=numpy.full_like(num, numpy.nan), where=den > 0)
+
+
+def group_moments(values, offsets) -> tuple:
+    """Per-group (count, mean, M2) of the non-NaN values; M2 is the sum of squared deviations."""
+    x = numpy.asarray(values, dtype=float)
+    n_groups = len(offsets) - 1
+    mask = ~numpy.isnan(x)
+    seg = _segment_ids(offsets)
+
+    count = numpy.bincount(seg, weights=mask, minlength=n_groups)
+    with numpy.errstate(invalid="ignore", divide="ignore"):
+        mean = numpy.bincount(seg, weights=numpy.where(mask, x, 0.0), minlength=n_groups) / count
+        dev = numpy.where(mask, x - mean[seg], 0.0)
+    m2 = numpy.bincount(seg, weights=dev * dev, minlength=n_groups)
+    return count, mean, m2
+
+
+def merge_moments(a: tuple, b: tuple) -> tuple:
+    """Combine two sets of (count, mean, M2) element-wise, as if over the union of their values.
+
+    Chan et al.'s pairwise form of Welford's update; either side may be empty.
+    """
+    count_a, mean_a, m2_a = (numpy.asarray(v, dtype=float) for v in a)
+    count_b, mean_b, m2_b = (numpy.asarray(v, dtype=float) for v in b)
+    count = count_a + count_b
+    with numpy.errstate(invalid="ignore", divide="ignore"):
+        delta = mean_b - mean_a
+        mean = mean_a + delta * (count_b / count)
+        m2 = m2_a + m2_b + delta * delta * (count_a * count_b / count)
+    # An empty side has NaN mean; take the other side as is
+    mean = numpy.where(count_a == 0, mean_b, numpy.where(count_b == 0, mean_a, mean))
+    m2 = numpy.where(count_a == 0, m2_b, numpy.where(count_b == 0, m2_a, m2))
+    return count, mean, m2
+
+
+def zscore_from_moments(x, count, mean, m2) -> numpy.ndarray:
+    """(x - mean) / population sd, or all NaN where a group has no spread; arguments broadcast."""
+    with numpy.errstate(invalid="ignore", divide="ignore"):
+        sd = numpy.sqrt(m2 / count)
+        flat = ~numpy.isfinite(sd) | numpy.isclose(sd, 0.0)
+        out = (x - mean) / sd
+    return numpy.where(flat, numpy.nan, out)
+
+
+def zscore_nan_batched(values, offsets) -> numpy.ndarray:
+    """zscore_nan for every group at once; a group with no spread is all NaN."""
+    x = numpy.asarray(values, dtype=float)
+    seg = _segment_ids(offsets)
+    count, mean, m2 = group_moments(x, offsets)
+    return zscore_from_moments(x, count[seg], mean[seg], m2[seg])
+
+
+def lttb_indices(x, y, n_out: int) -> numpy.ndarray:
+    """Indices of the points Largest-Triangle-Three-Buckets keeps to draw y(x) with n_out points.
+
+    The first and last points are always kept. Each bucket in between keeps
+    the point making the largest triangle with the previous kept point and
+    the next bucket's mean. NaN points are only kept when a whole bucket is
+    NaN, so gaps in the line survive.
+    """
+    x = numpy.asarray(x, dtype=float)
+    y = numpy.asarray(y, dtype=float)
+    n = len(x)
+    if n_out >= n or n_out < 3:
+        return numpy.arange(n)
+
+    # Buckets 0..n_out-3 split points 1..n-2; the last point is its own bucket
+    edges = numpy.r_[numpy.linspace(1, n - 1, n_out - 1).astype(int), n]
+    finite = numpy.isfinite(y)
+    counts = numpy.add.reduceat(finite.astype(float), edges[:-1])
+    mean_x = numpy.add.reduceat(x, edges[:-1]) / numpy.diff(edges)
+    with numpy.errstate(invalid="ignore", divide="ignore"):
+        mean_y = numpy.add.reduceat(numpy.where(finite, y, 0.0), edges[:-1]) / counts
+    first_finite = numpy.minimum.reduceat(numpy.where(finite, numpy.arange(n), n), edges[:-1])
+
+    # Twice the triangle area is |a * ax + b * ay + c| for each point, with
+    # (cx, cy) the next bucket's mean; only the anchor (ax, ay) is sequential
+    # (point 0 is only ever the first anchor; it borrows bucket 0's terms)
+    bucket = numpy.r_[0, numpy.repeat(numpy.arange(len(edges) - 1), numpy.diff(edges))]
+    nxt = numpy.minimum(bucket + 1, len(edges) - 2)
+    cx, cy = mean_x[nxt], mean_y[nxt]
+    a, b, c = y - cy, cx - x, x * cy - cx * y
+
+    keep = numpy.empty(n_out, dtype=numpy.int64)
+    keep[0], keep[-1] = 0, n - 1
+    # Plain floats: for the usual few points per bucket a Python loop beats
+    # several small numpy calls, which are kept for wide buckets
+    al, bl, cl, fl, xl, yl = a.tolist(), b.tolist(), c.tolist(), finite.tolist(), x.tolist(), y.tolist()
+    ax, ay = xl[0], yl[0]
+    for k in range(n_out - 2):
+        lo, hi = int(edges[k]), int(edges[k + 1])
+        if not counts[k]:
+            best = lo
+        elif ay != ay or cy[lo] != cy[lo]:  # NaN anchor or next bucket all NaN
+            best = int(first_finite[k])
+        elif hi - lo > 64:
+            area = numpy.abs(a[lo:hi] * ax + b[lo:hi] * ay + c[lo:hi])
+            best = lo + int(numpy.argmax(numpy.where(finite[lo:hi], area, -1.0)))
+        else:
+            best, top = lo, -1.0
+            for i in range(lo, hi):
+                if fl[i]:
+                    area = abs(al[i] * ax + bl[i] * ay + cl[i])
+                    if area > top:
+                        best, top = i, area
+        keep[k + 1] = best
+        if fl[best]:
+            ax, ay = xl[best], yl[best]
+    return keep
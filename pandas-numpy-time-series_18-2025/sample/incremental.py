@@ -0,0 +1,195 @@
+import sys
+from pathlib import Path
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+
+import numpy
+import pandas
+from sample.helpers import (
+    group_moments, group_offsets, merge_moments, moving_average_nan_batched, regularise_panel, zscore_from_moments,
+)
+from sample.pipeline import COUNTRY_COL, GROWTH_COL, SMOOTH_WINDOWS, VALUE_COL, YEAR_COL, clean, smoothed_col
+from sample.store import PanelStore
+
+
+def _grow(arr: numpy.ndarray, capacity: int) -> numpy.ndarray:
+    out = numpy.empty(arr.shape[:-1] + (capacity,), dtype=arr.dtype)
+    out[..., :arr.shape[-1]] = arr
+    return out
+
+
+class _Segment:
+    """One entity's rows in growable buffers, plus the running moments of its values.
+
+    ``smoothed`` holds one row per window, in the panel's window order.
+    """
+
+    def __init__(self, dates, values, smoothed: numpy.ndarray, moments: tuple):
+        self.n = len(values)
+        self.dates = numpy.array(dates)
+        self.values = numpy.array(values, dtype=float)
+        self.smoothed = numpy.array(smoothed, dtype=float)
+        self.count, self.mean, self.m2 = moments
+
+    def extend(self, dates, values):
+        """Append rows, doubling the buffers when full; smoothed cells for them are left for the caller."""
+        n = self.n + len(values)
+        if n > len(self.values):
+            capacity = max(n, 2 * len(self.values))
+            self.dates = _grow(self.dates, capacity)
+            self.values = _grow(self.values, capacity)
+            self.smoothed = _grow(self.smoothed, capacity)
+        self.dates[self.n:n] = dates
+        self.values[self.n:n] = values
+        self.n = n
+
+
+class IncrementalPanel:
+    """The dashboard's per-country columns, kept up to date as new years arrive.
+
+    Holds the same data as ``preprocess`` returns, but per country, with
+    running (count, mean, M2) moments and growable buffers. ``append``
+    touches only the new rows and the few smoothed cells whose window now
+    reaches them, so its cost grows with the appended data, not the history.
+    z-scores move with every new observation, so they are derived from the
+    running moments when the frame or store is built rather than stored.
+    """
+
+    def __init__(self, windows=SMOOTH_WINDOWS):
+        self.windows = tuple(windows)
+        self._segments = {}
+
+    @classmethod
+    def from_frame(cls, df: pandas.DataFrame, windows=SMOOTH_WINDOWS) -> "IncrementalPanel":
+        """Seed from a frame as returned by ``preprocess`` (or loaded from the artifact)."""
+        panel = cls(windows)
+        codes = df.index.codes[0]
+        offsets = group_offsets(codes)
+        entities = df.index.levels[0].take(codes[offsets[:-1]])
+        dates = df.index.get_level_values(1).to_numpy()
+        values = df[VALUE_COL].to_numpy(dtype=float)
+        smoothed = numpy.array([
+            df[smoothed_col(w)].to_numpy(dtype=float) if smoothed_col(w) in df
+            else moving_average_nan_batched(values, offsets, w)
+            for w in panel.windows
+        ]).reshape(len(panel.windows), len(values))
+        count, mean, m2 = group_moments(values, offsets)
+        for i, entity in enumerate(entities):
+            rows = slice(offsets[i], offsets[i + 1])
+            panel._segments[entity] = _Segment(
+                dates[rows], values[rows], smoothed[:, rows], (count[i], mean[i], m2[i])
+            )
+        return panel
+
+    @classmethod
+    def from_raw(cls, raw: pandas.DataFrame, windows=SMOOTH_WINDOWS) -> "IncrementalPanel":
+        """Seed from long-format rows, like ``preprocess``."""
+        panel = cls(windows)
+        panel.append(raw)
+        return panel
+
+    def __len__(self) -> int:
+        return sum(seg.n for seg in self._segments.values())
+
+    def __contains__(self, entity) -> bool:
+        return entity in self._segments
+
+    def append(self, raw: pandas.DataFrame) -> int:
+        """Add long-format rows (country, year, value) and update the affected cells.
+
+        Each country's new years must come after its last stored year; gaps
+        are forward-filled from the previous value, as in ``preprocess``.
+        Unknown countries are added. Returns the number of rows added.
+        """
+        new = clean(raw)
+        if new.empty:
+            return 0
+
+        # Seed each known country with its last row, so a gap before its
+        # first new year forward-fills from it; the seed row is dropped again
+        known = [e for e in new[COUNTRY_COL].unique() if e in self._segments]
+        last = pandas.DataFrame({
+            COUNTRY_COL: known,
+            YEAR_COL: numpy.array([self._segments[e].dates[self._segments[e].n - 1] for e in known],
+                                  dtype=new[YEAR_COL].dtype),
+            VALUE_COL: numpy.array([self._segments[e].values[self._segments[e].n - 1] for e in known], dtype=float),
+        })
+        first_new = new.groupby(COUNTRY_COL)[YEAR_COL].min()
+        stale = first_new.loc[known].dt.year.to_numpy() <= last[YEAR_COL].dt.year.to_numpy()
+        if stale.any():
+            raise ValueError(f"{YEAR_COL} values not after the last stored year for: {list(last[COUNTRY_COL][stale])}")
+
+        rows = pandas.concat([last, new], ignore_index=True) if known else new
+        grid = regularise_panel(rows, COUNTRY_COL, YEAR_COL, freq="Y")
+        codes = grid.index.codes[0]
+        offsets = group_offsets(codes)
+        entities = grid.index.levels[0].take(codes[offsets[:-1]])
+        is_known = numpy.array([e in self._segments for e in entities], dtype=bool)
+        keep = numpy.ones(len(grid), dtype=bool)
+        keep[offsets[:-1][is_known]] = False
+
+        dates = grid.index.get_level_values(1).to_numpy()[keep]
+        values = grid[VALUE_COL].to_numpy(dtype=float)[keep]
+        offsets = group_offsets(codes[keep])
+
+        # Running moments: merge each country's new block into its state
+        new_moments = group_moments(values, offsets)
+        segments = [self._segments.get(e) for e in entities]
+        old_moments = tuple(
+            numpy.array([getattr(seg, name) if seg else 0.0 for seg in segments])
+            for name in ("count", "mean", "m2")
+        )
+        count, mean, m2 = merge_moments(old_moments, new_moments)
+
+        # Smoothing: a centred window of w looks (w - 1) // 2 rows ahead, so
+        # only the last few old rows change. Their windows reach no further
+        # back than the widest window, so each country's tail of that length
+        # plus its new rows is enough to recompute them
+        widest = max(self.windows, default=1)
+        reach, ahead = widest - 1, (widest - 1) // 2
+        empty = numpy.empty((len(self.windows), 0))
+        tails, firsts = [], []
+        for i, entity in enumerate(entities):
+            seg = segments[i]
+            if seg is None:
+                seg = segments[i] = self._segments[entity] = _Segment(dates[:0], values[:0], empty, (0.0, numpy.nan, 0.0))
+            prev = seg.n
+            seg.extend(dates[offsets[i]:offsets[i + 1]], values[offsets[i]:offsets[i + 1]])
+            seg.count, seg.mean, seg.m2 = count[i], mean[i], m2[i]
+            start = max(0, prev - reach)
+            tails.append(seg.values[start:seg.n])
+            firsts.append((start, max(0, prev - ahead)))
+
+        tail_offsets = numpy.r_[0, numpy.cumsum([len(t) for t in tails])]
+        flat = numpy.concatenate(tails)
+        smoothed = numpy.array([moving_average_nan_batched(flat, tail_offsets, w) for w in self.windows])
+        for i, seg in enumerate(segments):
+            start, first = firsts[i]
+            seg.smoothed[:, first:seg.n] = smoothed[:, tail_offsets[i] + first - start:tail_offsets[i + 1]]
+        return len(values)
+
+    def to_frame(self) -> pandas.DataFrame:
+        """The same frame ``preprocess`` would return for every row appended so far."""
+        entities = sorted(self._segments)
+        segments = [self._segments[e] for e in entities]
+        lengths = numpy.array([seg.n for seg in segments], dtype=numpy.int64)
+        values = numpy.concatenate([seg.values[:seg.n] for seg in segments]) if segments else numpy.empty(0)
+        index = pandas.MultiIndex.from_arrays([
+            pandas.Index(numpy.repeat(numpy.array(entities, dtype=object), lengths), dtype=object),
+            pandas.DatetimeIndex(numpy.concatenate([seg.dates[:seg.n] for seg in segments]) if segments
+                                 else numpy.empty(0, dtype="datetime64[ns]")),
+        ], names=[COUNTRY_COL, YEAR_COL])
+
+        def per_row(name):
+            return numpy.repeat(numpy.array([getattr(seg, name) for seg in segments], dtype=float), lengths)
+
+        df = pandas.DataFrame({VALUE_COL: values, GROWTH_COL: values}, index=index)
+        df["z"] = zscore_from_moments(values, per_row("count"), per_row("mean"), per_row("m2"))
+        smoothed = numpy.concatenate([seg.smoothed[:, :seg.n] for seg in segments], axis=1) if segments \
+            else numpy.empty((len(self.windows), 0))
+        for k, w in enumerate(self.windows):
+            df[smoothed_col(w)] = smoothed[k]
+        return df
+
+    def to_store(self) -> PanelStore:
+        """A PanelStore over the current rows, for the dashboard to serve."""
+        return PanelStore.from_frame(self.to_frame())
@@ -0,0 +1,69 @@
+import sys
+from pathlib import Path
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+
+import pandas
+from sample.helpers import group_offsets, moving_average_nan_batched, regularise_panel, zscore_nan_batched
+
+
+# ----------------------------
+# Config
+# ----------------------------
+VALUE_COL = "Value"
+COUNTRY_COL = "Country Name"
+YEAR_COL = "Year"
+GROWTH_COL = "GDP Growth (%)"
+# Every window the dashboard can ask for; smoothed once here, not per request
+SMOOTH_WINDOWS = range(1, 10)
+
+
+def smoothed_col(window: int) -> str:
+    return f"Smoothed Growth (%) {window}y"
+
+
+def load_long(path: Path) -> pandas.DataFrame:
+    """Read the long-format World Bank data produced by data/clean_data.py (Parquet or CSV)."""
+    path = Path(path)
+    if path.suffix != ".parquet":
+        return pandas.read_csv(path)
+    df = pandas.read_parquet(path, columns=[COUNTRY_COL, YEAR_COL, VALUE_COL])
+    # Identifiers are stored dictionary-encoded; the pipeline works on plain strings
+    df[COUNTRY_COL] = df[COUNTRY_COL].astype(object)
+    return df
+
+
+def clean(raw: pandas.DataFrame) -> pandas.DataFrame:
+    """Keep country, year and value, with numeric values and parsed years; drop rows missing either."""
+    df = raw[[COUNTRY_COL, YEAR_COL, VALUE_COL]].dropna(subset=[VALUE_COL])
+    df[VALUE_COL] = pandas.to_numeric(df[VALUE_COL], errors="coerce")
+    df = df.dropna(subset=[VALUE_COL])
+    df[YEAR_COL] = pandas.to_datetime(df[YEAR_COL], format="%Y", errors="coerce")
+    return df.dropna(subset=[YEAR_COL])
+
+
+def preprocess(raw: pandas.DataFrame) -> pandas.DataFrame:
+    """Clean, regularise to annual and add the columns the dashboard plots.
+
+    Returns a frame indexed by (country, year-end) with the raw value,
+    "GDP Growth (%)", its per-country z-score "z" and one smoothed column
+    per window in SMOOTH_WINDOWS (see smoothed_col).
+    """
+    df = clean(raw)
+
+    # Make annual and fill forward within each country (safe even if already annual)
+    df = regularise_panel(df, COUNTRY_COL, YEAR_COL, freq="Y")
+
+    # Precompute raw GDP growth (%)
+    df[GROWTH_COL] = df[VALUE_COL]
+
+    # Rows are sorted by country, so each country is one contiguous segment
+    offsets = group_offsets(df.index.codes[0])
+    growth = df[GROWTH_COL].to_numpy(dtype=float)
+
+    # Precompute per-country z-scores on raw growth (used for outliers)
+    df["z"] = zscore_nan_batched(growth, offsets)
+
+    # Precompute per-country smoothed growth over the whole history
+    for window in SMOOTH_WINDOWS:
+        df[smoothed_col(window)] = moving_average_nan_batched(growth, offsets, window)
+    return df
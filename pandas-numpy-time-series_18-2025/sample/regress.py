@@ -0,0 +1,217 @@
+import sys
+from pathlib import Path
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+
+import argparse
+import importlib
+import json
+import os
+import platform
+import tempfile
+import time
+import tracemalloc
+import numpy
+import pandas
+from sample.bench import synthetic_panel
+from sample.helpers import (
+    group_offsets, moving_average_nan, moving_average_nan_batched, np_growth, np_growth_batched, zscore_nan,
+    zscore_nan_batched,
+)
+from sample.pipeline import COUNTRY_COL, VALUE_COL, YEAR_COL, preprocess
+
+
+# ----------------------------
+# Config
+# ----------------------------
+BASELINE_PATH = Path("data/perf_baseline.json")
+# Allowed slowdown / extra peak memory before a case counts as a regression
+TIME_TOLERANCE = 0.5
+MEMORY_TOLERANCE = 0.2
+# Timing differences below this are noise, whatever the ratio
+MIN_TIME_DELTA_S = 0.002
+
+
+# ----------------------------
+# Measuring
+# ----------------------------
+def measure(fn, repeat: int) -> dict:
+    """Best wall time over ``repeat`` calls, then the peak bytes traced during one more call.
+
+    Memory is measured separately because tracing slows the call down.
+    """
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - start)
+
+    tracemalloc.start()
+    try:
+        fn()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return {"seconds": min(timings), "peak_bytes": peak}
+
+
+def helper_cases(raw: pandas.DataFrame) -> dict:
+    """The sample.helpers functions over every country's series, one call per series and batched."""
+    df = raw.sort_values([COUNTRY_COL, YEAR_COL])
+    values = df[VALUE_COL].to_numpy(dtype=float)
+    offsets = group_offsets(df[COUNTRY_COL].to_numpy())
+    series = [pandas.Series(values[a:b]) for a, b in zip(offsets[:-1], offsets[1:])]
+
+    def per_series(fn):
+        return lambda: [fn(s) for s in series]
+
+    return {
+        "np_growth": per_series(np_growth),
+        "moving_average_nan": per_series(lambda s: moving_average_nan(s, 5)),
+        "zscore_nan": per_series(zscore_nan),
+        "np_growth_batched": lambda: np_growth_batched(values, offsets),
+        "moving_average_nan_batched": lambda: moving_average_nan_batched(values, offsets, 5),
+        "zscore_nan_batched": lambda: zscore_nan_batched(values, offsets),
+    }
+
+
+def load_dashboard(raw: pandas.DataFrame, workdir: Path):
+    """Import sample.core headless against ``raw``, written to ``workdir``/data as the long CSV.
+
+    core reads its data relative to the working directory at import time,
+    so this changes into ``workdir`` for good; it is meant for a harness process.
+    """
+    data = Path(workdir) / "data"
+    data.mkdir(parents=True, exist_ok=True)
+    csv = raw.assign(**{YEAR_COL: raw[YEAR_COL].dt.year})
+    csv.to_csv(data / "long_preview.csv", index=False)
+    os.chdir(workdir)
+    sys.modules.pop("sample.core", None)
+    return importlib.import_module("sample.core")
+
+
+def chart_request(core, changed: str = "country-dropdown", **values) -> dict:
+    """Body of the POST the browser sends when an input of update_chart changes."""
+    inputs = {
+        "country-dropdown": core.countries[:5],
+        "year-range": [core.year_min, core.year_max],
+        "smooth-window": 3,
+        "smooth-toggle": ["smooth"],
+        "outlier-toggle": ["outliers"],
+    }
+    inputs.update(values)
+    return {
+        "output": "growth-graph.figure",
+        "outputs": {"id": "growth-graph", "property": "figure"},
+        "inputs": [{"id": k, "property": "value", "value": v} for k, v in inputs.items()],
+        "changedPropIds": [f"{changed}.value"],
+        "state": [],
+    }
+
+
+def chart_cases(core) -> dict:
+    """update_chart through the Flask test client: uncached, cached and a toggle Patch."""
+    client = core.server.test_client()
+
+    def post(body, clear=False):
+        def call():
+            if clear:
+                core.chart_cache.clear()
+            response = client.post("/_dash-update-component", json=body)
+            assert response.status_code == 200, response.status_code
+            return response.data
+        return call
+
+    body = chart_request(core)
+    return {
+        "update_chart": post(body, clear=True),
+        "update_chart_cached": post(body),
+        "update_chart_toggle": post(chart_request(core, changed="outlier-toggle", **{"outlier-toggle": []})),
+    }
+
+
+def run_suite(n_countries: int, n_years: int, nan_rate: float, repeat: int = 5, workdir: Path = None,
+              seed: int = 0) -> dict:
+    """Time and trace every case on one synthetic panel; returns {case: {"seconds", "peak_bytes"}}."""
+    raw = synthetic_panel(n_countries, n_years, seed=seed, nan_rate=nan_rate)
+    cases = helper_cases(raw)
+    cases["preprocess"] = lambda: preprocess(raw)
+    if workdir is not None:
+        cases.update(chart_cases(load_dashboard(raw, workdir)))
+    return {name: measure(fn, repeat) for name, fn in cases.items()}
+
+
+# ----------------------------
+# Baseline
+# ----------------------------
+def environment() -> dict:
+    return {
+        "python": platform.python_version(),
+        "numpy": numpy.__version__,
+        "pandas": pandas.__version__,
+        "machine": platform.machine(),
+        "processor": platform.processor(),
+    }
+
+
+def compare(results: dict, baseline: dict, time_tolerance: float = TIME_TOLERANCE,
+            memory_tolerance: float = MEMORY_TOLERANCE) -> list:
+    """Describe every case that got slower or used more peak memory than the baseline allows."""
+    failures = []
+    for name, now in results.items():
+        before = baseline["results"].get(name)
+        if before is None:
+            continue
+        slower = now["seconds"] - before["seconds"]
+        if now["seconds"] > before["seconds"] * (1 + time_tolerance) and slower > MIN_TIME_DELTA_S:
+            failures.append(f"{name}: {now['seconds'] * 1000:.1f} ms vs {before['seconds'] * 1000:.1f} ms baseline"
+                            f" ({now['seconds'] / before['seconds'] - 1:+.0%})")
+        if now["peak_bytes"] > before["peak_bytes"] * (1 + memory_tolerance):
+            failures.append(f"{name}: peak {now['peak_bytes'] / 2**20:.1f} MiB vs "
+                            f"{before['peak_bytes'] / 2**20:.1f} MiB baseline"
+                            f" ({now['peak_bytes'] / max(before['peak_bytes'], 1) - 1:+.0%})")
+    return failures
+
+
+# ----------------------------
+# Entrypoint
+# ----------------------------
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Time and trace the dashboard data path and compare to a baseline.")
+    parser.add_argument("--countries", type=int, default=200)
+    parser.add_argument("--years", type=int, default=60)
+    parser.add_argument("--nan-rate", type=float, default=0.1, help="share of NaN values in the synthetic panel")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--baseline", type=Path, default=BASELINE_PATH)
+    parser.add_argument("--save-baseline", action="store_true", help="overwrite the baseline with this run")
+    parser.add_argument("--time-tolerance", type=float, default=TIME_TOLERANCE)
+    parser.add_argument("--memory-tolerance", type=float, default=MEMORY_TOLERANCE)
+    args = parser.parse_args()
+
+    params = {"countries": args.countries, "years": args.years, "nan_rate": args.nan_rate, "seed": args.seed}
+    # Resolve before load_dashboard changes directory
+    baseline_path = args.baseline.resolve()
+    with tempfile.TemporaryDirectory() as workdir:
+        results = run_suite(args.countries, args.years, args.nan_rate, args.repeat, Path(workdir), args.seed)
+        os.chdir(baseline_path.parent)
+
+    print(f"{'case':>28} {'ms':>9} {'peak MiB':>9}")
+    for name, r in results.items():
+        print(f"{name:>28} {r['seconds'] * 1000:>9.2f} {r['peak_bytes'] / 2**20:>9.2f}")
+
+    if args.save_baseline or not baseline_path.exists():
+        baseline_path.write_text(json.dumps(
+            {"params": params, "environment": environment(), "results": results}, indent=2
+        ))
+        print(f"Saved baseline to {baseline_path}")
+        sys.exit(0)
+
+    baseline = json.loads(baseline_path.read_text())
+    if baseline["params"] != params:
+        sys.exit(f"Baseline was recorded with {baseline['params']}; rerun with those or --save-baseline")
+    failures = compare(results, baseline, args.time_tolerance, args.memory_tolerance)
+    for failure in failures:
+        print(f"REGRESSION {failure}")
+    if failures:
+        sys.exit(1)
+    print(f"No regressions against {baseline_path}")
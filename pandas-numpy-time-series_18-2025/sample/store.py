@@ -0,0 +1,62 @@
+import sys
+from pathlib import Path
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+
+import numpy
+import pandas
+from sample.helpers import group_offsets
+
+
+class PanelStore:
+    """Column arrays sorted by entity then date, plus an entity -> (start, stop) table.
+
+    Selecting an entity is a dict lookup and a slice; clipping it to a year
+    range is two binary searches on its dates. Column arrays are kept as
+    they come from the frame, so a memory-mapped artifact stays mapped.
+    """
+
+    def __init__(self, entities, offsets: numpy.ndarray, dates: numpy.ndarray, columns: dict):
+        self.entities = list(entities)
+        self.offsets = numpy.asarray(offsets)
+        self.dates = dates
+        self.columns = columns
+        self._position = {entity: i for i, entity in enumerate(self.entities)}
+
+    @classmethod
+    def from_frame(cls, df: pandas.DataFrame) -> "PanelStore":
+        """Build from a frame indexed by (entity, date) and sorted on that index."""
+        codes = df.index.codes[0]
+        offsets = group_offsets(codes)
+        entities = df.index.levels[0].take(codes[offsets[:-1]])
+        dates = df.index.get_level_values(1).to_numpy()
+        columns = {name: df[name].to_numpy() for name in df.columns}
+        return cls(entities, offsets, dates, columns)
+
+    def __len__(self) -> int:
+        return len(self.dates)
+
+    def __contains__(self, entity) -> bool:
+        return entity in self._position
+
+    def __getitem__(self, name: str) -> numpy.ndarray:
+        return self.columns[name]
+
+    def span(self, entity) -> slice:
+        """Rows of ``entity``; an empty slice if it is unknown."""
+        i = self._position.get(entity)
+        if i is None:
+            return slice(0, 0)
+        return slice(int(self.offsets[i]), int(self.offsets[i + 1]))
+
+    def clip(self, entity, y0: int, y1: int) -> slice:
+        """Rows of ``entity`` dated within years ``y0``..``y1`` inclusive."""
+        rows = self.span(entity)
+        dates = self.dates[rows]
+        lo, hi = numpy.searchsorted(
+            dates, numpy.array([f"{y0}-01-01", f"{y1 + 1}-01-01"], dtype=dates.dtype)
+        )
+        return slice(rows.start + int(lo), rows.start + int(hi))
+
+    def year_bounds(self) -> tuple:
+        """First and last year in the store."""
+        return pandas.Timestamp(self.dates.min()).year, pandas.Timestamp(self.dates.max()).year
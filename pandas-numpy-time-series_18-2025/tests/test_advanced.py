@@ -4,21 +4,21 @@ sys.path.append(str(Path(__file__).resolve().parents[1]))
 
 import pandas
 import numpy
-from sample.helpers import np_growth, moving_average_nan, zscore_nan
+import pytest
+from sample.helpers import np_growth, moving_average_nan, zscore_nan, regularise_panel
 
 def test_pipeline_end_to_end():
     # Simulated mini dataset
     data = pandas.DataFrame({
         "Country Name": ["Testland"] * 3,
         "Year": ["2020", "2021", "2022"],
-        "Value": [100.0, 120.0, 144.0],
+        "Value": [100.0, 120.0, 150.0],
     })
 
     # Pipeline steps
     data["Value"] = pandas.to_numeric(data["Value"], errors="coerce")
     data["Year"] = pandas.to_datetime(data["Year"], format="%Y", errors="coerce")
-    data = data.sort_values(["Country Name", "Year"]).set_index(["Country Name", "Year"])
-    data = data.groupby(level=0).resample("YE", level=1).ffill()
+    data = regularise_panel(data, "Country Name", "Year", freq="Y")
     
     # Apply transformations
     data["GDP Growth (%)"] = data.groupby(level=0)["Value"].transform(np_growth)
@@ -34,3 +34,37 @@ def test_pipeline_end_to_end():
     assert not data["GDP Growth (%)"].isna().all()
     assert not data["z"].isna().all()
     assert numpy.isclose(data.loc[("Testland", "2021-12-31"), "GDP Growth (%)"], 20.0)
+
+
+def test_regularise_panel_matches_resample_loop():
+    from sample.bench import resample_loop, synthetic_panel
+
+    data = synthetic_panel(n_entities=25, n_years=15, gap_rate=0.4, seed=3)
+    data["Code"] = data["Country Name"].str.lower()
+    data.loc[data.index[::7], "Value"] = numpy.nan
+
+    expected = resample_loop(data, "Country Name", "Year")
+    pandas.testing.assert_frame_equal(regularise_panel(data, "Country Name", "Year"), expected)
+
+
+def test_regularise_panel_takes_last_observation_in_period():
+    data = pandas.DataFrame({
+        "Country Name": ["Testland"] * 3 + ["Otherland"],
+        "Year": pandas.to_datetime(["2000-01-01", "2000-06-01", "2002-03-01", "2001-05-01"]),
+        "Value": [1.0, 2.0, 3.0, 4.0],
+    })
+    out = regularise_panel(data, "Country Name", "Year", freq="Y")
+
+    assert out.loc[("Testland", "2001-12-31"), "Value"] == 2.0
+    assert list(out.loc["Otherland"].index.year) == [2001]
+    assert len(out) == 4
+
+
+def test_regularise_panel_rejects_duplicate_periods():
+    data = pandas.DataFrame({
+        "Country Name": ["Testland"] * 2,
+        "Year": pandas.to_datetime(["2000", "2000"], format="%Y"),
+        "Value": [1.0, 2.0],
+    })
+    with pytest.raises(ValueError):
+        regularise_panel(data, "Country Name", "Year")
@@ -0,0 +1,64 @@
+import sys
+from pathlib import Path
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+
+import os
+import pandas
+import sample.artifact
+from sample.artifact import artifact_path_for, build_artifact, is_fresh, load_artifact, load_or_build, read_stamp
+from sample.pipeline import load_long, preprocess
+
+
+def write_long_csv(path):
+    pandas.DataFrame({
+        "Country Name": ["Testland"] * 3 + ["Otherland"] * 2,
+        "Country Code": ["TST"] * 3 + ["OTH"] * 2,
+        "Year": [2000, 2002, 2003, 2000, 2001],
+        "Value": [1.0, 2.0, None, 4.0, 5.0],
+    }).to_csv(path, index=False)
+    return path
+
+
+def test_artifact_matches_preprocess(tmp_path):
+    csv = write_long_csv(tmp_path / "long.csv")
+    loaded = load_or_build(csv)
+    expected = preprocess(load_long(csv))
+
+    assert artifact_path_for(csv).exists()
+    pandas.testing.assert_frame_equal(loaded, expected)
+    # Float columns are served from the mapped file, not copied
+    assert not loaded["z"].to_numpy().flags.writeable
+
+
+def test_artifact_rebuilt_only_when_source_changes(tmp_path):
+    csv = write_long_csv(tmp_path / "long.csv")
+    artifact = build_artifact(csv, tmp_path / "gdp.arrow")
+    assert is_fresh(csv, artifact)
+
+    # Touched but unchanged: the hash still matches
+    os.utime(csv, ns=(0, 0))
+    assert is_fresh(csv, artifact)
+
+    with open(csv, "a") as fh:
+        fh.write("Newland,NEW,2000,3.0\n")
+    assert not is_fresh(csv, artifact)
+
+    loaded = load_or_build(csv, artifact)
+    assert "Newland" in loaded.index.get_level_values(0)
+    pandas.testing.assert_frame_equal(load_artifact(artifact), loaded)
+
+
+def test_hash_match_restamps_artifact(tmp_path, monkeypatch):
+    csv = write_long_csv(tmp_path / "long.csv")
+    artifact = build_artifact(csv, tmp_path / "gdp.arrow")
+    expected = load_artifact(artifact)
+    os.utime(csv, ns=(0, 0))
+    assert is_fresh(csv, artifact)
+    assert read_stamp(artifact)["source_mtime_ns"] == "0"
+
+    # The next check trusts the updated size and mtime without hashing
+    def no_hash(path):
+        raise AssertionError("source was hashed again")
+    monkeypatch.setattr(sample.artifact, "file_sha256", no_hash)
+    assert is_fresh(csv, artifact)
+    pandas.testing.assert_frame_equal(load_artifact(artifact), expected)
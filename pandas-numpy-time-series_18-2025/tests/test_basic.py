@@ -2,9 +2,11 @@ import sys
 from pathlib import Path
 sys.path.append(str(Path(__file__).resolve().parents[1]))
 
+import warnings
 import numpy
 import pandas
 from sample.helpers import np_growth, moving_average_nan, zscore_nan
+from sample.helpers import group_offsets, np_growth_batched, moving_average_nan_batched, zscore_nan_batched
 
 
 def test_np_growth_normal():
@@ -35,3 +37,57 @@ def test_zscore_nan_behavior():
     result = zscore_nan(s)
     assert numpy.isnan(result[3])  # last value should stay NaN
     assert numpy.isclose(numpy.nanmean(result), 0.0, atol=1e-5)  # mean ~ 0
+
+
+def test_moving_average_shorter_than_window():
+    s = pandas.Series([1.0, 3.0])
+    result = moving_average_nan(s, window=5)
+    numpy.testing.assert_allclose(result, [2.0, 2.0])
+
+
+def ragged_groups():
+    rng = numpy.random.default_rng(7)
+    lengths = numpy.r_[1, 2, 5, rng.integers(1, 40, 60)]
+    values = rng.normal(2.0, 3.0, lengths.sum())
+    values[rng.random(len(values)) < 0.15] = numpy.nan
+    values[rng.random(len(values)) < 0.05] = 0.0
+    offsets = numpy.r_[0, numpy.cumsum(lengths)]
+    values[offsets[3]:offsets[4]] = numpy.nan   # all-NaN group
+    values[offsets[4]:offsets[5]] = 1.5         # zero-spread group
+    return values, offsets
+
+
+def per_group(fn, values, offsets, **kwargs):
+    return numpy.concatenate([
+        fn(pandas.Series(values[a:b]), **kwargs) for a, b in zip(offsets[:-1], offsets[1:])
+    ])
+
+
+def test_group_offsets():
+    offsets = group_offsets(["a", "a", "b", "c", "c", "c"])
+    numpy.testing.assert_array_equal(offsets, [0, 2, 3, 6])
+
+
+def test_batched_growth_matches_per_group():
+    values, offsets = ragged_groups()
+    expected = per_group(np_growth, values, offsets)
+    numpy.testing.assert_array_equal(np_growth_batched(values, offsets), expected)
+
+
+def test_batched_moving_average_matches_per_group():
+    values, offsets = ragged_groups()
+    for window in range(1, 10):
+        expected = per_group(moving_average_nan, values, offsets, window=window)
+        result = moving_average_nan_batched(values, offsets, window)
+        numpy.testing.assert_array_equal(numpy.isnan(result), numpy.isnan(expected))
+        numpy.testing.assert_allclose(result, expected, rtol=1e-12, atol=1e-12, equal_nan=True)
+
+
+def test_batched_zscore_matches_per_group():
+    values, offsets = ragged_groups()
+    with numpy.errstate(all="ignore"), warnings.catch_warnings():
+        warnings.simplefilter("ignore", RuntimeWarning)  # nanmean of the all-NaN group
+        expected = per_group(zscore_nan, values, offsets)
+    result = zscore_nan_batched(values, offsets)
+    numpy.testing.assert_array_equal(numpy.isnan(result), numpy.isnan(expected))
+    numpy.testing.assert_allclose(result, expected, rtol=1e-12, atol=1e-12, equal_nan=True)
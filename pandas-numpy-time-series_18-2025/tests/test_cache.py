@@ -0,0 +1,41 @@
+import sys
+from pathlib import Path
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+
+import time
+from sample.cache import ResponseCache
+
+
+def test_cache_is_shared_through_the_file(tmp_path):
+    writer = ResponseCache(tmp_path / "cache.sqlite")
+    reader = ResponseCache(tmp_path / "cache.sqlite")
+
+    writer.set("a", {"data": [1, 2, 3]})
+    assert reader.get("a") == {"data": [1, 2, 3]}
+    assert reader.get("missing") is None
+
+
+def test_cache_evicts_least_recently_read(tmp_path):
+    cache = ResponseCache(tmp_path / "cache.sqlite", max_entries=2)
+    cache.set("a", 1)
+    time.sleep(0.01)
+    cache.set("b", 2)
+    time.sleep(0.01)
+    cache.get("a")
+    time.sleep(0.01)
+    cache.set("c", 3)
+
+    assert len(cache) == 2
+    assert cache.get("b") is None
+    assert cache.get("a") == 1 and cache.get("c") == 3
+
+
+def test_cache_entries_expire(tmp_path):
+    cache = ResponseCache(tmp_path / "cache.sqlite", ttl=0.05)
+    cache.set("a", 1)
+    assert cache.get("a") == 1
+
+    time.sleep(0.1)
+    assert cache.get("a") is None
+    cache.set("b", 2)
+    assert len(cache) == 1
@@ -0,0 +1,58 @@
+import sys
+from pathlib import Path
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+
+import numpy
+import pandas
+import pyarrow.parquet
+from data.clean_data import reshape
+from sample.pipeline import load_long, preprocess
+
+
+def write_wide_csv(path, n_countries=7):
+    rng = numpy.random.default_rng(11)
+    wide = pandas.DataFrame({
+        "Country Name": [f"Country {i}" for i in range(n_countries)],
+        "Country Code": [f"C{i:02d}" for i in range(n_countries)],
+        "Indicator Name": ["GDP growth (annual %)"] * n_countries,
+    })
+    for year in range(1990, 2000):
+        values = rng.normal(2.0, 3.0, n_countries)
+        values[rng.random(n_countries) < 0.2] = numpy.nan
+        wide[str(year)] = values
+    wide.to_csv(path, index=False)
+    return wide
+
+
+def test_streaming_reshape_matches_eager_melt(tmp_path):
+    wide = write_wide_csv(tmp_path / "raw.csv")
+    n = reshape(tmp_path / "raw.csv", tmp_path / "long.parquet", chunksize=3,
+                preview=tmp_path / "preview.csv", preview_rows=8)
+
+    id_cols = ["Country Name", "Country Code", "Indicator Name"]
+    expected = wide.melt(id_vars=id_cols, var_name="Year", value_name="Value")
+    expected["Year"] = expected["Year"].astype("int16")
+    expected = expected.sort_values(["Country Name", "Year"]).reset_index(drop=True)
+
+    parquet = pyarrow.parquet.ParquetFile(tmp_path / "long.parquet")
+    result = parquet.read().to_pandas()
+    assert n == len(expected) == len(result)
+    assert parquet.num_row_groups == 3
+    assert isinstance(result["Country Name"].dtype, pandas.CategoricalDtype)
+
+    for c in id_cols:
+        result[c] = result[c].astype(object)
+    result = result.sort_values(["Country Name", "Year"]).reset_index(drop=True)
+    pandas.testing.assert_frame_equal(result, expected)
+
+    assert len(pandas.read_csv(tmp_path / "preview.csv")) == 8
+
+
+def test_dashboard_reads_parquet_like_csv(tmp_path):
+    write_wide_csv(tmp_path / "raw.csv")
+    reshape(tmp_path / "raw.csv", tmp_path / "long.parquet", chunksize=2,
+            preview=tmp_path / "long.csv", preview_rows=10_000)
+
+    pandas.testing.assert_frame_equal(
+        preprocess(load_long(tmp_path / "long.parquet")), preprocess(load_long(tmp_path / "long.csv"))
+    )
@@ -0,0 +1,70 @@
+import sys
+from pathlib import Path
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+
+import base64
+import json
+import numpy
+from sample import figures
+from sample.bench import synthetic_store
+from sample.figures import build_figure, outliers_patch, selected_rows, set_outliers, smoothing_patch
+from sample.helpers import lttb_indices
+
+
+def decode(spec):
+    return numpy.frombuffer(base64.b64decode(spec["bdata"]), dtype="<f8")
+
+
+def test_lttb_keeps_ends_and_extremes():
+    x = numpy.arange(1000.0)
+    y = numpy.sin(x / 50.0)
+    y[500] = 10.0
+    keep = lttb_indices(x, y, 100)
+
+    assert len(keep) == 100
+    assert keep[0] == 0 and keep[-1] == 999
+    assert numpy.all(numpy.diff(keep) > 0)
+    assert 500 in keep
+    numpy.testing.assert_array_equal(lttb_indices(x, y, 2000), numpy.arange(1000))
+
+
+def test_figure_layout_and_toggles():
+    store = synthetic_store(n_entities=3, n_points=40)
+    y0, y1 = store.year_bounds()
+    fig = build_figure(store, ("E00000", "E00002"), y0, y1, 5, True, False)
+    json.dumps(fig)
+
+    assert [t["type"] for t in fig["data"]] == ["scatter"] * 4
+    assert fig["data"][0]["name"] == "E00000 (smoothed)"
+    assert [t["visible"] for t in fig["data"][1::2]] == [False, False]
+    rows = store.clip("E00000", y0, y1)
+    numpy.testing.assert_array_equal(decode(fig["data"][0]["y"]), store["Smoothed Growth (%) 5y"][rows])
+
+    set_outliers(fig, True)
+    assert [t["visible"] for t in fig["data"][1::2]] == [True, True]
+    ops = outliers_patch(2, True).to_plotly_json()["operations"]
+    assert [op["location"] for op in ops] == [["data", 1, "visible"], ["data", 3, "visible"]]
+
+
+def test_smoothing_patch_matches_full_render():
+    store = synthetic_store(n_entities=2, n_points=40)
+    y0, y1 = store.year_bounds()
+    countries = tuple(store.entities)
+    raw = build_figure(store, countries, y0, y1, 3, False, False)
+
+    ops = smoothing_patch(store, selected_rows(store, countries, y0, y1), y0, y1, 3, False).to_plotly_json()["operations"]
+    patched = {(op["location"][1], op["location"][2]): op["params"]["value"] for op in ops if op["location"][0] == "data"}
+    for (i, prop), value in patched.items():
+        assert raw["data"][i][prop] == value
+    assert ("data", 0, "x") not in {tuple(op["location"]) for op in ops}
+
+
+def test_high_volume_mode_uses_webgl_and_downsamples(monkeypatch):
+    monkeypatch.setattr(figures, "DOWNSAMPLE_THRESHOLD", 100)
+    monkeypatch.setattr(figures, "DOWNSAMPLE_TARGET", 50)
+    store = synthetic_store(n_entities=2, n_points=400, freq="D")
+    y0, y1 = store.year_bounds()
+
+    fig = build_figure(store, tuple(store.entities), y0, y1, 3, False, True, high_volume=True)
+    assert {t["type"] for t in fig["data"]} == {"scattergl"}
+    assert len(decode(fig["data"][0]["y"])) == 50
@@ -0,0 +1,58 @@
+import sys
+from pathlib import Path
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+
+import numpy
+import pandas
+import pytest
+from sample.bench import synthetic_panel
+from sample.helpers import group_moments, merge_moments
+from sample.incremental import IncrementalPanel
+from sample.pipeline import preprocess
+
+
+def test_merge_moments_matches_one_pass():
+    rng = numpy.random.default_rng(2)
+    x = rng.normal(5.0, 2.0, 50)
+    x[[3, 30]] = numpy.nan
+    whole = group_moments(x, numpy.array([0, 50]))
+    merged = merge_moments(group_moments(x[:20], numpy.array([0, 20])), group_moments(x[20:], numpy.array([0, 30])))
+    numpy.testing.assert_allclose(numpy.ravel(merged), numpy.ravel(whole), rtol=1e-12)
+
+    empty = group_moments(x[:0], numpy.array([0, 0]))
+    numpy.testing.assert_allclose(numpy.ravel(merge_moments(empty, whole)), numpy.ravel(whole))
+
+
+def test_appends_match_full_preprocess():
+    raw = synthetic_panel(n_entities=15, n_years=40, seed=3)
+    raw.loc[raw.sample(frac=0.05, random_state=1).index, "Value"] = numpy.nan
+    years = raw["Year"].dt.year
+    # One entity only appears in the appended years
+    late = (raw["Country Name"] == "E00014") & (years < 1990)
+
+    panel = IncrementalPanel.from_frame(preprocess(raw[(years < 1985) & ~late]))
+    panel.append(raw[(years >= 1985) & (years < 1990) & ~late])
+    for year in range(1990, 2000):
+        panel.append(raw[years == year])
+
+    pandas.testing.assert_frame_equal(panel.to_frame(), preprocess(raw[~late]), rtol=1e-9)
+    assert len(panel) == len(panel.to_store())
+
+
+def test_gap_before_append_is_forward_filled():
+    panel = IncrementalPanel.from_raw(pandas.DataFrame({
+        "Country Name": ["Testland"] * 3, "Year": [2000, 2001, 2002], "Value": [1.0, 2.0, 3.0],
+    }))
+    added = panel.append(pandas.DataFrame({"Country Name": ["Testland"], "Year": [2005], "Value": [6.0]}))
+
+    frame = panel.to_frame()
+    assert added == 3
+    numpy.testing.assert_array_equal(frame["Value"].to_numpy(), [1.0, 2.0, 3.0, 3.0, 3.0, 6.0])
+
+
+def test_append_rejects_years_already_stored():
+    panel = IncrementalPanel.from_raw(pandas.DataFrame({
+        "Country Name": ["Testland"] * 2, "Year": [2000, 2001], "Value": [1.0, 2.0],
+    }))
+    with pytest.raises(ValueError, match="Testland"):
+        panel.append(pandas.DataFrame({"Country Name": ["Testland"], "Year": [2001], "Value": [5.0]}))
@@ -0,0 +1,35 @@
+import sys
+from pathlib import Path
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+
+from sample.regress import compare, run_suite
+
+
+def test_suite_covers_helpers_preprocess_and_chart(tmp_path, monkeypatch):
+    # load_dashboard changes directory; monkeypatch puts it back
+    monkeypatch.chdir(tmp_path)
+    results = run_suite(n_countries=6, n_years=20, nan_rate=0.2, repeat=1, workdir=tmp_path / "work")
+
+    assert {"np_growth", "moving_average_nan", "zscore_nan", "preprocess",
+            "update_chart", "update_chart_cached", "update_chart_toggle"} <= set(results)
+    for r in results.values():
+        assert r["seconds"] > 0 and r["peak_bytes"] > 0
+
+
+def test_compare_flags_slower_and_larger_cases():
+    baseline = {"results": {
+        "fast": {"seconds": 0.010, "peak_bytes": 1000},
+        "tiny": {"seconds": 0.0001, "peak_bytes": 1000},
+        "lean": {"seconds": 0.010, "peak_bytes": 1000},
+    }}
+    results = {
+        "fast": {"seconds": 0.030, "peak_bytes": 1000},
+        # 5x slower, but well within timer noise
+        "tiny": {"seconds": 0.0005, "peak_bytes": 1100},
+        "lean": {"seconds": 0.011, "peak_bytes": 2000},
+        "new": {"seconds": 1.0, "peak_bytes": 10**9},
+    }
+    failures = compare(results, baseline)
+    assert len(failures) == 2
+    assert failures[0].startswith("fast: 30.0 ms")
+    assert failures[1].startswith("lean: peak")
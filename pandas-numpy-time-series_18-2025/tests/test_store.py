@@ -0,0 +1,36 @@
+import sys
+from pathlib import Path
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+
+import numpy
+from sample.bench import synthetic_panel
+from sample.helpers import regularise_panel
+from sample.store import PanelStore
+
+
+def make_store():
+    panel = regularise_panel(synthetic_panel(n_entities=12, n_years=30, seed=5), "Country Name", "Year")
+    return panel, PanelStore.from_frame(panel)
+
+
+def test_store_clip_matches_frame_selection():
+    panel, store = make_store()
+    years = panel.index.get_level_values(1).year
+
+    for country in ["E00000", "E00007", "E00011"]:
+        for y0, y1 in [(1960, 1989), (1970, 1975), (1985, 2020), (1950, 1955)]:
+            expected = panel[(panel.index.get_level_values(0) == country) & (years >= y0) & (years <= y1)]
+            rows = store.clip(country, y0, y1)
+            numpy.testing.assert_array_equal(store.dates[rows], expected.index.get_level_values(1).to_numpy())
+            numpy.testing.assert_array_equal(store["Value"][rows], expected["Value"].to_numpy())
+
+
+def test_store_offsets_and_unknown_entity():
+    panel, store = make_store()
+
+    assert store.entities == sorted(panel.index.get_level_values(0).unique())
+    assert store.offsets[0] == 0 and store.offsets[-1] == len(store) == len(panel)
+    assert "Nowhere" not in store
+    assert store.span("Nowhere") == slice(0, 0)
+    assert store.clip("Nowhere", 1960, 2020) == slice(0, 0)
+    assert store.year_bounds() == (1960, 1989)
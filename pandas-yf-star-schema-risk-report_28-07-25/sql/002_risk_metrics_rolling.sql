@@ -0,0 +1,10 @@
+CREATE TABLE risk_metrics_rolling (
+    date TIMESTAMP,
+    ticker TEXT REFERENCES tickers(ticker),
+    "window" TEXT,
+    volatility FLOAT,
+    sharpe_ratio FLOAT,
+    downside_deviation FLOAT,
+    sortino_ratio FLOAT,
+    max_drawdown FLOAT
+);
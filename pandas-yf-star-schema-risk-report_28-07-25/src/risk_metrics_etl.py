@@ -1,48 +1,250 @@
 """
 ETL: download daily prices → compute Sharpe / Sortino → write to Postgres
+
+Besides the full-period ratios (table risk_metrics) it computes rolling
+(63/126/252-day) and expanding volatility, Sharpe, downside deviation,
+Sortino and max drawdown for every ticker at once (table risk_metrics_rolling).
+The metric functions only need numpy/pandas: yfinance, SQLAlchemy and the
+.env are loaded by the extract/load steps, so the module imports without a
+database or network and can be run on synthetic prices.
 """
 
-import yfinance as yf
-import pandas as pd
-import numpy as np
-from sqlalchemy import create_engine
-from dotenv import load_dotenv, find_dotenv
 import os
+from typing import Dict, Iterable, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+TICKERS = ["AAPL", "MSFT", "GOOGL"]
+# Full-period ratios cover PERIOD_START..END; the extra year before it
+# gives the rolling windows a full history from the start of the period
+HISTORY_START = "2022-01-01"
+PERIOD_START  = "2023-01-01"
+END           = "2024-01-01"
+
+TRADING_DAYS = 252
+WINDOWS      = (63, 126, 252)
+METRICS      = ("volatility", "sharpe_ratio", "downside_deviation", "sortino_ratio", "max_drawdown")
+EXPANDING    = "expanding"
+
 
 # ── 0. load secrets ────────────────────────────────────────────────────
-load_dotenv(find_dotenv())  # finds the .env no matter where you run
+def make_engine():
+    from dotenv import load_dotenv, find_dotenv
+    from sqlalchemy import create_engine
+
+    load_dotenv(find_dotenv())  # finds the .env no matter where you run
+    return create_engine(
+        f"postgresql+psycopg2://{os.getenv('DB_USER')}:{os.getenv('DB_PASS')}"
+        f"@{os.getenv('DB_HOST')}:{os.getenv('DB_PORT')}/{os.getenv('DB_NAME')}"
+    )
 
-engine = create_engine(
-    f"postgresql+psycopg2://{os.getenv('DB_USER')}:{os.getenv('DB_PASS')}"
-    f"@{os.getenv('DB_HOST')}:{os.getenv('DB_PORT')}/{os.getenv('DB_NAME')}"
-)
 
 # ── 1. download prices (patched) ───────────────────────────────────────
-tickers = ["AAPL", "MSFT", "GOOGL"]
+def download_prices(tickers: Sequence[str], start: str, end: str) -> pd.DataFrame:
+    """Daily close prices, one column per ticker."""
+    import yfinance as yf
+
+    # yfinance ≥ 0.2 auto-adjusts prices into the Close column
+    return (
+        yf.download(list(tickers), start=start, end=end)["Close"]
+        .rename_axis(columns="ticker")
+    )
+
+
+def synthetic_prices(n_days: int, n_tickers: int, seed: int = 0, start: str = "2015-01-01") -> pd.DataFrame:
+    """Geometric Brownian motion prices on business days, for tests and benchmarks."""
+    rng = np.random.default_rng(seed)
+    drift = rng.normal(0.08, 0.10, n_tickers) / TRADING_DAYS
+    vol = rng.uniform(0.15, 0.60, n_tickers) / np.sqrt(TRADING_DAYS)
+    log_returns = drift + vol * rng.standard_normal((n_days, n_tickers))
+    log_returns[0] = 0.0
+    prices = 100 * np.exp(np.cumsum(log_returns, axis=0))
+    return pd.DataFrame(
+        prices,
+        index=pd.bdate_range(start, periods=n_days, name="Date"),
+        columns=pd.Index([f"T{i:05d}" for i in range(n_tickers)], name="ticker"),
+    )
 
-# yfinance ≥ 0.2 auto-adjusts prices into the Close column
-data = (
-    yf.download(tickers, start="2023-01-01", end="2024-01-01")["Close"]
-    .rename_axis(columns="ticker")
-)
 
 # ── 2. risk metrics ────────────────────────────────────────────────────
-returns       = data.pct_change().dropna()
-mean_returns  = returns.mean() * 252
-volatility    = returns.std() * np.sqrt(252)
-sharpe        = mean_returns / volatility
-
-# **FIXED**: annualize downside deviation, then divide
-downside_std_daily   = returns.where(returns < 0).std()         # daily downside stdev
-downside_std_annual  = downside_std_daily * np.sqrt(252)       # annualized downside stdev
-sortino              = mean_returns / downside_std_annual      # correct Sortino
-
-metrics = pd.DataFrame({
-    "ticker":        sharpe.index,
-    "sharpe_ratio":  sharpe.values,
-    "sortino_ratio": sortino.values,
-})
+def period_risk_metrics(prices: pd.DataFrame) -> pd.DataFrame:
+    """Annualized Sharpe and Sortino per ticker over the whole of ``prices``."""
+    returns       = prices.pct_change().dropna()
+    mean_returns  = returns.mean() * TRADING_DAYS
+    volatility    = returns.std() * np.sqrt(TRADING_DAYS)
+    sharpe        = mean_returns / volatility
+
+    # **FIXED**: annualize downside deviation, then divide
+    downside_std_daily   = returns.where(returns < 0).std()              # daily downside stdev
+    downside_std_annual  = downside_std_daily * np.sqrt(TRADING_DAYS)   # annualized downside stdev
+    sortino              = mean_returns / downside_std_annual           # correct Sortino
+
+    return pd.DataFrame({
+        "ticker":        sharpe.index,
+        "sharpe_ratio":  sharpe.values,
+        "sortino_ratio": sortino.values,
+    })
+
+
+def simple_returns(prices: np.ndarray) -> np.ndarray:
+    """Daily returns of a (days, tickers) price array, aligned with it (row 0 is NaN)."""
+    returns = np.full(prices.shape, np.nan)
+    returns[1:] = prices[1:] / prices[:-1] - 1
+    return returns
+
+
+def _window_sums(x: np.ndarray, window: Optional[int]):
+    """Sum and count of the non-NaN values in each trailing window (all rows so far if None).
+
+    Differences of one cumulative sum, so the cost does not depend on the window.
+    """
+    valid = ~np.isnan(x)
+    total = np.cumsum(np.where(valid, x, 0.0), axis=0)
+    count = np.cumsum(valid, axis=0)
+    if window is not None:
+        total[window:] = total[window:] - total[:-window]
+        count[window:] = count[window:] - count[:-window]
+    return total, count
+
+
+def _window_moments(x: np.ndarray, window: Optional[int]):
+    """Mean, sample standard deviation (ddof=1) and count of each trailing window of ``x``.
+
+    Sums of squares are taken around the column means, which keeps the
+    cumulative-sum variance accurate over long histories. Std is NaN below two values.
+    """
+    valid = ~np.isnan(x)
+    centre = np.where(valid, x, 0.0).sum(axis=0) / np.maximum(valid.sum(axis=0), 1)
+    total, count = _window_sums(x - centre, window)
+    total_sq, _ = _window_sums((x - centre) ** 2, window)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        mean = centre + total / count
+        var = (total_sq - total * total / count) / (count - 1)
+    # Rounding can leave a tiny negative variance for a constant series
+    std = np.where(count >= 2, np.sqrt(np.maximum(var, 0.0)), np.nan)
+    return mean, std, count
+
+
+def rolling_max_drawdown(prices: np.ndarray, window: int) -> np.ndarray:
+    """Largest peak-to-trough fall (a positive fraction) within prices t - window .. t.
+
+    Each window of ``window + 1`` prices is split into power-of-two blocks
+    (its binary digits). (max, min, drawdown) of every block of 2**k prices
+    comes from two blocks of 2**(k-1), and two consecutive blocks A, B combine as
+    drawdown = max(drawdown A, drawdown B, 1 - min B / max A), so this takes
+    O(log window) passes over the array instead of one per day in the window.
+    NaN wherever the window holds a missing price.
+    """
+    n_days = len(prices)
+    length = window + 1
+    out = np.full(prices.shape, np.nan)
+    if n_days < length:
+        return out
+
+    n_windows = n_days - length + 1
+    hi, lo = prices, prices
+    dd = np.where(np.isnan(prices), np.nan, 0.0)
+    peak = drop = None
+    offset, size = 0, 1
+    while size <= length:
+        if length & size:
+            # Next block of the window, left to right: it starts ``offset`` prices in
+            b_hi, b_lo, b_dd = (a[offset:offset + n_windows] for a in (hi, lo, dd))
+            if peak is None:
+                peak, drop = b_hi, b_dd
+            else:
+                drop = np.maximum(np.maximum(drop, b_dd), 1 - b_lo / peak)
+                peak = np.maximum(peak, b_hi)
+            offset += size
+        if 2 * size <= length:
+            dd = np.maximum(np.maximum(dd[:-size], dd[size:]), 1 - lo[size:] / hi[:-size])
+            hi, lo = np.maximum(hi[:-size], hi[size:]), np.minimum(lo[:-size], lo[size:])
+        size *= 2
+    out[length - 1:] = drop
+    return out
+
+
+def expanding_max_drawdown(prices: np.ndarray) -> np.ndarray:
+    """Largest peak-to-trough fall so far; NaN on days without a price, as pandas cummax gives."""
+    peak = np.fmax.accumulate(prices, axis=0)
+    drawdown = np.fmax.accumulate(1 - prices / peak, axis=0)
+    drawdown[np.isnan(prices)] = np.nan
+    return drawdown
+
+
+def window_metrics(prices: np.ndarray, window: Optional[int] = None,
+                   periods_per_year: int = TRADING_DAYS) -> Dict[str, np.ndarray]:
+    """METRICS for every day and ticker of a (days, tickers) price array, as arrays of that shape.
+
+    Over the trailing ``window`` returns (rows without a full window of returns
+    are NaN), or over all returns so far when ``window`` is None. Volatility,
+    Sharpe and Sortino are annualized as in period_risk_metrics, with downside
+    deviation the standard deviation of the negative returns; at the last row the
+    expanding values equal period_risk_metrics for a gap-free history.
+    """
+    prices = np.asarray(prices, dtype=float)
+    returns = simple_returns(prices)
+    mean, std, count = _window_moments(returns, window)
+    _, downside_std, _ = _window_moments(np.where(returns < 0, returns, np.nan), window)
+    annualize = np.sqrt(periods_per_year)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        metrics = {
+            "volatility": std * annualize,
+            "sharpe_ratio": mean * periods_per_year / (std * annualize),
+            "downside_deviation": downside_std * annualize,
+            "sortino_ratio": mean * periods_per_year / (downside_std * annualize),
+            "max_drawdown": expanding_max_drawdown(prices) if window is None else rolling_max_drawdown(prices, window),
+        }
+    if window is not None:
+        incomplete = count < window
+        for name in ("volatility", "sharpe_ratio", "downside_deviation", "sortino_ratio"):
+            metrics[name][incomplete] = np.nan
+    return metrics
+
+
+def rolling_risk_metrics(prices: pd.DataFrame,
+                         windows: Iterable[Optional[int]] = (*WINDOWS, None)) -> pd.DataFrame:
+    """Long table of window_metrics: one row per date, ticker and window ("63d", ..., "expanding").
+
+    Rows where every metric is NaN (before a window fills up) are left out.
+    """
+    values = prices.to_numpy(dtype=float)
+    n_days, n_tickers = values.shape
+    # Tickers and windows as codes into categoricals instead of days × tickers strings
+    tickers = pd.Categorical.from_codes(np.tile(np.arange(n_tickers), n_days), categories=prices.columns)
+    dates = np.repeat(prices.index.to_numpy(), n_tickers)
+
+    windows = list(windows)
+    labels = [EXPANDING if window is None else f"{window}d" for window in windows]
+
+    frames = []
+    for code, window in enumerate(windows):
+        metrics = window_metrics(values, window)
+        frame = pd.DataFrame({
+            "date": dates,
+            "ticker": tickers,
+            "window": pd.Categorical.from_codes(np.full(len(dates), code), categories=labels),
+            **{name: metrics[name].ravel() for name in METRICS},
+        })
+        frames.append(frame.dropna(subset=list(METRICS), how="all"))
+    return pd.concat(frames, ignore_index=True)
+
 
 # ── 3. write to Postgres ───────────────────────────────────────────────
-metrics.to_sql("risk_metrics", engine, if_exists="replace", index=False)
-print("✅ wrote", len(metrics), "rows → risk_metrics (replace)")
+def main() -> None:
+    engine = make_engine()
+    prices = download_prices(TICKERS, HISTORY_START, END)
+
+    metrics = period_risk_metrics(prices.loc[PERIOD_START:])
+    metrics.to_sql("risk_metrics", engine, if_exists="replace", index=False)
+    print("✅ wrote", len(metrics), "rows → risk_metrics (replace)")
+
+    rolling = rolling_risk_metrics(prices)
+    rolling = rolling[rolling["date"] >= pd.Timestamp(PERIOD_START)]
+    rolling.to_sql("risk_metrics_rolling", engine, if_exists="replace", index=False, chunksize=10_000)
+    print("✅ wrote", len(rolling), "rows → risk_metrics_rolling (replace)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,5 @@
+import sys
+from pathlib import Path
+
+# Import the modules as src.<name>, the way `python -m src.<name>` runs them
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
@@ -0,0 +1,68 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.bench_risk_metrics import ALL_WINDOWS, loop_metrics
+from src.risk_metrics_etl import (METRICS, period_risk_metrics, rolling_max_drawdown,
+                                  synthetic_prices, window_metrics)
+
+
+def gappy_prices(n_days: int = 400, n_tickers: int = 5, missing: float = 0.03) -> pd.DataFrame:
+    prices = synthetic_prices(n_days, n_tickers, seed=1)
+    return prices.mask(np.random.default_rng(1).random(prices.shape) < missing)
+
+
+def brute_max_drawdown(prices: np.ndarray, window: int) -> np.ndarray:
+    out = np.full(prices.shape, np.nan)
+    for t in range(window, len(prices)):
+        for j in range(prices.shape[1]):
+            block = prices[t - window:t + 1, j]
+            if not np.isnan(block).any():
+                out[t, j] = np.max(1 - block / np.maximum.accumulate(block))
+    return out
+
+
+@pytest.mark.parametrize("window", ALL_WINDOWS)
+def test_window_metrics_match_pandas(window):
+    prices = gappy_prices()
+    got = window_metrics(prices.to_numpy(), window)
+    expected = loop_metrics(prices, window)
+    for name in METRICS:
+        np.testing.assert_allclose(got[name], expected[name], rtol=1e-7, atol=1e-12, err_msg=name)
+
+
+@pytest.mark.parametrize("window", [1, 5, 8, 63, 64])
+def test_rolling_max_drawdown_matches_brute_force(window):
+    prices = gappy_prices(n_days=200, missing=0.01).to_numpy()
+    np.testing.assert_allclose(rolling_max_drawdown(prices, window), brute_max_drawdown(prices, window))
+
+
+@pytest.mark.parametrize("window", [63, 64])
+def test_series_shorter_than_window(window):
+    prices = synthetic_prices(window, 3).to_numpy()
+    for name, values in window_metrics(prices, window).items():
+        assert np.isnan(values).all(), name
+    # One more day fills the first window
+    prices = synthetic_prices(window + 1, 3).to_numpy()
+    for name, values in window_metrics(prices, window).items():
+        assert np.isnan(values[:-1]).all(), name
+        assert not np.isnan(values[-1]).any(), name
+
+
+@pytest.mark.parametrize("window", ALL_WINDOWS)
+def test_all_nan_ticker(window):
+    prices = gappy_prices(n_days=300, n_tickers=3)
+    prices["T00001"] = np.nan
+    got = window_metrics(prices.to_numpy(), window)
+    rest = window_metrics(prices.drop(columns="T00001").to_numpy(), window)
+    for name in METRICS:
+        assert np.isnan(got[name][:, 1]).all(), name
+        np.testing.assert_array_equal(got[name][:, [0, 2]], rest[name], err_msg=name)
+
+
+def test_expanding_ends_at_period_metrics():
+    prices = synthetic_prices(300, 4)
+    last = {name: values[-1] for name, values in window_metrics(prices.to_numpy()).items()}
+    period = period_risk_metrics(prices)
+    np.testing.assert_allclose(last["sharpe_ratio"], period["sharpe_ratio"], rtol=1e-9)
+    np.testing.assert_allclose(last["sortino_ratio"], period["sortino_ratio"], rtol=1e-9)
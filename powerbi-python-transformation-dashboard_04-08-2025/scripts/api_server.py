@@ -0,0 +1,419 @@
+"""
+Serve the cleaned project portfolio over HTTP for dashboards and other consumers.
+
+- Loads the output of clean_transform.py (data/projects_clean.csv or .parquet) once and keeps it in memory
+- GET /projects returns one page of projects:
+    columns=id,name,budget          column projection (default: all columns)
+    department=HR,Finance           filters; a comma-separated list or a repeated parameter
+    status=At Risk  late=true
+    offset=0  limit=1000            pagination (limit is capped at MAX_LIMIT)
+    format=json|arrow               or "Accept: application/vnd.apache.arrow.stream" (Arrow needs pyarrow)
+- GET /meta returns the row count, column types and dataset version
+- Every response carries an ETag derived from the dataset version and the query; a matching
+  If-None-Match gets 304 Not Modified without the page being rebuilt
+- Pages are built off the event loop and the most recent ones are cached until the data changes
+- Watches the output file and reloads it once a change has settled; requests keep being
+  served from the previous data until the new load has finished
+
+Run:
+    python scripts/api_server.py \
+    --outdir data \
+    [--format parquet] [--host 127.0.0.1] [--port 8080] [--poll 2]
+
+Load test (see scripts/load_test.py):
+    python scripts/load_test.py --url http://127.0.0.1:8080 --concurrency 16 --requests 2000
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import hashlib
+import json
+from collections import OrderedDict
+from http import HTTPStatus
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import parse_qs, urlsplit
+
+import numpy as np
+import pandas as pd
+
+from clean_transform import CATEGORICAL_COLUMNS, DEFAULT_OUTDIR, DQ_MASK_DTYPE, OUTPUT_FORMATS, output_path
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8080
+DEFAULT_LIMIT = 1000
+MAX_LIMIT = 10000
+# Seconds between checks of the output file
+DEFAULT_POLL = 2.0
+# Pages kept per dataset version
+CACHE_SIZE = 256
+# Filtered row positions kept per dataset version, so paging through a filter is cheap
+SELECTION_CACHE_SIZE = 64
+# Bytes written before waiting for the client to catch up
+WRITE_CHUNK = 1 << 16
+MAX_HEADER_BYTES = 1 << 16
+
+JSON_TYPE = "application/json"
+ARROW_TYPE = "application/vnd.apache.arrow.stream"
+FILTER_COLUMNS = ("department", "status", "late")
+QUERY_PARAMS = ("columns", "offset", "limit", "format", *FILTER_COLUMNS)
+
+# Types of the cleaned columns when reading the CSV output; Parquet keeps them
+DATE_COLUMNS = ("start_date", "end_date", "last_refreshed")
+CSV_DTYPES: Dict[str, object] = {
+    "id": "string",
+    "name": "string",
+    **{c: "category" for c in (*CATEGORICAL_COLUMNS, "status", "dq_issues")},
+    "active": "boolean",
+    "late": "boolean",
+    "planned_duration_days": "Int64",
+    "days_late": "Int64",
+    "dq_mask": DQ_MASK_DTYPE,
+}
+
+class QueryError(ValueError):
+    """
+    A request parameter that cannot be served; answered with 400 Bad Request.
+    """
+
+# Dataset
+
+class Dataset:
+    """
+    The cleaned projects as loaded from one version of the output file.
+    ``version`` changes whenever the file does and is the base of every ETag.
+    """
+
+    def __init__(self, frame: pd.DataFrame, version: str, path: Path):
+        self.frame = frame
+        self.version = version
+        self.path = path
+        self.loaded_at = pd.Timestamp.now(tz="UTC")
+        self._selections: "OrderedDict[str, np.ndarray]" = OrderedDict()
+
+    @classmethod
+    def load(cls, path: Path) -> "Dataset":
+        signature = file_signature(path)
+        if path.suffix == ".parquet":
+            frame = pd.read_parquet(path)
+        else:
+            frame = pd.read_csv(path, dtype=CSV_DTYPES, parse_dates=list(DATE_COLUMNS))
+        return cls(frame, "{:x}-{:x}".format(*signature), path)
+
+    def meta(self) -> dict:
+        return {
+            "source": str(self.path),
+            "version": self.version,
+            "loaded_at": self.loaded_at.isoformat(),
+            "rows": len(self.frame),
+            "columns": {c: str(t) for c, t in self.frame.dtypes.items()},
+        }
+
+    def select(self, filters: Dict[str, List[str]]) -> np.ndarray:
+        """
+        Positions of the rows matching every filter. Categorical filters compare codes,
+        so each costs one pass over small integers whatever the number of values.
+        The positions are cached; every page of the same filters reuses them.
+        """
+        key = json.dumps(filters, sort_keys=True)
+        rows = self._selections.get(key)
+        if rows is None:
+            rows = self._select(filters)
+            self._selections[key] = rows
+            if len(self._selections) > SELECTION_CACHE_SIZE:
+                self._selections.popitem(last=False)
+        return rows
+
+    def _select(self, filters: Dict[str, List[str]]) -> np.ndarray:
+        if not filters:
+            return np.arange(len(self.frame))
+        keep = np.ones(len(self.frame), dtype=bool)
+        for column, values in filters.items():
+            s = self.frame[column]
+            if column == "late":
+                keep &= (s if values == ["true"] else ~s).to_numpy(dtype=bool, na_value=False)
+            else:
+                codes = s.cat.categories.get_indexer(values)
+                keep &= np.isin(s.cat.codes.to_numpy(), codes[codes >= 0])
+        return np.flatnonzero(keep)
+
+def file_signature(path: Path) -> Tuple[int, int]:
+    stat = path.stat()
+    return stat.st_mtime_ns, stat.st_size
+
+def _parse_bool(values: List[str]) -> bool:
+    if len(values) != 1 or values[0].lower() not in ("true", "false", "1", "0"):
+        raise QueryError("late must be true or false")
+    return values[0].lower() in ("true", "1")
+
+def _parse_int(query: Dict[str, List[str]], name: str, default: int, low: int, high: int) -> int:
+    if name not in query:
+        return default
+    try:
+        value = int(query[name][-1])
+    except ValueError:
+        raise QueryError(f"{name} must be an integer") from None
+    if not low <= value <= high:
+        raise QueryError(f"{name} must be between {low} and {high}")
+    return value
+
+def _split(values: List[str]) -> List[str]:
+    return [v for value in values for v in value.split(",") if v]
+
+# Queries
+
+class Page:
+    """
+    A parsed /projects query. ``key`` is canonical (parameter order and spelling of
+    lists do not matter), so equal queries share an ETag and a cache entry.
+    """
+
+    def __init__(self, query: Dict[str, List[str]], accept: str, columns: pd.Index):
+        unknown = sorted(set(query) - set(QUERY_PARAMS))
+        if unknown:
+            raise QueryError(f"unknown parameter(s): {', '.join(unknown)}")
+
+        self.columns = _split(query.get("columns", [])) or list(columns)
+        missing = [c for c in self.columns if c not in columns]
+        if missing:
+            raise QueryError(f"unknown column(s): {', '.join(missing)}")
+        self.filters = {c: sorted(set(_split(query[c]))) for c in FILTER_COLUMNS if c in query}
+        if "late" in self.filters:
+            self.filters["late"] = [str(_parse_bool(self.filters["late"])).lower()]
+        self.offset = _parse_int(query, "offset", 0, 0, np.iinfo(np.int64).max)
+        self.limit = _parse_int(query, "limit", DEFAULT_LIMIT, 1, MAX_LIMIT)
+
+        fmt = query.get("format", ["arrow" if ARROW_TYPE in accept else "json"])[-1]
+        if fmt not in ("json", "arrow"):
+            raise QueryError("format must be json or arrow")
+        self.format = fmt
+        self.key = json.dumps(
+            [self.columns, self.filters, self.offset, self.limit, self.format], separators=(",", ":")
+        )
+
+    def etag(self, version: str) -> str:
+        digest = hashlib.blake2b(self.key.encode(), digest_size=8).hexdigest()
+        return f'"{version}-{digest}"'
+
+    def render(self, dataset: Dataset) -> Tuple[bytes, str, Dict[str, str]]:
+        """
+        (body, content type, extra headers) of this page of ``dataset``.
+        """
+        rows = dataset.select(self.filters)
+        total = len(rows)
+        page = dataset.frame.take(rows[self.offset:self.offset + self.limit])[self.columns]
+        end = self.offset + len(page)
+        next_offset = end if end < total else None
+        headers = {"X-Total-Count": str(total)}
+        if next_offset is not None:
+            headers["X-Next-Offset"] = str(next_offset)
+
+        if self.format == "arrow":
+            return _arrow_stream(page), ARROW_TYPE, headers
+        # Splice the records in as serialised by pandas rather than round-tripping them
+        envelope = json.dumps({
+            "total": total, "offset": self.offset, "limit": self.limit,
+            "count": len(page), "next_offset": next_offset, "data": None,
+        })
+        records = page.to_json(orient="records", date_format="iso", date_unit="s")
+        body = envelope[:-len("null}")] + records + "}"
+        return body.encode(), JSON_TYPE, headers
+
+def _arrow_stream(page: pd.DataFrame) -> bytes:
+    try:
+        import pyarrow as pa
+    except ImportError:
+        raise QueryError("format=arrow needs pyarrow installed on the server") from None
+
+    table = pa.Table.from_pandas(page, preserve_index=False)
+    sink = pa.BufferOutputStream()
+    with pa.ipc.new_stream(sink, table.schema) as writer:
+        writer.write_table(table)
+    return sink.getvalue().to_pybytes()
+
+# Server
+
+class DatasetServer:
+    """
+    HTTP/1.1 server (keep-alive, GET and HEAD) over one cleaned output file.
+    Built on asyncio streams so it needs nothing beyond the pipeline's own dependencies.
+    """
+
+    def __init__(self, path: Path, poll: float = DEFAULT_POLL, cache_size: int = CACHE_SIZE):
+        self.path = path
+        self.poll = poll
+        self.cache_size = cache_size
+        self.dataset = Dataset.load(path)
+        self._cache: "OrderedDict[str, Tuple[bytes, str, Dict[str, str]]]" = OrderedDict()
+
+    async def serve(self, host: str, port: int) -> None:
+        server = await asyncio.start_server(self._handle, host, port, limit=MAX_HEADER_BYTES)
+        watcher = asyncio.create_task(self._watch())
+        print(f"Serving {len(self.dataset.frame)} projects from {self.path} on http://{host}:{port}")
+        try:
+            async with server:
+                await server.serve_forever()
+        finally:
+            watcher.cancel()
+
+    async def _watch(self) -> None:
+        """
+        Reload once the file has changed and then kept the same signature for one poll,
+        so a CSV still being written is not picked up half way. A signature that failed
+        to load is not retried until the file changes again.
+        """
+        seen = file_signature(self.path)
+        failed = None
+        while True:
+            await asyncio.sleep(self.poll)
+            try:
+                current = file_signature(self.path)
+            except FileNotFoundError:
+                continue
+            if current != seen:
+                seen = current
+                continue
+            if "{:x}-{:x}".format(*current) == self.dataset.version or current == failed:
+                continue
+            try:
+                dataset = await asyncio.to_thread(Dataset.load, self.path)
+            except Exception as exc:
+                failed = current
+                print(f"Reload of {self.path} failed, still serving version {self.dataset.version}: {exc}")
+                continue
+            self.dataset = dataset
+            self._cache.clear()
+            print(f"Reloaded {len(dataset.frame)} projects (version {dataset.version})")
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        try:
+            while True:
+                try:
+                    head = await reader.readuntil(b"\r\n\r\n")
+                except asyncio.IncompleteReadError:
+                    return
+                except asyncio.LimitOverrunError:
+                    await self._send(writer, HTTPStatus.REQUEST_HEADER_FIELDS_TOO_LARGE, keep_alive=False)
+                    return
+                lines = head.decode("latin-1").split("\r\n")
+                try:
+                    method, target, version = lines[0].split(" ")
+                except ValueError:
+                    await self._send(writer, HTTPStatus.BAD_REQUEST, keep_alive=False)
+                    return
+                headers = {}
+                for line in lines[1:]:
+                    name, _, value = line.partition(":")
+                    if name:
+                        headers[name.strip().lower()] = value.strip()
+                if "content-length" in headers:
+                    await reader.readexactly(int(headers["content-length"]))
+
+                connection = headers.get("connection", "").lower()
+                keep_alive = connection == "keep-alive" if version == "HTTP/1.0" else connection != "close"
+                await self._respond(writer, method, target, headers, keep_alive)
+                if not keep_alive:
+                    return
+        except (ConnectionError, asyncio.IncompleteReadError, ValueError):
+            return
+        finally:
+            writer.close()
+
+    async def _respond(self, writer, method: str, target: str, headers: Dict[str, str], keep_alive: bool) -> None:
+        if method not in ("GET", "HEAD"):
+            await self._send(writer, HTTPStatus.METHOD_NOT_ALLOWED, keep_alive=keep_alive, extra={"Allow": "GET, HEAD"})
+            return
+        url = urlsplit(target)
+        # Pin the version for the whole request; a reload only swaps self.dataset
+        dataset = self.dataset
+        head_only = method == "HEAD"
+
+        if url.path == "/meta":
+            etag = f'"{dataset.version}"'
+            if _not_modified(headers, etag):
+                await self._send(writer, HTTPStatus.NOT_MODIFIED, keep_alive=keep_alive, extra={"ETag": etag})
+                return
+            body = json.dumps(dataset.meta()).encode()
+            await self._send(writer, HTTPStatus.OK, body, JSON_TYPE, keep_alive, {"ETag": etag}, head_only)
+            return
+        if url.path not in ("/", "/projects"):
+            await self._send_error(writer, HTTPStatus.NOT_FOUND, f"no such path: {url.path}", keep_alive)
+            return
+
+        try:
+            page = Page(parse_qs(url.query), headers.get("accept", ""), dataset.frame.columns)
+            etag = page.etag(dataset.version)
+            extra = {"ETag": etag, "Vary": "Accept"}
+            if _not_modified(headers, etag):
+                await self._send(writer, HTTPStatus.NOT_MODIFIED, keep_alive=keep_alive, extra=extra)
+                return
+            cache_key = etag
+            cached = self._cache.get(cache_key)
+            if cached is None:
+                # Filtering and serialising are vectorised but not free; keep the loop responsive
+                cached = await asyncio.to_thread(page.render, dataset)
+                if dataset is self.dataset:
+                    self._cache[cache_key] = cached
+                    if len(self._cache) > self.cache_size:
+                        self._cache.popitem(last=False)
+            else:
+                self._cache.move_to_end(cache_key)
+        except QueryError as exc:
+            await self._send_error(writer, HTTPStatus.BAD_REQUEST, str(exc), keep_alive)
+            return
+        body, content_type, page_headers = cached
+        await self._send(writer, HTTPStatus.OK, body, content_type, keep_alive, {**extra, **page_headers}, head_only)
+
+    async def _send_error(self, writer, status: HTTPStatus, message: str, keep_alive: bool) -> None:
+        await self._send(writer, status, json.dumps({"error": message}).encode(), JSON_TYPE, keep_alive)
+
+    async def _send(self, writer, status: HTTPStatus, body: bytes = b"", content_type: Optional[str] = None,
+                    keep_alive: bool = True, extra: Optional[Dict[str, str]] = None, head_only: bool = False) -> None:
+        headers = {
+            "Content-Length": str(len(body)),
+            "Connection": "keep-alive" if keep_alive else "close",
+            # Clients may keep responses but must revalidate, so a reload shows up at once
+            "Cache-Control": "no-cache",
+        }
+        if content_type:
+            headers["Content-Type"] = content_type
+        headers.update(extra or {})
+        lines = [f"HTTP/1.1 {status.value} {status.phrase}", *(f"{k}: {v}" for k, v in headers.items())]
+        writer.write(("\r\n".join(lines) + "\r\n\r\n").encode("latin-1"))
+        if not head_only and status != HTTPStatus.NOT_MODIFIED:
+            view = memoryview(body)
+            for start in range(0, len(view), WRITE_CHUNK):
+                writer.write(view[start:start + WRITE_CHUNK])
+                await writer.drain()
+        await writer.drain()
+
+def _not_modified(headers: Dict[str, str], etag: str) -> bool:
+    wanted = headers.get("if-none-match")
+    if wanted is None:
+        return False
+    tags = [t.strip().removeprefix("W/") for t in wanted.split(",")]
+    return "*" in tags or etag in tags
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Serve the cleaned project portfolio over HTTP.")
+    parser.add_argument("--outdir", type=Path, default=DEFAULT_OUTDIR)
+    parser.add_argument("--format", choices=OUTPUT_FORMATS, default="csv",
+                        help="which clean_transform.py output to serve")
+    parser.add_argument("--host", default=DEFAULT_HOST)
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--poll", type=float, default=DEFAULT_POLL,
+                        help="seconds between checks of the output file for changes")
+    args = parser.parse_args(argv)
+
+    path = output_path(args.outdir, args.format)
+    if not path.exists():
+        parser.error(f"{path} does not exist; run clean_transform.py first")
+    try:
+        asyncio.run(DatasetServer(path, args.poll).serve(args.host, args.port))
+    except KeyboardInterrupt:
+        pass
+
+if __name__ == "__main__":
+    main()
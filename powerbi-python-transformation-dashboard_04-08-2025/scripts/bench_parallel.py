@@ -0,0 +1,89 @@
+"""
+Scaling benchmark for clean_transform.py --workers: wall time from 1 to N processes.
+
+- Uses --input, or generates --projects synthetic projects with generate_data.py into a temporary directory
+- Times the serial transform(load_projects(...)) and run_parallel(...) for each worker count
+  (best of --repeat), from reading the input to the cleaned frame; exporting is the same for both
+- Checks every parallel frame is identical to the serial one before reporting
+- Reports seconds, speedup over serial and parallel efficiency (speedup / workers)
+
+Run:
+    python scripts/bench_parallel.py \
+    --projects 1000000 \
+    [--input data/simulated_projects.json] [--format parquet] [--workers 1 2 4 8] [--repeat 3]
+"""
+
+from __future__ import annotations
+
+import argparse
+import os
+import tempfile
+import time
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+
+import pandas as pd
+
+from clean_transform import load_projects, run_parallel, transform
+from generate_data import GENERATE_FORMATS, write_projects
+
+DEFAULT_PROJECTS = 400_000
+DEFAULT_REFERENCE_DATE = pd.Timestamp("2025-08-16")
+
+def default_workers() -> List[int]:
+    """
+    1, 2, 4, ... up to and including the number of usable cores.
+    """
+    cores = len(os.sched_getaffinity(0)) if hasattr(os, "sched_getaffinity") else os.cpu_count() or 1
+    counts = [1]
+    while counts[-1] * 2 < cores:
+        counts.append(counts[-1] * 2)
+    return counts + [cores] if cores > 1 else counts
+
+def best_of(fn: Callable[[], pd.DataFrame], repeat: int):
+    """
+    (fastest wall time in seconds, result of the last call).
+    """
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        timings.append(time.perf_counter() - start)
+    return min(timings), result
+
+def bench_workers(input_path: Path, workers: List[int], repeat: int = 3,
+                  reference_date: pd.Timestamp = DEFAULT_REFERENCE_DATE) -> List[Dict[str, float]]:
+    serial_s, serial = best_of(lambda: transform(load_projects(input_path), reference_date), repeat)
+    results = []
+    for n in workers:
+        if n == 1:
+            seconds = serial_s
+        else:
+            seconds, df = best_of(lambda: run_parallel(input_path, reference_date, n), repeat)
+            pd.testing.assert_frame_equal(df, serial)
+        results.append({"workers": n, "seconds": seconds, "speedup": serial_s / seconds,
+                        "efficiency": serial_s / seconds / n})
+    return results
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Benchmark clean_transform.py --workers from 1 to N processes.")
+    parser.add_argument("--input", type=Path, default=None, help="defaults to generated data")
+    parser.add_argument("--projects", type=int, default=DEFAULT_PROJECTS, help="projects to generate")
+    parser.add_argument("--format", choices=GENERATE_FORMATS, default="json", help="format to generate")
+    parser.add_argument("--workers", type=int, nargs="+", default=None,
+                        help="worker counts to time (default: 1, 2, 4, ... up to the core count)")
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args(argv)
+
+    workers = args.workers or default_workers()
+    with tempfile.TemporaryDirectory() as tmp:
+        input_path = args.input
+        if input_path is None:
+            input_path = write_projects(Path(tmp) / f"projects.{args.format}", args.projects, args.format)
+        print(f"{input_path}, {os.cpu_count()} cores")
+        print(f"{'workers':>8} {'seconds':>9} {'speedup':>8} {'efficiency':>11}")
+        for r in bench_workers(input_path, workers, args.repeat):
+            print(f"{r['workers']:>8} {r['seconds']:>9.2f} {r['speedup']:>7.2f}x {r['efficiency']:>10.0%}")
+
+if __name__ == "__main__":
+    main()
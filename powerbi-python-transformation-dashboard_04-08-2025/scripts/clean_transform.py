@@ -1,17 +1,23 @@
 """
 Clean and transform project portfolio data for the Transformation Office Dashboard.
 
-- Loads JSON from data/ simulated_projects.json (default) with structure:  {"projects": [...]}
+- Loads JSON from data/simulated_projects.json (default) with structure:  {"projects": [...]}
+  (or a Parquet table of raw projects, e.g. from generate_data.py --format parquet)
 - Normalises to a DataFrame and applies robust, vectorised data wrangling
+- With --batch-size, streams the "projects" array instead, so memory depends on the batch size, not the file
 - Adds derived KPI feilds (over_budget, late, budget variance, days late, etc.)
-- Flags data quality issues using vectorised conditions and joins issue labels
-- Export cleaned outputs for Power BI; also exposes 'dataset' for Power BI's Python connector
+- Flags data quality issues as a bitmask (dq_mask) and decodes labels once per distinct mask
+- Keeps status, department, owner and strategic pillar as categoricals, normalised once per distinct value
+- With --incremental, only new or changed projects (by per-id content hash) get their derived fields recomputed
+- With --workers N, splits the projects into N row ranges cleaned in parallel processes (same output as serial)
+- Export cleaned outputs for Power BI as CSV or Parquet (--format); also exposes 'dataset' for Power BI's Python connector
 
 Run:
     python scripts/clean_transform.py \
-    - - input data/ simulated_projects.json \
-    - - outdir data \
-    - - reference-date 2025-08-16
+    --input data/simulated_projects.json \
+    --outdir data \
+    --reference-date 2025-08-16 \
+    [--batch-size 50000] [--format parquet] [--incremental] [--workers 4]
 
 If you embed this file's contents into Power BI via the Python Script connector, 
 Power BI will pick up the 'dataset' variable (a pandas DataFrame) as the output.
@@ -20,17 +26,27 @@ Power BI will pick up the 'dataset' variable (a pandas DataFrame) as the output.
 from __future__ import annotations
 
 import argparse
+import json
+import multiprocessing as mp
+from concurrent.futures import ProcessPoolExecutor, wait
+from multiprocessing import resource_tracker, shared_memory
 from pathlib import Path
-from typing import Dict, Iterable, Optional
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, TextIO
 
 import numpy as np
 import pandas as pd
+from pandas.api.types import union_categoricals
 
 # Configuration constants
 # These paths are relative to the project root
 # Adjust as necessary for your project structure
 DEFAULT_INPUT = Path("data/simulated_projects.json")
 DEFAULT_OUTDIR = Path("data")
+OUTPUT_STEM = "projects_clean"
+OUTPUT_FORMATS = ("csv", "parquet")
+# Characters read from the JSON file at a time when streaming
+READ_SIZE = 1 << 20
+_NUMBER_CHARS = frozenset("0123456789+-.eE")
 
 # Expected fields in the JSON "projects" objects.
 REQUIRED_COLUMNS: Dict[str, object] = {
@@ -48,9 +64,71 @@ REQUIRED_COLUMNS: Dict[str, object] = {
     "alignment_score": pd.NA,
 }
 
+# Exports use ISO 8601 dates. A fixed format also keeps parsing the same in
+# every streamed batch; inferring it from each batch's first value would not
+DATE_FORMAT = "ISO8601"
+
+# Data quality issues in bit order: an issue's code in the dq_mask column is
+# 1 << its position. Only append, so published codes keep their meaning.
+DQ_ISSUES = (
+    "Missing end date",
+    "Missing budget",
+    "Missing owner",
+    "Zero budget for active project",
+    "Negative budget",
+    "Negative actual cost",
+    "End date before start date",
+    "Invalid risk score",
+    "Invalid alignment score",
+)
+DQ_CODES: Dict[str, int] = {label: 1 << bit for bit, label in enumerate(DQ_ISSUES)}
+DQ_MASK_DTYPE = np.int16
+DQ_CODES_NAME = "dq_issue_codes.csv"
+DQ_SUMMARY_NAME = "dq_issue_summary.csv"
+
+# Incremental refresh state (see state_path); bump the version whenever
+# _compute_derived_fields or _flag_data_quality changes
+STATE_STEM = "projects_state"
+STATE_VERSION = "2"
+# Every column _compute_derived_fields and _flag_data_quality read, i.e. what
+# decides whether a project's derived fields can be reused. Other columns
+# (id, name, department, ...) are always taken from the current input
+HASHED_COLUMNS = (
+    "start_date", "end_date", "budget", "actual_cost", "status", "owner", "risk_score", "alignment_score",
+)
+# Derived fields that depend on the project alone, stored in the state file and
+# reused for unchanged projects. All are exact in CSV; the budget variances,
+# late/days_late and the decoded quality fields are recomputed for every row
+CARRIED_DTYPES: Dict[str, object] = {
+    "over_budget": "bool",
+    "active": "boolean",
+    "planned_duration_days": "Int64",
+    "dq_mask": DQ_MASK_DTYPE,
+}
+
 # Canonical status values to standardise towards
 STATUS_CATEGORIES: Iterable[str] = ("On Track", "At Risk", "Completed")
 
+# Common variants of the statuses, matched after stripping and lower-casing
+STATUS_REPLACEMENTS: Dict[str, str] = {
+    "ontrack": "on track",
+    "on_track": "on track",
+    "on-track": "on track",
+    "ontime": "on track",
+    "completed": "completed",
+    "complete": "completed",
+    "done": "completed",
+    "closed": "completed",
+    "atrisk": "at risk",
+    "at-risk": "at risk",
+    "delayed": "at risk",
+    "late": "at risk",
+}
+
+# Low-cardinality text columns, tidied once per distinct value and kept as
+# categoricals (dictionary-encoded in Parquet); status is one too
+CATEGORICAL_COLUMNS = ("department", "owner", "strategic_pillar")
+
 # Utilities
 
 def _ensure_required_columns(df: pd.DataFrame, required: Dict[str, object]) -> pd.DataFrame:
@@ -62,42 +140,37 @@ def _ensure_required_columns(df: pd.DataFrame, required: Dict[str, object]) -> p
             df[col] = default
     return df
 
+def _normalise_distinct(raw: pd.Series, normalise: Callable[[pd.Series], pd.Series],
+                        leading: Iterable[str] = ()) -> pd.Series:
+    """
+    Apply ``normalise`` (string Series -> string Series) once per distinct value of ``raw``
+    and return the result as a categorical aligned with ``raw``.
+    Categories start with ``leading``, then other results in order of first appearance;
+    values that are missing, or normalise to <NA>, are missing.
+    """
+    codes, uniques = pd.factorize(raw)
+    normalised = normalise(pd.Series(uniques, dtype="string")).astype(object)
+    found = pd.Index(normalised[normalised.notna()]).unique()
+    categories = pd.Index(list(leading), dtype=object).append(found.difference(list(leading), sort=False))
+    positions = categories.get_indexer(normalised.where(normalised.notna(), None))
+    # codes == -1 (missing) picks the appended -1
+    codes = np.append(positions, -1)[codes]
+    return pd.Series(pd.Categorical.from_codes(codes, categories=categories), index=raw.index)
+
 def _standardise_status(raw_status: pd.Series) -> pd.Series:
     """
     Standardise free-text status values into a tidy set:
     ["On Track", "At Risk", "Completed"]
     Anything unknown is left as title-cased free text (still informative).
+    Returns a categorical; each distinct raw spelling is normalised only once.
     """
 
-    s = raw_status.astype("string").str.strip().str.lower()
-
-# Normalise common variants
-    replacements = {
-        "ontrack": "on track",
-        "on_track": "on track",
-        "on-track": "on track",
-        "ontime": "on track",
-        "completed": "completed",
-        "complete": "completed",
-        "done": "completed",
-        "closed": "completed",
-        "atrisk": "at risk",
-        "at-risk": "at risk",
-        "delayed": "at risk",
-        "late": "at risk",
-    }
+    def normalise(s: pd.Series) -> pd.Series:
+        # Normalise common variants, then title case for presentation
+        return s.str.strip().str.lower().replace(STATUS_REPLACEMENTS).str.title()
 
-    s = s.replace(replacements)
-
-    # Title case for presentation
-    s = s.str.title()
-
-    # Optionally convert to category for memory & consistency
-    # Unknown statuses remain as their title-cased string (not forced into categories)
-    s_cat = pd.Categorical(s, categories=list(STATUS_CATEGORIES))
-    # Where not in categories, keep the string (so we don't lose information)
-    # We'll return a string dtype series to avoid category NA surprised in BI tools
-    return pd.Series(s, index= raw_status.index, dtype="string")
+    # Unknown statuses become extra categories after the canonical ones
+    return _normalise_distinct(raw_status, normalise, leading=STATUS_CATEGORIES)
 
 def _parse_dates(df: pd.DataFrame, cols: Iterable[str]) -> pd.DataFrame:
     """
@@ -105,16 +178,17 @@ def _parse_dates(df: pd.DataFrame, cols: Iterable[str]) -> pd.DataFrame:
     """
     for c in cols:
         if c in df.columns:
-            df[c] = pd.to_datetime(df[c], errors="coerce", utc=False)
+            df[c] = pd.to_datetime(df[c], format=DATE_FORMAT, errors="coerce", utc=False)
     return df
 
 def _to_numeric(df: pd.DataFrame, cols: Iterable[str]) -> pd.DataFrame:
     """
-    Coerce numeric columns; keep NaN for non-parsable values.
+    Coerce numeric columns to float; keep NaN for non-parsable values.
+    Always float, so a batch that happens to hold only whole numbers matches the others.
     """
     for c in cols:
         if c in df.columns:
-            df[c] = pd.to_numeric(df[c], errors="coerce")
+            df[c] = pd.to_numeric(df[c], errors="coerce").astype("float64")
     return df
 
 def _tidy_strings(df: pd.DataFrame, cols: Iterable[str]) -> pd.DataFrame:
@@ -131,6 +205,21 @@ def _tidy_strings(df: pd.DataFrame, cols: Iterable[str]) -> pd.DataFrame:
             )
     return df
 
+def _tidy_categories(df: pd.DataFrame, cols: Iterable[str]) -> pd.DataFrame:
+    """
+    _tidy_strings for low-cardinality columns: tidy each distinct value once, keep a categorical.
+    """
+    for c in cols:
+        if c in df.columns:
+            df[c] = _normalise_distinct(df[c], lambda s: s.str.strip().replace("", pd.NA))
+    return df
+
+def _not_equal(s: pd.Series, value: object) -> pd.Series:
+    """
+    s != value as nullable boolean, <NA> where s is missing (as the string dtype compares).
+    """
+    return s.ne(value).astype("boolean").mask(s.isna())
+
 def _compute_derived_fields(df: pd.DataFrame, reference_date: pd.Timestamp) -> pd.DataFrame:
     """
     Add derived KPI and helper fields using vectorised operations.
@@ -142,7 +231,28 @@ def _compute_derived_fields(df: pd.DataFrame, reference_date: pd.Timestamp) -> p
         & df["budget"].notna()
     )
 
-    # Portfolio-level financial deltas
+    df = _compute_variance_fields(df)
+
+    # Active vs completed convenience fields
+    df["active"] = _not_equal(df["status"], "Completed")
+
+    # Duration (planned) in days where start/end present
+    df["planned_duration_days"] = pd.Series(
+        np.where(
+            df["start_date"].notna() & df["end_date"].notna(),
+            (df["end_date"] - df["start_date"]).dt.days,
+            np.nan,
+        ),
+        index=df.index,
+    ).astype("Int64")  # Nullable integer type
+
+    return _compute_reference_fields(df, reference_date)
+
+def _compute_variance_fields(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Portfolio-level financial deltas. Recomputed for every row on an incremental refresh,
+    since floats read back from a CSV state would not round-trip exactly.
+    """
     df["budget_variance"] = np.where(
         df["budget"].notna() & df["actual_cost"].notna(),
         df["actual_cost"] - df["budget"],
@@ -153,35 +263,28 @@ def _compute_derived_fields(df: pd.DataFrame, reference_date: pd.Timestamp) -> p
         (df["actual_cost"] - df["budget"]) / df["budget"],
         np.nan,
     )
+    return df
 
-    # Active vs completed convenience fields
-    df["active"] = df["status"].ne("Completed")
-
+def _compute_reference_fields(df: pd.DataFrame, reference_date: pd.Timestamp) -> pd.DataFrame:
+    """
+    The fields that change with the reference date alone (late, days_late, last_refreshed).
+    Needs "active" and "end_date"; cheap enough to rerun over every row on each refresh.
+    """
     # Late if active and end date has passed
     df["late"] = (
         df["active"]
         & df["end_date"].notna()
         & df["end_date"].lt(reference_date)
         )
-    
+
     # Days late (nullable integer)
-    df["days_late"] = np.where(
-        df["late"],
+    days_late = np.where(
+        df["late"].fillna(False),
         (reference_date - df["end_date"]).dt.days,
         np.nan,
     )
     df["days_late"] = pd.Series(days_late, index=df.index).astype("Int64")  # Nullable integer type
 
-    # Duration (planned) in days where start/end present
-    df["planned_duration_days"] = pd.Series(
-        np.where(
-            df["start_date"].notna() & df["end_date"].notna(),
-            (df["end_date"] - df["start_date"]).dt.days,
-            np.nan,
-        ),
-        index=df.index,
-    ).astype("Int64")  # Nullable integer type
-
     # Last refreshed timestamp for data lineage/trust
     df["last_refreshed"] = reference_date.normalize()
 
@@ -195,9 +298,9 @@ def _flag_data_quality(df: pd.DataFrame) -> pd.DataFrame:
     end_missing = df["end_date"].isna()
     budget_missing = df["budget"].isna()
     owner_missing = df["owner"].isna()
-    zero_active = df["budget"].notna() & df["budget"].eq(0) & df["status"].ne("Completed")
+    zero_active = df["budget"].notna() & df["budget"].eq(0) & _not_equal(df["status"], "Completed")
     negative_budget = df["budget"].notna() & df["budget"].lt(0)
-    negative_actual = df["actual _cost"].notna() & df["actual_cost"].lt(0)
+    negative_actual = df["actual_cost"].notna() & df["actual_cost"].lt(0)
     end_before_start = df["start_date"].notna() & df["end_date"].notna() & (df["end_date"] < df["start_date"])
 
     # Risk/alignment score validtity (1-5 expected; if you don't track this, these will simply be Nan)
@@ -216,16 +319,582 @@ def _flag_data_quality(df: pd.DataFrame) -> pd.DataFrame:
         "Invalid alignment score": alignment_invalid,
     }
 
-    issues_df = pd.DataFrame(
-        {label: np.where(mask, label, np.nan) for label, mask in issue_conditions.items()},
-        index=df.index
-    )
+    # One bit per issue; unknown (NA) conditions are not flagged
+    mask = np.zeros(len(df), dtype=DQ_MASK_DTYPE)
+    for label, condition in issue_conditions.items():
+        hit = condition.to_numpy(dtype=bool, na_value=False)
+        mask |= np.where(hit, DQ_CODES[label], 0).astype(DQ_MASK_DTYPE)
 
-    joined = (
-        issues_df
-        .stack(dropna=True)
-        .groupby(level=0)
-        .agg("; ".join)
-    )
+    df["dq_mask"] = mask
+    return _decode_dq_fields(df)
+
+def _decode_dq_fields(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Issue count, description and flag, all read off the dq_mask column.
+    """
+    mask = df["dq_mask"].to_numpy()
+    df["dq_issue_count"] = dq_issue_counts(mask)
+    df["dq_issues"] = decode_dq_mask(mask)
+    df["has_dq_issue"] = mask != 0
+    return df
+
+def _distinct_masks(mask: np.ndarray):
+    """
+    Distinct mask values and, for every row, the position of its value among them.
+    """
+    distinct, inverse = np.unique(mask, return_inverse=True)
+    return distinct, inverse.reshape(-1)
+
+def decode_dq_mask(mask: np.ndarray) -> pd.Categorical:
+    """
+    Human-readable "; "-joined issue labels for each mask, <NA> where there are none.
+    Only the distinct masks (a few dozen at most) are decoded; rows share their labels.
+    """
+    distinct, inverse = _distinct_masks(np.asarray(mask))
+    flagged = distinct != 0
+    labels = ["; ".join(label for label in DQ_ISSUES if m & DQ_CODES[label]) for m in distinct[flagged]]
+    codes = np.where(flagged, np.cumsum(flagged) - 1, -1)
+    return pd.Categorical.from_codes(codes[inverse], categories=labels)
+
+def dq_issue_counts(mask: np.ndarray) -> np.ndarray:
+    """
+    Number of issues set in each mask.
+    """
+    distinct, inverse = _distinct_masks(np.asarray(mask))
+    return np.array([bin(int(m)).count("1") for m in distinct], dtype=np.int8)[inverse]
+
+def dq_issue_summary(mask: np.ndarray) -> pd.DataFrame:
+    """
+    Projects flagged with each issue, read straight off the bitmask.
+    """
+    mask = np.asarray(mask)
+    return pd.DataFrame({
+        "code": list(DQ_CODES.values()),
+        "issue": list(DQ_CODES),
+        "projects": [int(np.count_nonzero(mask & code)) for code in DQ_CODES.values()],
+    })
+
+# Loading
+
+def load_projects(path: Path) -> pd.DataFrame:
+    """
+    Load the whole {"projects": [...]} document and normalise it into one DataFrame.
+    A .parquet file is read as a table of raw projects instead (see generate_data.py).
+    """
+    if path.suffix == ".parquet":
+        return pd.read_parquet(path)
+    with open(path, encoding="utf-8") as fh:
+        payload = json.load(fh)
+    return pd.json_normalize(payload.get("projects", []))
+
+def _read_value(fh: TextIO, buf: str, pos: int, decoder: json.JSONDecoder):
+    """
+    Decode the JSON value starting at buf[pos], reading more of the file until it is complete.
+    Returns (value, buf, pos after the value); consumed text is only dropped when reading more.
+    """
+    while True:
+        try:
+            value, end = decoder.raw_decode(buf, pos)
+        except json.JSONDecodeError:
+            value, end = None, None
+        # A number cut by the buffer edge decodes as a shorter one: "-0." as -0 or "1e" as 1,
+        # so it only counts as complete once a character that cannot continue it follows
+        if end is not None and end < len(buf) and not (
+                isinstance(value, (int, float)) and not isinstance(value, bool) and buf[end] in _NUMBER_CHARS):
+            return value, buf, end
+        more = fh.read(READ_SIZE)
+        if not more:
+            if end is None:
+                raise ValueError("Truncated or invalid JSON in the projects file")
+            return value, buf, end
+        buf = buf[pos:] + more
+        pos = 0
+
+def _next_char(fh: TextIO, buf: str, pos: int):
+    """
+    Skip whitespace; returns (next character or "" at EOF, buf, pos of that character).
+    """
+    while True:
+        while pos < len(buf) and buf[pos].isspace():
+            pos += 1
+        if pos < len(buf):
+            return buf[pos], buf, pos
+        buf, pos = fh.read(READ_SIZE), 0
+        if not buf:
+            return "", buf, pos
+
+def iter_json_array(fh: TextIO, key: str = "projects") -> Iterator[dict]:
+    """
+    Yield the items of the top-level array ``key`` one at a time without loading the document.
+    Other top-level keys are decoded and discarded; only one item is held in memory at a time.
+    """
+    decoder = json.JSONDecoder()
+    ch, buf, pos = _next_char(fh, "", 0)
+    if ch != "{":
+        raise ValueError('Expected a JSON object like {"projects": [...]}')
+    pos += 1
+    while True:
+        ch, buf, pos = _next_char(fh, buf, pos)
+        if ch == "}":
+            return
+        if ch == ",":
+            ch, buf, pos = _next_char(fh, buf, pos + 1)
+        name, buf, pos = _read_value(fh, buf, pos, decoder)
+        ch, buf, pos = _next_char(fh, buf, pos)
+        if ch != ":":
+            raise ValueError("Invalid JSON in the projects file")
+        ch, buf, pos = _next_char(fh, buf, pos + 1)
+        if name != key:
+            _, buf, pos = _read_value(fh, buf, pos, decoder)
+            continue
+        if ch != "[":
+            raise ValueError(f'"{key}" is not an array')
+        pos += 1
+        while True:
+            ch, buf, pos = _next_char(fh, buf, pos)
+            if ch == "]":
+                pos += 1
+                break
+            if ch == ",":
+                ch, buf, pos = _next_char(fh, buf, pos + 1)
+            item, buf, pos = _read_value(fh, buf, pos, decoder)
+            yield item
+
+def iter_project_batches(path: Path, batch_size: int) -> Iterator[pd.DataFrame]:
+    """
+    Stream the "projects" array in DataFrames of at most ``batch_size`` rows.
+    A .parquet file is streamed in record batches of the same size.
+    """
+    if path.suffix == ".parquet":
+        import pyarrow.parquet as pq
+
+        for record_batch in pq.ParquetFile(path).iter_batches(batch_size):
+            yield record_batch.to_pandas()
+        return
+    batch: List[dict] = []
+    with open(path, encoding="utf-8") as fh:
+        for item in iter_json_array(fh, "projects"):
+            batch.append(item)
+            if len(batch) == batch_size:
+                yield pd.json_normalize(batch)
+                batch = []
+    if batch:
+        yield pd.json_normalize(batch)
+
+# Pipeline
+
+def transform(df: pd.DataFrame, reference_date: pd.Timestamp) -> pd.DataFrame:
+    """
+    Apply every cleaning step to a frame of raw projects. Each step works row by row,
+    so a batch of projects gives the same rows as the whole portfolio would.
+    """
+    df = _clean_columns(df)
+    df = _compute_derived_fields(df, reference_date)
+    df = _flag_data_quality(df)
+    return df
+
+def _clean_columns(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    The type and text cleanup steps, before any derived field.
+    """
+    df = _ensure_required_columns(df, REQUIRED_COLUMNS)
+    df["status"] = _standardise_status(df["status"])
+    df = _parse_dates(df, ["start_date", "end_date"])
+    df = _to_numeric(df, ["budget", "actual_cost", "risk_score", "alignment_score"])
+    df = _tidy_strings(df, ["id", "name"])
+    df = _tidy_categories(df, CATEGORICAL_COLUMNS)
+    return df
+
+def _export_dq_tables(summary: pd.DataFrame, outdir: Path) -> None:
+    """
+    Write the code -> label table (to decode dq_mask in Power BI) and the per-issue counts.
+    """
+    summary[["code", "issue"]].to_csv(outdir / DQ_CODES_NAME, index=False)
+    summary.to_csv(outdir / DQ_SUMMARY_NAME, index=False)
+
+def output_path(outdir: Path, fmt: str = "csv") -> Path:
+    return outdir / f"{OUTPUT_STEM}.{fmt}"
+
+def _arrow_schema(df: pd.DataFrame):
+    """
+    Parquet schema for cleaned frames. Categoricals become dictionary<int32, string>,
+    so batches with different numbers of categories still share one schema.
+    """
+    import pyarrow as pa
+
+    schema = pa.Schema.from_pandas(df, preserve_index=False)
+    for i, field in enumerate(schema):
+        if pa.types.is_dictionary(field.type):
+            schema = schema.set(i, field.with_type(pa.dictionary(pa.int32(), pa.string())))
+    return schema
+
+def export(df: pd.DataFrame, outdir: Path, fmt: str = "csv") -> Path:
+    """
+    Write the cleaned projects and the data quality tables to ``outdir`` for Power BI.
+    With fmt="parquet" categorical columns are stored dictionary-encoded.
+    """
+    outdir.mkdir(parents=True, exist_ok=True)
+    out = output_path(outdir, fmt)
+    if fmt == "parquet":
+        df.to_parquet(out, index=False, schema=_arrow_schema(df))
+    else:
+        df.to_csv(out, index=False)
+    _export_dq_tables(dq_issue_summary(df["dq_mask"]), outdir)
+    return out
+
+class _BatchWriter:
+    """
+    Appends cleaned batches to one output file: CSV rows, or one Parquet row group per batch.
+    Columns (and the Parquet schema) follow the first batch.
+    """
+
+    def __init__(self, out: Path, fmt: str):
+        self.out = out
+        self.fmt = fmt
+        self.columns: Optional[pd.Index] = None
+        self._parquet = None
+        self._schema = None
+
+    def write(self, df: pd.DataFrame) -> None:
+        if self.columns is None:
+            self.columns = df.columns
+        else:
+            df = df.reindex(columns=self.columns)
+        if self.fmt == "csv":
+            df.to_csv(self.out, mode="a" if self._schema else "w", header=self._schema is None, index=False)
+            self._schema = True
+            return
+
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        if self._parquet is None:
+            self._schema = _arrow_schema(df)
+            self._parquet = pq.ParquetWriter(self.out, self._schema)
+        self._parquet.write_table(pa.Table.from_pandas(df, schema=self._schema, preserve_index=False))
+
+    def close(self) -> None:
+        if self._parquet is not None:
+            self._parquet.close()
+
+def run_streaming(input_path: Path, outdir: Path, reference_date: pd.Timestamp, batch_size: int,
+                  fmt: str = "csv") -> int:
+    """
+    Clean the portfolio batch by batch, appending each batch to the output file.
+    Columns follow the first batch; keys that only appear in later batches are dropped.
+    Returns the number of projects written.
+    """
+    outdir.mkdir(parents=True, exist_ok=True)
+    writer = _BatchWriter(output_path(outdir, fmt), fmt)
+    summary = dq_issue_summary(np.zeros(0, dtype=DQ_MASK_DTYPE))
+    rows = 0
+    try:
+        for batch in iter_project_batches(input_path, batch_size):
+            clean = transform(batch, reference_date)
+            writer.write(clean)
+            summary["projects"] += dq_issue_summary(clean["dq_mask"])["projects"]
+            rows += len(clean)
+        if writer.columns is None:
+            # No projects: still leave an empty table for Power BI
+            writer.write(transform(pd.DataFrame(), reference_date))
+    finally:
+        writer.close()
+    _export_dq_tables(summary, outdir)
+    return rows
+
+# Incremental refresh
+
+def state_path(outdir: Path, fmt: str = "csv") -> Path:
+    """
+    Per-id content hashes and CARRIED_DTYPES fields from the last incremental run, in the
+    output format. The version is part of the name, so bumping STATE_VERSION (whenever the
+    derived or quality logic, HASHED_COLUMNS or CARRIED_DTYPES change) forces a full run.
+    """
+    return outdir / f"{STATE_STEM}.v{STATE_VERSION}.{fmt}"
+
+def content_hash(df: pd.DataFrame) -> np.ndarray:
+    """
+    uint64 hash per project of HASHED_COLUMNS after cleanup. Hashing cleaned values
+    makes it independent of how the input was batched.
+    """
+    return pd.util.hash_pandas_object(df[list(HASHED_COLUMNS)], index=False).to_numpy()
+
+def load_previous(outdir: Path, fmt: str):
+    """
+    (id -> content hash, id -> carried fields) from the last incremental run's state file,
+    or None if there is none. The state holds everything that is reused, so an output
+    rewritten by a normal run since then cannot leak into the refresh.
+    """
+    state_file = state_path(outdir, fmt)
+    if not state_file.exists():
+        return None
+    dtypes = {"id": "string", "content_hash": "uint64", **CARRIED_DTYPES}
+    if fmt == "parquet":
+        state = pd.read_parquet(state_file).astype(dtypes)
+    else:
+        state = pd.read_csv(state_file, dtype=dtypes)
+    state = state.set_index("id")
+    return state["content_hash"], state[list(CARRIED_DTYPES)]
+
+def transform_incremental(df: pd.DataFrame, reference_date: pd.Timestamp, previous) -> tuple:
+    """
+    transform(), but projects whose content hash matches ``previous`` (see load_previous)
+    keep their CARRIED_DTYPES fields from the last run. Only new or changed projects run
+    through _compute_derived_fields/_flag_data_quality. Budget variances, reference-date
+    fields and the decoded quality fields are recomputed for every row.
+    Returns (cleaned frame, content hashes, number of projects reused).
+    """
+    base = _clean_columns(df)
+    hashes = content_hash(base)
+    reuse = np.zeros(len(base), dtype=bool)
+    if previous is not None:
+        state, carried = previous
+        ids = base["id"]
+        # Missing ids are never in the state, so get -1 like unknown ones
+        at = state.index.get_indexer(ids)
+        reuse = (at >= 0) & (state.to_numpy()[np.maximum(at, 0)] == hashes)
+        rows = carried.index.get_indexer(ids)
+        reuse &= rows >= 0
+
+    fresh = _flag_data_quality(_compute_derived_fields(base.loc[~reuse].copy(), reference_date))
+    columns = fresh.columns
+    # Reused rows first, then fresh ones; this puts them back in input order
+    order = np.argsort(np.concatenate([np.flatnonzero(reuse), np.flatnonzero(~reuse)]), kind="stable")
+    for c, dtype in CARRIED_DTYPES.items():
+        parts = [fresh[c].astype(dtype)]
+        if reuse.any():
+            parts.insert(0, carried[c].iloc[rows[reuse]].astype(dtype))
+        base[c] = pd.Series(pd.concat(parts, ignore_index=True).array.take(order), index=base.index)
+    base = _decode_dq_fields(_compute_reference_fields(_compute_variance_fields(base), reference_date))
+    return base[columns], hashes, int(reuse.sum())
+
+def run_incremental(input_path: Path, outdir: Path, reference_date: pd.Timestamp, fmt: str = "csv",
+                    batch_size: Optional[int] = None) -> tuple:
+    """
+    Refresh the output, reusing derived fields for unchanged projects (see transform_incremental),
+    then save the new per-id hashes. Both files are replaced only once the run has finished.
+    Returns (cleaned frame or None when streaming, projects written, projects reused).
+    """
+    outdir.mkdir(parents=True, exist_ok=True)
+    previous = load_previous(outdir, fmt)
+    out = output_path(outdir, fmt)
+    tmp = out.with_name(out.name + ".tmp")
+    batches = iter_project_batches(input_path, batch_size) if batch_size else [load_projects(input_path)]
+
+    writer = _BatchWriter(tmp, fmt)
+    summary = dq_issue_summary(np.zeros(0, dtype=DQ_MASK_DTYPE))
+    states, frames = [], []
+    rows = reused = 0
+    try:
+        for batch in batches:
+            clean, hashes, n_reused = transform_incremental(batch, reference_date, previous)
+            writer.write(clean)
+            summary["projects"] += dq_issue_summary(clean["dq_mask"])["projects"]
+            states.append(pd.DataFrame({"id": clean["id"], "content_hash": hashes,
+                                        **{c: clean[c] for c in CARRIED_DTYPES}}))
+            if not batch_size:
+                frames.append(clean)
+            rows += len(clean)
+            reused += n_reused
+        if writer.columns is None:
+            writer.write(transform(pd.DataFrame(), reference_date))
+    finally:
+        writer.close()
+
+    state = (pd.concat(states, ignore_index=True) if states
+             else pd.DataFrame(columns=["id", "content_hash", *CARRIED_DTYPES]))
+    # Only ids that identify a single project can be reused next time
+    state = state.dropna(subset=["id"]).drop_duplicates("id", keep=False)
+    tmp.replace(out)
+    if fmt == "parquet":
+        state.to_parquet(state_path(outdir, fmt), index=False)
+    else:
+        state.to_csv(state_path(outdir, fmt), index=False)
+    _export_dq_tables(summary, outdir)
+    return (frames[0] if frames else None), rows, reused
+
+# Parallel execution
+
+# Records parsed by the parent. Forked workers slice their partition from here,
+# so it is inherited rather than pickled to them
+_FORKED_RECORDS: Optional[list] = None
+
+def _pool_context():
+    """
+    fork where the platform has it (workers then inherit _FORKED_RECORDS), else the default.
+    """
+    return mp.get_context("fork" if "fork" in mp.get_all_start_methods() else None)
+
+def _read_partition(input_path: Path, start: int, stop: int, records: Optional[list]) -> pd.DataFrame:
+    """
+    Raw projects of one partition: row groups ``start``..``stop`` of a Parquet input, or JSON
+    records ``start``..``stop`` (``records`` when given, else those the parent left in _FORKED_RECORDS).
+    """
+    if input_path.suffix == ".parquet":
+        import pyarrow.parquet as pq
+
+        return pq.ParquetFile(input_path).read_row_groups(range(start, stop)).to_pandas()
+    if records is None:
+        records = _FORKED_RECORDS[start:stop]
+    return pd.json_normalize(records)
+
+def _share_frame(df: pd.DataFrame) -> tuple:
+    """
+    Write ``df`` as an Arrow IPC stream into a new shared memory block; returns (name, size).
+    The reader unlinks the block (see _take_shared_frame).
+    """
+    import pyarrow as pa
+
+    table = pa.Table.from_pandas(df, preserve_index=False)
+    sizer = pa.MockOutputStream()
+    with pa.ipc.new_stream(sizer, table.schema) as writer:
+        writer.write_table(table)
+    size = sizer.size()
+    shm = shared_memory.SharedMemory(create=True, size=max(size, 1))
+    # Otherwise this process's resource tracker would unlink it before the parent reads it
+    resource_tracker.unregister(shm._name, "shared_memory")
+    try:
+        sink = pa.FixedSizeBufferWriter(pa.py_buffer(shm.buf))
+        with pa.ipc.new_stream(sink, table.schema) as writer:
+            writer.write_table(table)
+        # Release the views on shm.buf so it can be closed
+        del sink, writer
+    except BaseException:
+        shm.close()
+        shm.unlink()
+        raise
+    shm.close()
+    return shm.name, size
+
+def _take_shared_frame(name: str, size: int) -> pd.DataFrame:
+    """
+    Read back a frame written by _share_frame, then free its shared memory.
+    """
+    import pyarrow as pa
+
+    shm = shared_memory.SharedMemory(name=name)
+    try:
+        # One copy out of shm: to_pandas may keep zero-copy views of the Arrow buffers,
+        # which must not point into a block that is about to be freed
+        data = bytes(shm.buf[:size])
+    finally:
+        shm.close()
+        shm.unlink()
+    return pa.ipc.open_stream(pa.py_buffer(data)).read_all().to_pandas()
+
+def _transform_partition(input_path: Path, start: int, stop: int, records: Optional[list],
+                         reference_date: pd.Timestamp) -> tuple:
+    """
+    Worker: transform() one partition. Returns ((shared memory name, size), raw column order,
+    passthrough columns). Every column the pipeline makes has a concrete dtype; object columns
+    only come from extra JSON keys, whose values (lists, mixed types, NaN) Arrow would not
+    give back unchanged, so those few are returned as they are.
+    """
+    raw = _read_partition(input_path, start, stop, records)
+    raw_columns = list(raw.columns)
+    df = transform(raw, reference_date)
+    passthrough = {c: df.pop(c) for c in list(df.columns) if df[c].dtype == object}
+    return _share_frame(df), raw_columns, passthrough
+
+def _combine_partitions(frames: List[pd.DataFrame], raw_columns: List[List[str]],
+                        passthrough: List[Dict[str, pd.Series]]) -> pd.DataFrame:
+    """
+    Concatenate transformed partitions (in row order) into exactly what transform() gives for
+    all rows at once: raw columns in order of first appearance, then the required columns no
+    partition had, then the derived ones; categories in order of first appearance (union in
+    partition order); and the quality labels decoded over the whole frame.
+    """
+    frames = [f.assign(**extra) for f, extra in zip(frames, passthrough)]
+    raw = list(dict.fromkeys(c for columns in raw_columns for c in columns))
+    added = [c for c in REQUIRED_COLUMNS if c not in raw]
+    derived = [c for c in frames[0].columns if c not in raw and c not in REQUIRED_COLUMNS]
+    combined = {}
+    for c in raw + added + derived:
+        parts = [f[c] if c in f.columns else pd.Series(np.nan, index=f.index) for f in frames]
+        if isinstance(parts[0].dtype, pd.CategoricalDtype):
+            combined[c] = pd.Series(union_categoricals(parts))
+        else:
+            combined[c] = pd.concat(parts, ignore_index=True)
+    return _decode_dq_fields(pd.DataFrame(combined))
+
+def run_parallel(input_path: Path, reference_date: pd.Timestamp, workers: int) -> pd.DataFrame:
+    """
+    transform(load_projects(input_path)) over ``workers`` processes, one contiguous row range
+    each (whole row groups for Parquet input). Every step is per row, so partitions are
+    independent; results come back as Arrow IPC streams in shared memory, not pickles.
+    The frame is identical to a serial run, except that extra JSON keys outside
+    REQUIRED_COLUMNS get their dtype inferred per partition, as with --batch-size.
+    """
+    global _FORKED_RECORDS
+    ctx = _pool_context()
+    if input_path.suffix == ".parquet":
+        import pyarrow.parquet as pq
+
+        records, n = None, pq.ParquetFile(input_path).num_row_groups
+    else:
+        with open(input_path, encoding="utf-8") as fh:
+            records = json.load(fh).get("projects", [])
+        n = len(records)
+    bounds = np.linspace(0, n, min(workers, n) + 1).round().astype(int)
+    if len(bounds) <= 2:
+        return transform(_read_partition(input_path, 0, n, records), reference_date)
+
+    forked = ctx.get_start_method() == "fork"
+    tasks = [(input_path, a, b, None if forked else records[a:b]) for a, b in zip(bounds[:-1], bounds[1:])]
+    _FORKED_RECORDS = records if forked else None
+    try:
+        with ProcessPoolExecutor(len(tasks), mp_context=ctx) as pool:
+            futures = [pool.submit(_transform_partition, *task, reference_date) for task in tasks]
+            wait(futures)
+    finally:
+        _FORKED_RECORDS = None
+    errors = [f.exception() for f in futures if f.exception() is not None]
+    shared = [f.result() for f in futures if f.exception() is None]
+    if errors:
+        for (name, _), _, _ in shared:
+            shared_memory.SharedMemory(name=name).unlink()
+        raise errors[0]
+    frames = [_take_shared_frame(*block) for block, _, _ in shared]
+    return _combine_partitions(frames, [columns for _, columns, _ in shared], [extra for _, _, extra in shared])
+
+def main(argv: Optional[List[str]] = None) -> Optional[pd.DataFrame]:
+    parser = argparse.ArgumentParser(description="Clean and transform project portfolio data for Power BI.")
+    parser.add_argument("--input", type=Path, default=DEFAULT_INPUT)
+    parser.add_argument("--outdir", type=Path, default=DEFAULT_OUTDIR)
+    parser.add_argument("--reference-date", type=pd.Timestamp, default=None,
+                        help="date 'late' is measured against; defaults to today")
+    parser.add_argument("--batch-size", type=int, default=None,
+                        help="stream the projects array in batches of this many rows")
+    parser.add_argument("--format", choices=OUTPUT_FORMATS, default="csv",
+                        help="parquet keeps the categorical columns dictionary-encoded (needs pyarrow)")
+    parser.add_argument("--incremental", action="store_true",
+                        help="reuse derived fields of projects unchanged since the last --incremental run")
+    parser.add_argument("--workers", type=int, default=1,
+                        help="split the projects over this many processes (not with --batch-size or --incremental)")
+    args = parser.parse_args(argv)
+    if args.workers > 1 and (args.batch_size or args.incremental):
+        parser.error("--workers cannot be combined with --batch-size or --incremental")
+
+    reference_date = args.reference_date or pd.Timestamp.today().normalize()
+    if args.incremental:
+        df, rows, reused = run_incremental(args.input, args.outdir, reference_date, args.format, args.batch_size)
+        print(f"Wrote {rows} projects to {output_path(args.outdir, args.format)} "
+              f"({rows - reused} new or changed, {reused} reused)")
+        return df
+    if args.batch_size:
+        rows = run_streaming(args.input, args.outdir, reference_date, args.batch_size, args.format)
+        print(f"Wrote {rows} projects to {output_path(args.outdir, args.format)}")
+        return None
+
+    if args.workers > 1:
+        df = run_parallel(args.input, reference_date, args.workers)
+    else:
+        df = transform(load_projects(args.input), reference_date)
+    out = export(df, args.outdir, args.format)
+    print(f"Wrote {len(df)} projects to {out}")
+    print(dq_issue_summary(df["dq_mask"]).to_string(index=False))
+    return df
 
-    
\ No newline at end of file
+if __name__ == "__main__":
+    # Picked up by Power BI's Python connector (None when streaming)
+    dataset = main()
@@ -0,0 +1,247 @@
+"""
+Generate a synthetic project portfolio to exercise clean_transform.py at scale.
+
+- Writes {"projects": [...]} JSON (default) or a Parquet table of the same raw projects
+- Seeded and vectorised: projects are drawn CHUNK_SIZE at a time with NumPy and written
+  as they are made, so memory stays flat however many projects you ask for
+- Chunk i depends only on the seed and i, so the first N projects are the same for any --projects >= N
+- Injects every issue _flag_data_quality checks at a configurable rate (--defect NAME=RATE)
+- Writes a share of statuses (--messy-status) as spellings _standardise_status cleans up:
+  the STATUS_REPLACEMENTS variants plus stray case and whitespace
+- JSON also gets the noise a hand-kept file has: blank owners and "n/a" budgets;
+  Parquet keeps typed columns, so these are plain nulls there
+
+Run:
+    python scripts/generate_data.py \
+    --projects 1000000 \
+    --output data/simulated_projects.json \
+    [--format parquet] [--seed 42] [--defect missing_budget=0.05] [--messy-status 0.2]
+"""
+
+from __future__ import annotations
+
+import argparse
+from pathlib import Path
+from typing import Dict, List, Optional, TextIO
+
+import numpy as np
+import pandas as pd
+
+from clean_transform import DEFAULT_INPUT, DQ_ISSUES, STATUS_CATEGORIES, STATUS_REPLACEMENTS
+
+CHUNK_SIZE = 100_000
+DEFAULT_PROJECTS = 10_000
+DEFAULT_SEED = 42
+GENERATE_FORMATS = ("json", "parquet")
+
+DEPARTMENTS = ("Finance", "HR", "IT", "Operations", "Marketing", "Sales", "Legal", "R&D", "Procurement", "Risk")
+STRATEGIC_PILLARS = ("Growth", "Efficiency", "Customer", "Innovation", "Compliance")
+OWNERS = (
+    "Ann", "Ben", "Chloe", "Dev", "Elena", "Farid", "Grace", "Hugo", "Ines", "Jamal",
+    "Kai", "Lena", "Marco", "Nadia", "Omar", "Priya", "Quinn", "Rosa", "Sam", "Tariq",
+)
+STATUS_WEIGHTS = (0.55, 0.25, 0.20)
+START_FROM = np.datetime64("2022-01-01")
+START_SPAN_DAYS = 1200
+DURATION_DAYS = (30, 900)
+VALID_SCORES = (1, 5)
+INVALID_SCORES = np.array([-1, 0, 6, 7, 10])
+
+# Rate of each data quality issue, by a short name for the command line.
+# Budget defects (missing, zero, negative) exclude one another, so their rates must sum to 1 at most
+DEFECTS: Dict[str, str] = dict(zip(
+    (
+        "missing_end_date", "missing_budget", "missing_owner", "zero_budget_active", "negative_budget",
+        "negative_actual_cost", "end_before_start", "invalid_risk_score", "invalid_alignment_score",
+    ),
+    DQ_ISSUES,
+))
+DEFAULT_DEFECT_RATES: Dict[str, float] = {name: 0.02 for name in DEFECTS}
+DEFAULT_MESSY_STATUS = 0.1
+
+# Parquet schema of the raw projects; dates stay ISO strings as in the JSON
+RAW_SCHEMA = (
+    ("id", "string"), ("name", "string"), ("department", "string"), ("owner", "string"),
+    ("start_date", "string"), ("end_date", "string"), ("budget", "float64"), ("actual_cost", "float64"),
+    ("status", "string"), ("strategic_pillar", "string"), ("risk_score", "int64"), ("alignment_score", "int64"),
+)
+
+# Spellings
+
+def status_spellings() -> Dict[str, np.ndarray]:
+    """
+    Messy spellings of each canonical status that _standardise_status maps back to it:
+    each STATUS_REPLACEMENTS variant (and the lower-case name) in a few cases and paddings.
+    """
+    spellings = {}
+    for status in STATUS_CATEGORIES:
+        target = status.lower()
+        variants = [target, *(k for k, v in STATUS_REPLACEMENTS.items() if v == target and k != target)]
+        spellings[status] = np.array([
+            pad.format(case(v)) for v in variants
+            for case in (str.lower, str.upper, str.title) for pad in ("{}", " {}", "{}  ")
+        ])
+    return spellings
+
+# Generation
+
+def generate_chunk(start: int, size: int, seed: int, defect_rates: Dict[str, float], messy_status: float,
+                   json_noise: bool = True) -> pd.DataFrame:
+    """
+    Raw projects ``start`` .. ``start + size - 1``, drawn from a generator seeded by (seed, chunk),
+    where the chunk is ``start // CHUNK_SIZE``. Columns follow RAW_SCHEMA; with ``json_noise``
+    some missing budgets are "n/a" and some missing owners blank strings.
+    """
+    rng = np.random.default_rng([seed, start // CHUNK_SIZE])
+
+    def defect(name: str) -> np.ndarray:
+        return rng.random(size) < defect_rates[name]
+
+    numbers = np.arange(start, start + size).astype(str)
+    status = np.asarray(STATUS_CATEGORIES, dtype=object)[rng.choice(len(STATUS_CATEGORIES), size, p=STATUS_WEIGHTS)]
+
+    # Budget defects come from one draw so they never overlap
+    u = rng.random(size)
+    bounds = np.cumsum([defect_rates[n] for n in ("missing_budget", "zero_budget_active", "negative_budget")])
+    budget_missing = u < bounds[0]
+    zero_budget = (u >= bounds[0]) & (u < bounds[1])
+    negative_budget = (u >= bounds[1]) & (u < bounds[2])
+    # Never rounds to an accidental zero budget
+    budget = np.round(rng.lognormal(12.0, 0.8, size), -3).clip(1000)
+    actual = np.round(budget * rng.normal(0.9, 0.25, size).clip(0.05), -2)
+    budget[zero_budget] = 0.0
+    budget[negative_budget] *= -1
+    budget[budget_missing] = np.nan
+    actual[defect("negative_actual_cost")] *= -1
+    # A zero budget is only an issue for projects that are not completed
+    status[zero_budget & (status == "Completed")] = "On Track"
+
+    messy = rng.random(size) < messy_status
+    for canonical, spellings in status_spellings().items():
+        rows = np.flatnonzero(messy & (status == canonical))
+        status[rows] = spellings[rng.integers(len(spellings), size=len(rows))]
+
+    start_date = START_FROM + rng.integers(0, START_SPAN_DAYS, size).astype("timedelta64[D]")
+    duration = rng.integers(*DURATION_DAYS, size)
+    duration[defect("end_before_start")] *= -1
+    end_date = (start_date + duration.astype("timedelta64[D]")).astype(str).astype(object)
+    end_date[defect("missing_end_date")] = None
+
+    owner = np.asarray(OWNERS, dtype=object)[rng.integers(len(OWNERS), size=size)]
+    owner_missing = defect("missing_owner")
+    owner[owner_missing] = None
+
+    def scores(name: str) -> np.ndarray:
+        values = rng.integers(VALID_SCORES[0], VALID_SCORES[1] + 1, size)
+        invalid = defect(name)
+        values[invalid] = INVALID_SCORES[rng.integers(len(INVALID_SCORES), size=int(invalid.sum()))]
+        return values
+
+    df = pd.DataFrame({
+        "id": np.char.add("P", np.char.zfill(numbers, 7)),
+        "name": np.char.add("Project ", numbers),
+        "department": np.asarray(DEPARTMENTS)[rng.integers(len(DEPARTMENTS), size=size)],
+        "owner": owner,
+        "start_date": start_date.astype(str),
+        "end_date": end_date,
+        "budget": budget,
+        "actual_cost": actual,
+        "status": status,
+        "strategic_pillar": np.asarray(STRATEGIC_PILLARS)[rng.integers(len(STRATEGIC_PILLARS), size=size)],
+        "risk_score": scores("invalid_risk_score"),
+        "alignment_score": scores("invalid_alignment_score"),
+    })
+    if json_noise:
+        blank = owner_missing & (rng.random(size) < 0.5)
+        df.loc[blank, "owner"] = np.where(rng.random(int(blank.sum())) < 0.5, "", "  ")
+        df["budget"] = df["budget"].astype(object)
+        df.loc[budget_missing & (rng.random(size) < 0.5), "budget"] = "n/a"
+    return df
+
+def iter_chunks(n_projects: int, seed: int, defect_rates: Dict[str, float], messy_status: float,
+                json_noise: bool = True):
+    for start in range(0, n_projects, CHUNK_SIZE):
+        yield generate_chunk(start, min(CHUNK_SIZE, n_projects - start), seed, defect_rates, messy_status,
+                             json_noise)
+
+# Writing
+
+def _write_json(fh: TextIO, chunks) -> None:
+    """
+    Stream {"projects": [...]}: each chunk is serialised by pandas' JSON writer and spliced in.
+    """
+    fh.write('{"projects": [')
+    first = True
+    for chunk in chunks:
+        records = chunk.to_json(orient="records", force_ascii=False)
+        if len(records) > 2:
+            fh.write(records[1:-1] if first else "," + records[1:-1])
+            first = False
+    fh.write("]}\n")
+
+def write_projects(output: Path, n_projects: int, fmt: str = "json", seed: int = DEFAULT_SEED,
+                   defect_rates: Optional[Dict[str, float]] = None,
+                   messy_status: float = DEFAULT_MESSY_STATUS) -> Path:
+    """
+    Generate ``n_projects`` and write them to ``output`` chunk by chunk.
+    """
+    rates = {**DEFAULT_DEFECT_RATES, **(defect_rates or {})}
+    unknown = sorted(set(rates) - set(DEFECTS))
+    if unknown:
+        raise ValueError(f"Unknown defect(s): {', '.join(unknown)}; expected one of {', '.join(DEFECTS)}")
+    if rates["missing_budget"] + rates["zero_budget_active"] + rates["negative_budget"] > 1:
+        raise ValueError("missing_budget, zero_budget_active and negative_budget rates must sum to 1 at most")
+
+    output.parent.mkdir(parents=True, exist_ok=True)
+    chunks = iter_chunks(n_projects, seed, rates, messy_status, json_noise=fmt == "json")
+    if fmt == "json":
+        with open(output, "w", encoding="utf-8") as fh:
+            _write_json(fh, chunks)
+        return output
+
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    schema = pa.schema([(name, pa.string() if dtype == "string" else pa.from_numpy_dtype(np.dtype(dtype)))
+                        for name, dtype in RAW_SCHEMA])
+    with pq.ParquetWriter(output, schema) as writer:
+        for chunk in chunks:
+            writer.write_table(pa.Table.from_pandas(chunk, schema=schema, preserve_index=False))
+    return output
+
+def _parse_defect(text: str):
+    name, sep, rate = text.partition("=")
+    if not sep:
+        raise argparse.ArgumentTypeError(f"expected NAME=RATE, got {text!r}")
+    try:
+        return name.strip(), float(rate)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"rate must be a number, got {rate!r}") from None
+
+def main(argv: Optional[List[str]] = None) -> Path:
+    parser = argparse.ArgumentParser(description="Generate a synthetic project portfolio for clean_transform.py.")
+    parser.add_argument("--projects", type=int, default=DEFAULT_PROJECTS)
+    parser.add_argument("--output", type=Path, default=None,
+                        help=f"defaults to {DEFAULT_INPUT} (with a .parquet suffix for --format parquet)")
+    parser.add_argument("--format", choices=GENERATE_FORMATS, default="json")
+    parser.add_argument("--seed", type=int, default=DEFAULT_SEED)
+    parser.add_argument("--defect", type=_parse_defect, action="append", default=[], metavar="NAME=RATE",
+                        help=f"share of projects with an issue (default {DEFAULT_DEFECT_RATES['missing_budget']}); "
+                             f"NAME is one of {', '.join(DEFECTS)}")
+    parser.add_argument("--no-defects", action="store_true", help="set every defect rate to 0 first")
+    parser.add_argument("--messy-status", type=float, default=DEFAULT_MESSY_STATUS,
+                        help="share of statuses written in a non-canonical spelling")
+    args = parser.parse_args(argv)
+
+    rates = {name: 0.0 for name in DEFECTS} if args.no_defects else {}
+    rates.update(dict(args.defect))
+    output = args.output or (DEFAULT_INPUT.with_suffix(".parquet") if args.format == "parquet" else DEFAULT_INPUT)
+    try:
+        write_projects(output, args.projects, args.format, args.seed, rates, args.messy_status)
+    except ValueError as exc:
+        parser.error(str(exc))
+    print(f"Wrote {args.projects} projects to {output}")
+    return output
+
+if __name__ == "__main__":
+    main()
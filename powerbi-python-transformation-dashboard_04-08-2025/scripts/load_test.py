@@ -0,0 +1,144 @@
+"""
+Load test for api_server.py: latency percentiles and throughput under concurrent clients.
+
+- Opens --concurrency keep-alive connections and sends --requests GETs in total, cycling through --path
+- "{offset}" in a path is replaced by a random row offset per request, which defeats the page cache
+- With --conditional, repeats send the ETag last seen for that path, so you can time 304 revalidation
+- Reports p50/p90/p99/max latency overall and per path, plus requests per second
+
+Run (with the server running):
+    python scripts/load_test.py \
+    --url http://127.0.0.1:8080 \
+    --concurrency 16 --requests 2000 \
+    [--path "/projects?limit=100&offset={offset}"] [--conditional]
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import random
+import time
+from collections import defaultdict
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import urlsplit
+
+import numpy as np
+
+DEFAULT_URL = "http://127.0.0.1:8080"
+DEFAULT_PATHS = (
+    "/projects?limit=100",
+    "/projects?limit=100&offset={offset}",
+    "/projects?department=HR&late=true&columns=id,name,budget,days_late&limit=500",
+    "/projects?status=At%20Risk&format=arrow&limit=1000&offset={offset}",
+)
+PERCENTILES = (50, 90, 99)
+
+class Connection:
+    """
+    One keep-alive HTTP/1.1 connection that sends GETs and reads Content-Length bodies.
+    """
+
+    def __init__(self, host: str, port: int):
+        self.host = host
+        self.port = port
+        self.reader: Optional[asyncio.StreamReader] = None
+        self.writer: Optional[asyncio.StreamWriter] = None
+
+    async def get(self, path: str, headers: Dict[str, str]) -> Tuple[int, Dict[str, str], bytes]:
+        if self.writer is None:
+            self.reader, self.writer = await asyncio.open_connection(self.host, self.port)
+        lines = [f"GET {path} HTTP/1.1", f"Host: {self.host}:{self.port}", *(f"{k}: {v}" for k, v in headers.items())]
+        self.writer.write(("\r\n".join(lines) + "\r\n\r\n").encode("latin-1"))
+        head = (await self.reader.readuntil(b"\r\n\r\n")).decode("latin-1").split("\r\n")
+        status = int(head[0].split(" ")[1])
+        response_headers = {}
+        for line in head[1:]:
+            name, _, value = line.partition(":")
+            if name:
+                response_headers[name.strip().lower()] = value.strip()
+        body = await self.reader.readexactly(int(response_headers.get("content-length", 0)))
+        if response_headers.get("connection", "").lower() == "close":
+            self.close()
+        return status, response_headers, body
+
+    def close(self) -> None:
+        if self.writer is not None:
+            self.writer.close()
+            self.writer = None
+
+async def fetch_rows(host: str, port: int) -> int:
+    conn = Connection(host, port)
+    try:
+        status, _, body = await conn.get("/meta", {})
+    finally:
+        conn.close()
+    if status != 200:
+        raise SystemExit(f"/meta returned {status}; is api_server.py running?")
+    return json.loads(body)["rows"]
+
+async def run_load(host: str, port: int, paths: List[str], requests: int, concurrency: int,
+                   conditional: bool = False, seed: int = 0) -> Tuple[Dict[str, List[float]], Dict[int, int], float]:
+    """
+    Returns (latencies in seconds per path template, count per status code, wall seconds).
+    """
+    rows = await fetch_rows(host, port)
+    rng = random.Random(seed)
+    queue: asyncio.Queue = asyncio.Queue()
+    for i in range(requests):
+        queue.put_nowait(paths[i % len(paths)])
+    latencies: Dict[str, List[float]] = defaultdict(list)
+    statuses: Dict[int, int] = defaultdict(int)
+    etags: Dict[str, str] = {}
+
+    async def client() -> None:
+        conn = Connection(host, port)
+        try:
+            while not queue.empty():
+                template = queue.get_nowait()
+                path = template.replace("{offset}", str(rng.randrange(max(rows, 1))))
+                headers = {"If-None-Match": etags[path]} if conditional and path in etags else {}
+                start = time.perf_counter()
+                status, response_headers, _ = await conn.get(path, headers)
+                latencies[template].append(time.perf_counter() - start)
+                statuses[status] += 1
+                if "etag" in response_headers:
+                    etags[path] = response_headers["etag"]
+        finally:
+            conn.close()
+
+    start = time.perf_counter()
+    await asyncio.gather(*(client() for _ in range(concurrency)))
+    return latencies, statuses, time.perf_counter() - start
+
+def report(latencies: Dict[str, List[float]], statuses: Dict[int, int], wall: float) -> None:
+    everything = np.concatenate([np.asarray(v) for v in latencies.values()])
+    print(f"{len(everything)} requests in {wall:.2f} s ({len(everything) / wall:.0f} req/s); "
+          f"status codes: {dict(sorted(statuses.items()))}")
+    print(f"{'path':<80} {'n':>6} " + " ".join(f"{'p' + str(p) + ' ms':>9}" for p in PERCENTILES) + f" {'max ms':>9}")
+    for name, values in [("all", everything), *((k, np.asarray(v)) for k, v in latencies.items())]:
+        ms = np.percentile(values, PERCENTILES) * 1000
+        print(f"{name:<80} {len(values):>6} " + " ".join(f"{v:>9.2f}" for v in ms) + f" {values.max() * 1000:>9.2f}")
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Measure api_server.py latency under concurrent load.")
+    parser.add_argument("--url", default=DEFAULT_URL)
+    parser.add_argument("--path", action="append", dest="paths",
+                        help="path to request (repeatable); {offset} becomes a random row offset")
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--conditional", action="store_true",
+                        help="send If-None-Match with the last ETag seen for the same path")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+
+    url = urlsplit(args.url)
+    latencies, statuses, wall = asyncio.run(run_load(
+        url.hostname, url.port or 80, args.paths or list(DEFAULT_PATHS), args.requests, args.concurrency,
+        args.conditional, args.seed,
+    ))
+    report(latencies, statuses, wall)
+
+if __name__ == "__main__":
+    main()
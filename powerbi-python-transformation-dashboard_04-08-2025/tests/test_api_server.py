@@ -0,0 +1,170 @@
+import asyncio
+import json
+import os
+from urllib.parse import urlencode
+
+import pandas as pd
+import pyarrow as pa
+import pytest
+
+import api_server
+from api_server import ARROW_TYPE, DEFAULT_LIMIT, DatasetServer
+from clean_transform import export, load_projects, transform
+from generate_data import write_projects
+from load_test import Connection
+
+
+@pytest.fixture(scope="module")
+def server(tmp_path_factory):
+    tmp_path = tmp_path_factory.mktemp("api")
+    source = write_projects(tmp_path / "projects.json", 200)
+    return DatasetServer(export(transform(load_projects(source), pd.Timestamp("2025-08-16")), tmp_path / "out", "parquet"))
+
+
+def get(server, *requests):
+    """
+    Responses to ``(path, headers)`` requests, sent in turn over one keep-alive connection.
+    """
+    async def scenario():
+        listener = await asyncio.start_server(server._handle, "127.0.0.1", 0)
+        conn = Connection("127.0.0.1", listener.sockets[0].getsockname()[1])
+        try:
+            return [await conn.get(path, headers) for path, headers in requests]
+        finally:
+            conn.close()
+            listener.close()
+            await listener.wait_closed()
+
+    return asyncio.run(scenario())
+
+
+def projects(server, headers=None, **query):
+    ((status, response_headers, body),) = get(server, ("/projects?" + urlencode(query, doseq=True), headers or {}))
+    return status, response_headers, body
+
+
+def test_failed_reload_is_not_retried_until_the_file_changes(tmp_path, monkeypatch, capsys):
+    source = write_projects(tmp_path / "projects.json", 50)
+    out = export(transform(load_projects(source), pd.Timestamp("2025-08-16")), tmp_path / "out", "parquet")
+    server = DatasetServer(out, poll=0.01)
+    version = server.dataset.version
+
+    loads = []
+    real_load = api_server.Dataset.load
+
+    def counting_load(path):
+        loads.append(path)
+        return real_load(path)
+
+    monkeypatch.setattr(api_server.Dataset, "load", staticmethod(counting_load))
+
+    async def scenario():
+        watcher = asyncio.create_task(server._watch())
+        await asyncio.sleep(0.05)
+        out.write_bytes(b"not parquet")
+        await asyncio.sleep(0.3)
+        failures = len(loads)
+        # A good file again, with a different signature
+        export(transform(load_projects(source), pd.Timestamp("2025-08-17")), tmp_path / "out", "parquet")
+        stat = out.stat()
+        os.utime(out, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+        await asyncio.sleep(0.3)
+        watcher.cancel()
+        return failures
+
+    failures = asyncio.run(scenario())
+    assert failures == 1
+    assert capsys.readouterr().out.count("Reload of") == 1
+    assert len(loads) == 2 and server.dataset.version != version
+
+
+def test_column_projection(server):
+    status, headers, body = projects(server, columns="name,id")
+    page = json.loads(body)
+    assert status == 200 and headers["content-type"] == "application/json"
+    assert page["total"] == len(server.dataset.frame) and page["count"] == min(DEFAULT_LIMIT, page["total"])
+    assert list(page["data"][0]) == ["name", "id"]
+    assert [r["id"] for r in page["data"]] == server.dataset.frame["id"].tolist()
+
+
+@pytest.mark.parametrize("query", [
+    {"department": "HR,Finance"},
+    {"department": ["HR", "Finance"]},
+    {"status": "At Risk"},
+    {"late": "true"},
+    {"late": "0", "status": "On Track,Completed"},
+    {"department": "Risk,IT,Sales", "status": "On Track", "late": "true"},
+    {"department": "No Such Department"},
+])
+def test_filters(server, query):
+    frame = server.dataset.frame
+    keep = pd.Series(True, index=frame.index)
+    for column, values in query.items():
+        values = values if isinstance(values, list) else values.split(",")
+        if column == "late":
+            keep &= frame["late"].fillna(False) == (values[0] in ("true", "1"))
+        else:
+            keep &= frame[column].isin(values)
+    status, headers, body = projects(server, columns="id", **query)
+    assert status == 200
+    assert int(headers["x-total-count"]) == keep.sum()
+    assert [r["id"] for r in json.loads(body)["data"]] == frame.loc[keep, "id"].tolist()
+
+
+def test_offset_and_limit_follow_next_offset(server):
+    ids, offset, pages = [], 0, 0
+    while offset is not None:
+        status, headers, body = projects(server, columns="id", offset=offset, limit=30)
+        page = json.loads(body)
+        assert status == 200 and page["offset"] == offset and page["count"] <= 30
+        ids += [r["id"] for r in page["data"]]
+        assert page["next_offset"] == (int(headers["x-next-offset"]) if "x-next-offset" in headers else None)
+        offset, pages = page["next_offset"], pages + 1
+    assert ids == server.dataset.frame["id"].tolist()
+    assert pages == -(-len(ids) // 30)
+
+
+def test_arrow_format(server):
+    frame = server.dataset.frame
+    for headers, query in (({}, {"format": "arrow"}), ({"Accept": ARROW_TYPE}, {})):
+        status, response_headers, body = projects(server, headers, columns="id,budget,late", status="At Risk", **query)
+        assert status == 200 and response_headers["content-type"] == ARROW_TYPE
+        table = pa.ipc.open_stream(body).read_all()
+        expected = frame.loc[frame["status"] == "At Risk", ["id", "budget", "late"]].reset_index(drop=True)
+        pd.testing.assert_frame_equal(table.to_pandas(), expected, check_dtype=False)
+
+
+def test_etag_and_not_modified(server):
+    path = "/projects?status=At+Risk&department=HR,Finance"
+    (status, headers, _), = get(server, (path, {}))
+    etag = headers["etag"]
+    responses = get(
+        server,
+        (path, {"If-None-Match": etag}),
+        # Same query in another order and spelling
+        ("/projects?department=Finance&department=HR&status=At+Risk", {"If-None-Match": f"W/{etag}"}),
+        ("/projects?status=At+Risk", {"If-None-Match": etag}),
+        ("/meta", {}),
+    )
+    assert [r[0] for r in responses] == [304, 304, 200, 200]
+    assert responses[0][1]["etag"] == etag and responses[0][2] == b""
+    assert responses[2][1]["etag"] != etag
+    (status, _, _), = get(server, ("/meta", {"If-None-Match": responses[3][1]["etag"]}))
+    assert status == 304
+
+
+@pytest.mark.parametrize("query", [
+    {"limit": "0"},
+    {"limit": "many"},
+    {"offset": "-1"},
+    {"columns": "id,nope"},
+    {"late": "maybe"},
+    {"format": "xml"},
+    {"sort": "id"},
+])
+def test_bad_parameters_are_rejected(server, query):
+    status, headers, body = projects(server, **query)
+    assert status == 400 and headers["content-type"] == "application/json"
+    assert json.loads(body)["error"]
+    # The connection stays usable after an error
+    assert [r[0] for r in get(server, ("/projects?" + urlencode(query), {}), ("/projects?limit=1", {}))] == [400, 200]
@@ -0,0 +1,63 @@
+import json
+
+import pandas as pd
+import pytest
+
+from clean_transform import export, load_projects, output_path, run_incremental, transform
+from generate_data import write_projects
+
+REFERENCE_DATE = pd.Timestamp("2025-08-16")
+
+
+@pytest.fixture(scope="module")
+def inputs(tmp_path_factory):
+    """Portfolio A, and B with a share of A's budgets, costs and statuses edited."""
+    root = tmp_path_factory.mktemp("input")
+    a = write_projects(root / "a.json", 3000, messy_status=0.3)
+    payload = json.loads(a.read_text(encoding="utf-8"))
+    for i, project in enumerate(payload["projects"]):
+        if i % 7 == 0:
+            project["actual_cost"] = (project["actual_cost"] or 0) * 1.37 + 11
+        if i % 11 == 0:
+            project["status"] = "Completed" if project["status"] != "Completed" else "At Risk"
+    b = root / "b.json"
+    b.write_text(json.dumps(payload), encoding="utf-8")
+    return a, b
+
+
+def full_run(input_path, outdir, fmt):
+    return export(transform(load_projects(input_path), REFERENCE_DATE), outdir, fmt)
+
+
+def assert_same_output(got, expected, fmt):
+    if fmt == "csv":
+        assert got.read_bytes() == expected.read_bytes()
+    else:
+        # Batched runs write a dictionary per row group, so compare values rather than categories
+        got, expected = (pd.read_parquet(p) for p in (got, expected))
+        for df in (got, expected):
+            for c in df.select_dtypes("category"):
+                df[c] = df[c].astype(object)
+        pd.testing.assert_frame_equal(got, expected)
+
+
+@pytest.mark.parametrize("batch_size", [None, 700])
+@pytest.mark.parametrize("fmt", ["csv", "parquet"])
+def test_incremental_matches_full_run(tmp_path, inputs, fmt, batch_size):
+    a, b = inputs
+    outdir = tmp_path / "out"
+    assert run_incremental(a, outdir, REFERENCE_DATE, fmt, batch_size)[1:] == (3000, 0)
+    _, rows, reused = run_incremental(b, outdir, REFERENCE_DATE, fmt, batch_size)
+    assert rows == 3000 and 0 < reused < 3000
+    assert_same_output(output_path(outdir, fmt), full_run(b, tmp_path / "full", fmt), fmt)
+
+
+@pytest.mark.parametrize("fmt", ["csv", "parquet"])
+def test_normal_run_in_between_is_not_reused(tmp_path, inputs, fmt):
+    a, b = inputs
+    outdir = tmp_path / "out"
+    run_incremental(a, outdir, REFERENCE_DATE, fmt)
+    full_run(b, outdir, fmt)  # overwrites the output but not the state
+    _, _, reused = run_incremental(a, outdir, REFERENCE_DATE, fmt)
+    assert reused == 3000
+    assert_same_output(output_path(outdir, fmt), full_run(a, tmp_path / "full", fmt), fmt)
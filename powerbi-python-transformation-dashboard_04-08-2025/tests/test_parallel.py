@@ -0,0 +1,61 @@
+import json
+import os
+import random
+from pathlib import Path
+
+import pandas as pd
+import pyarrow.parquet as pq
+import pytest
+
+from clean_transform import load_projects, run_parallel, transform
+from generate_data import DEFECTS, generate_chunk, write_projects
+
+REFERENCE_DATE = pd.Timestamp("2025-08-16")
+SHM_DIR = Path("/dev/shm")
+
+
+def shared_blocks():
+    return set(os.listdir(SHM_DIR)) if SHM_DIR.is_dir() else set()
+
+
+@pytest.fixture(scope="module")
+def messy_json(tmp_path_factory):
+    """Generated projects with the key order shifting between records, statuses the
+    pipeline does not know, and keys that only some records have."""
+    rng = random.Random(0)
+    chunk = generate_chunk(0, 400, 42, {name: 0.05 for name in DEFECTS}, messy_status=0.3)
+    records = json.loads(chunk.to_json(orient="records"))
+    for i, record in enumerate(records):
+        if i % 13 == 0:
+            record["status"] = rng.choice(["Paused", "on hold", "", None])
+        if i % 5 == 0:
+            del record["owner"]
+        if i > 250:
+            record["note"] = f"note {i}"
+        items = list(record.items())
+        rng.shuffle(items)
+        records[i] = dict(items)
+    path = tmp_path_factory.mktemp("input") / "messy.json"
+    path.write_text(json.dumps({"projects": records}), encoding="utf-8")
+    return path
+
+
+@pytest.fixture(scope="module")
+def row_groups_parquet(tmp_path_factory):
+    root = tmp_path_factory.mktemp("input")
+    table = pq.read_table(write_projects(root / "generated.parquet", 1000, "parquet"))
+    path = root / "row_groups.parquet"
+    pq.write_table(table, path, row_group_size=90)
+    assert pq.ParquetFile(path).num_row_groups == 12
+    return path
+
+
+@pytest.mark.parametrize("workers", [2, 3])
+@pytest.mark.parametrize("input_name", ["messy_json", "row_groups_parquet"])
+def test_parallel_matches_serial(request, input_name, workers):
+    input_path = request.getfixturevalue(input_name)
+    before = shared_blocks()
+    expected = transform(load_projects(input_path), REFERENCE_DATE)
+    got = run_parallel(input_path, REFERENCE_DATE, workers)
+    pd.testing.assert_frame_equal(got, expected)
+    assert shared_blocks() == before
@@ -0,0 +1,65 @@
+import io
+import json
+
+import pandas as pd
+import pytest
+
+import clean_transform
+from clean_transform import export, iter_json_array, load_projects, run_streaming, transform
+from generate_data import write_projects
+
+REFERENCE_DATE = pd.Timestamp("2025-08-16")
+
+DOCUMENT = json.dumps({
+    "meta": {"source": 'say "hi" ] }', "sizes": [1, 2.5e-3, {"nested": [[], {}]}]},
+    "projects": [
+        {"id": "P1", "name": "Brace } and bracket ]", "budget": -0.25, "tags": ["a", {"b": None}]},
+        {"id": "P2", "name": "Esc\\aped \"quotes\" and é", "budget": 1e+2, "actual_cost": 12345.678},
+        {"id": "P3", "name": "", "budget": None, "risk_score": 3},
+    ],
+    "tail": -0.25,
+    "flags": [True, False, None],
+}, ensure_ascii=False)
+
+
+@pytest.mark.parametrize("read_size", [*range(1, 20), 64, 1 << 20])
+def test_iter_json_array_any_read_size(monkeypatch, read_size):
+    monkeypatch.setattr(clean_transform, "READ_SIZE", read_size)
+    assert list(iter_json_array(io.StringIO(DOCUMENT))) == json.loads(DOCUMENT)["projects"]
+
+
+@pytest.mark.parametrize("read_size", [1, 3, 7])
+def test_iter_json_array_compact_and_empty(monkeypatch, read_size):
+    monkeypatch.setattr(clean_transform, "READ_SIZE", read_size)
+    assert list(iter_json_array(io.StringIO('{"n":-1.5e-3,"projects":[1,-0.0,{"x":2}],"m":1E2}'))) == [1, -0.0, {"x": 2}]
+    assert list(iter_json_array(io.StringIO('{"projects": []}'))) == []
+    assert list(iter_json_array(io.StringIO("{}"))) == []
+
+
+def test_iter_json_array_rejects_truncated_input(monkeypatch):
+    monkeypatch.setattr(clean_transform, "READ_SIZE", 4)
+    with pytest.raises(ValueError):
+        list(iter_json_array(io.StringIO('{"projects": [{"id": "P1"}, {"id": ')))
+
+
+@pytest.fixture(scope="module")
+def projects_json(tmp_path_factory):
+    return write_projects(tmp_path_factory.mktemp("input") / "projects.json", 500, messy_status=0.3)
+
+
+@pytest.mark.parametrize("fmt", ["csv", "parquet"])
+def test_run_streaming_matches_full_run(tmp_path, projects_json, fmt):
+    full = export(transform(load_projects(projects_json), REFERENCE_DATE), tmp_path / "full", fmt)
+    assert run_streaming(projects_json, tmp_path / "streamed", REFERENCE_DATE, batch_size=37, fmt=fmt) == 500
+    streamed = clean_transform.output_path(tmp_path / "streamed", fmt)
+    if fmt == "csv":
+        assert streamed.read_bytes() == full.read_bytes()
+    else:
+        # Each row group has its own dictionary, so compare values rather than categories
+        expected, got = (pd.read_parquet(p) for p in (full, streamed))
+        for df in (expected, got):
+            for c in df.select_dtypes("category"):
+                df[c] = df[c].astype(object)
+        pd.testing.assert_frame_equal(got, expected)
+    for name in (clean_transform.DQ_CODES_NAME, clean_transform.DQ_SUMMARY_NAME):
+        assert (tmp_path / "streamed" / name).read_bytes() == (tmp_path / "full" / name).read_bytes()